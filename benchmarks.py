@@ -0,0 +1,275 @@
+import logging
+import argparse
+import json
+import math
+import os
+import pickle
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Any, Optional, Callable
+import numpy as np
+import genetic_programming
+import population_archive
+
+# Reproducible benchmarks of the hot paths, on the domains/arithmetics.xml domain with seeded random individuals.
+# Each result is identified by a key like 'evaluation/EvaluateBatch/depth=7/rows=10000' and holds metrics whose name tells
+# which direction is better (cf. METRIC_SUFFIX_TO_HIGHER_IS_BETTER_DICT), such that runs can be compared with a baseline file.
+
+DOMAIN_FILEPATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'domains', 'arithmetics.xml')
+VARIABLE_NAME_TO_TYPE_DICT: Dict[str, str] = {'x': 'float', 'y': 'float', 'cond': 'bool'}
+PROPORTION_OF_CONSTANTS: float = 0.3
+CONSTANT_CREATION_PARAMETERS_LIST: List[float] = [-5.0, 5.0]
+METRIC_SUFFIX_TO_HIGHER_IS_BETTER_DICT: Dict[str, bool] = {'Seconds': False, 'PerSecond': True, 'Bytes': False}
+
+FULL_CONFIGURATION: Dict[str, List[int]] = {
+    'depths': [3, 5, 7, 9, 11, 13, 15],
+    'numbersOfRows': [1, 100, 10000, 1000000],
+    'populationSizes': [100, 10000, 100000]
+}
+QUICK_CONFIGURATION: Dict[str, List[int]] = {
+    'depths': [3, 7],
+    'numbersOfRows': [1, 1000],
+    'populationSizes': [1000]
+}
+
+def FunctionNameToWeightDict(interpreter: genetic_programming.Interpreter) -> Dict[str, float]:
+    return {functionName: 1.0 for functionName in interpreter._signatureTable._functionNamesTuple}
+
+def LevelToFunctionProbabilityDict(depth: int) -> Dict[int, float]:
+    # Bushy trees, limited by the maximum depth
+    return {level: (1.0 if level == 0 else 0.9) for level in range(depth)}
+
+def Dataset(numberOfRows: int, seed: int) -> Dict[str, np.ndarray]:
+    randomGenerator: np.random.Generator = np.random.default_rng(seed)
+    return {'x': randomGenerator.uniform(-10.0, 10.0, numberOfRows), 'y': randomGenerator.uniform(-3.0, 3.0, numberOfRows),
+            'cond': randomGenerator.random(numberOfRows) < 0.5}
+
+def MinimumTime(function: Callable[[], Any], repeats: int) -> float:
+    minimumSeconds: float = math.inf
+    for _ in range(repeats):
+        startTime: float = time.perf_counter()
+        function()
+        minimumSeconds = min(minimumSeconds, time.perf_counter() - startTime)
+    return minimumSeconds
+
+def BenchmarkEvaluation(interpreter: genetic_programming.Interpreter, configuration: Dict[str, List[int]], seed: int, repeats: int,
+                        maximumNodeEvaluations: int, maximumScalarRows: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time per node-evaluation of each evaluation path, for each depth and number of rows. The number of evaluated individuals
+    is limited such that a case performs about maximumNodeEvaluations node-evaluations. The row-by-row paths are skipped
+    above maximumScalarRows rows.
+    """
+    keyToMetricsDict: Dict[str, Dict[str, float]] = {}
+    for depth in configuration['depths']:
+        generator: genetic_programming.IndividualGenerator = genetic_programming.IndividualGenerator(
+            interpreter, 'float', LevelToFunctionProbabilityDict(depth), PROPORTION_OF_CONSTANTS, FunctionNameToWeightDict(interpreter),
+            CONSTANT_CREATION_PARAMETERS_LIST, VARIABLE_NAME_TO_TYPE_DICT)
+        population: List[genetic_programming.Individual] = generator.CreatePopulation(20, seed=seed + depth, maximumDepth=depth)
+        for numberOfRows in configuration['numbersOfRows']:
+            dataset: Dict[str, np.ndarray] = Dataset(numberOfRows, seed)
+            # The individuals evaluated in this case, within the budget of node-evaluations
+            individualsList: List[genetic_programming.Individual] = []
+            numberOfNodes: int = 0
+            for individual in population:
+                if len(individualsList) > 0 and (numberOfNodes + len(interpreter.Genome(individual))) * numberOfRows > maximumNodeEvaluations:
+                    break
+                individualsList.append(individual)
+                numberOfNodes += len(interpreter.Genome(individual))
+            numberOfNodeEvaluations: int = numberOfNodes * numberOfRows
+
+            pathToFunctionDict: Dict[str, Callable[[], Any]] = {
+                'EvaluateBatch': lambda: [interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, dataset, 'float')
+                                          for individual in individualsList]
+            }
+            if numberOfRows <= maximumScalarRows:
+                rowsList: List[Dict[str, Any]] = [{name: array[rowNdx].item() for name, array in dataset.items()} for rowNdx in range(numberOfRows)]
+                elementsList: List[ET.Element] = [list(individual.Tree().getroot())[0] for individual in individualsList]
+                compiledFunctionsList: List[Callable] = [interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')
+                                                         for individual in individualsList]
+                pathToFunctionDict['EvaluateElement'] = lambda: [interpreter.EvaluateElement(element, VARIABLE_NAME_TO_TYPE_DICT, row, 'float')
+                                                                 for element in elementsList for row in rowsList]
+                pathToFunctionDict['Evaluate'] = lambda: [interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, row, 'float')
+                                                          for individual in individualsList for row in rowsList]
+                pathToFunctionDict['Compile'] = lambda: [compiledFunction(row) for compiledFunction in compiledFunctionsList for row in rowsList]
+            with np.errstate(all='ignore'):
+                for path, function in pathToFunctionDict.items():
+                    seconds: float = MinimumTime(function, repeats)
+                    keyToMetricsDict['evaluation/{}/depth={}/rows={}'.format(path, depth, numberOfRows)] = {
+                        'numberOfIndividuals': len(individualsList), 'numberOfNodes': numberOfNodes,
+                        'nodeEvaluationSeconds': seconds / numberOfNodeEvaluations, 'nodeEvaluationsPerSecond': numberOfNodeEvaluations / seconds}
+            logging.info("BenchmarkEvaluation(): depth = {}; numberOfRows = {}; numberOfNodes = {}".format(depth, numberOfRows, numberOfNodes))
+    return keyToMetricsDict
+
+def BenchmarkGeneration(interpreter: genetic_programming.Interpreter, configuration: Dict[str, List[int]], seed: int,
+                        repeats: int) -> Dict[str, Dict[str, float]]:
+    """
+    Individuals generated per second, with Interpreter.CreateElement() and IndividualGenerator.CreatePopulation(),
+    and memory per individual of the created population
+    """
+    keyToMetricsDict: Dict[str, Dict[str, float]] = {}
+    depth: int = 7
+    levelToFunctionProbabilityDict: Dict[int, float] = LevelToFunctionProbabilityDict(depth)
+    functionNameToWeightDict: Dict[str, float] = FunctionNameToWeightDict(interpreter)
+    generator: genetic_programming.IndividualGenerator = genetic_programming.IndividualGenerator(
+        interpreter, 'float', levelToFunctionProbabilityDict, PROPORTION_OF_CONSTANTS, functionNameToWeightDict,
+        CONSTANT_CREATION_PARAMETERS_LIST, VARIABLE_NAME_TO_TYPE_DICT)
+    for populationSize in configuration['populationSizes']:
+        def CreateElements() -> None:
+            random.seed(seed)
+            for _ in range(populationSize):
+                interpreter.CreateElement('float', 0, levelToFunctionProbabilityDict, PROPORTION_OF_CONSTANTS, functionNameToWeightDict,
+                                          CONSTANT_CREATION_PARAMETERS_LIST, VARIABLE_NAME_TO_TYPE_DICT)
+        seconds: float = MinimumTime(CreateElements, repeats)
+        keyToMetricsDict['generation/CreateElement/population={}'.format(populationSize)] = {'individualsPerSecond': populationSize / seconds}
+
+        seconds = MinimumTime(lambda: generator.CreatePopulation(populationSize, seed=seed, maximumDepth=depth), repeats)
+        tracemalloc.start()
+        population: List[genetic_programming.Individual] = generator.CreatePopulation(populationSize, seed=seed, maximumDepth=depth)
+        populationNumberOfBytes: int = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        numberOfNodes: int = sum(len(individual._genome) for individual in population)
+        keyToMetricsDict['generation/CreatePopulation/population={}'.format(populationSize)] = {
+            'individualsPerSecond': populationSize / seconds, 'nodesPerIndividual': numberOfNodes / populationSize,
+            'memoryPerIndividualBytes': populationNumberOfBytes / populationSize}
+        logging.info("BenchmarkGeneration(): populationSize = {}".format(populationSize))
+    return keyToMetricsDict
+
+def BenchmarkSerialization(interpreter: genetic_programming.Interpreter, configuration: Dict[str, List[int]], seed: int,
+                           repeats: int, maximumNumberOfXmlFiles: int) -> Dict[str, Dict[str, float]]:
+    """
+    Bytes per individual and save/load throughput, with Individual.Save()/LoadIndividual() (one XML file per individual,
+    on at most maximumNumberOfXmlFiles individuals) and with population_archive.SavePopulation()/LoadPopulation().
+    Time to create an interpreter from the domain file, parsed or through the cached signature table.
+    """
+    keyToMetricsDict: Dict[str, Dict[str, float]] = {}
+    depth: int = 7
+    generator: genetic_programming.IndividualGenerator = genetic_programming.IndividualGenerator(
+        interpreter, 'float', LevelToFunctionProbabilityDict(depth), PROPORTION_OF_CONSTANTS, FunctionNameToWeightDict(interpreter),
+        CONSTANT_CREATION_PARAMETERS_LIST, VARIABLE_NAME_TO_TYPE_DICT)
+    with tempfile.TemporaryDirectory() as directory:
+        domainFilepath: str = os.path.join(directory, os.path.basename(DOMAIN_FILEPATH)) # The cache is written next to the copy
+        shutil.copyfile(DOMAIN_FILEPATH, domainFilepath)
+        genetic_programming.LoadSignatureTable(domainFilepath)
+        interpreterClass: type = type(interpreter)
+        parseSeconds: float = MinimumTime(lambda: interpreterClass(ET.parse(domainFilepath)), repeats)
+        cachedLoadSeconds: float = MinimumTime(lambda: interpreterClass(genetic_programming.LoadSignatureTable(domainFilepath)), repeats)
+        keyToMetricsDict['serialization/domain'] = {'parsedInterpreterSeconds': parseSeconds, 'cachedInterpreterSeconds': cachedLoadSeconds,
+                                                    'signatureTablePickleBytes': len(pickle.dumps(interpreter._signatureTable))}
+        for populationSize in configuration['populationSizes']:
+            population: List[genetic_programming.Individual] = generator.CreatePopulation(populationSize, seed=seed, maximumDepth=depth)
+
+            xmlPopulation: List[genetic_programming.Individual] = population[: maximumNumberOfXmlFiles]
+            xmlFilepathsList: List[str] = [os.path.join(directory, 'individual_{}.xml'.format(individualNdx)) for individualNdx in range(len(xmlPopulation))]
+            saveSeconds: float = MinimumTime(lambda: [individual.Save(filepath) for individual, filepath in zip(xmlPopulation, xmlFilepathsList)], repeats)
+            loadSeconds: float = MinimumTime(lambda: [genetic_programming.LoadIndividual(filepath) for filepath in xmlFilepathsList], repeats)
+            xmlNumberOfBytes: int = sum(os.path.getsize(filepath) for filepath in xmlFilepathsList)
+            keyToMetricsDict['serialization/xml/population={}'.format(populationSize)] = {
+                'fileSizePerIndividualBytes': xmlNumberOfBytes / len(xmlPopulation),
+                'savedIndividualsPerSecond': len(xmlPopulation) / saveSeconds, 'loadedIndividualsPerSecond': len(xmlPopulation) / loadSeconds}
+            for filepath in xmlFilepathsList:
+                os.remove(filepath)
+
+            archiveFilepath: str = os.path.join(directory, 'population.gparch')
+            saveSeconds = MinimumTime(lambda: population_archive.SavePopulation(archiveFilepath, interpreter, population), repeats)
+            loadSeconds = MinimumTime(lambda: population_archive.LoadPopulation(archiveFilepath, interpreter), repeats)
+            archiveNumberOfBytes: int = os.path.getsize(archiveFilepath) + os.path.getsize(archiveFilepath + '.idx')
+            keyToMetricsDict['serialization/archive/population={}'.format(populationSize)] = {
+                'fileSizePerIndividualBytes': archiveNumberOfBytes / populationSize,
+                'genomeSizePerIndividualBytes': sum(individual._genome.NumberOfBytes() for individual in population) / populationSize,
+                'savedIndividualsPerSecond': populationSize / saveSeconds, 'loadedIndividualsPerSecond': populationSize / loadSeconds,
+                'saveMegabytesPerSecond': archiveNumberOfBytes / saveSeconds / 1e6, 'loadMegabytesPerSecond': archiveNumberOfBytes / loadSeconds / 1e6}
+            logging.info("BenchmarkSerialization(): populationSize = {}".format(populationSize))
+    return keyToMetricsDict
+
+def HigherIsBetter(metricName: str) -> Optional[bool]:
+    """
+    Returns whether a higher value of the metric is better, or None if the metric is informative only (e.g. a number of nodes)
+    """
+    for suffix, higherIsBetter in METRIC_SUFFIX_TO_HIGHER_IS_BETTER_DICT.items():
+        if metricName.endswith(suffix):
+            return higherIsBetter
+    return None
+
+def CompareWithBaseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Returns the comparison of each metric present in both results, with a 'regression' flag when the metric is worse
+    than the baseline by more than the relative tolerance
+    """
+    comparisonsList: List[Dict[str, Any]] = []
+    for key, metricToValueDict in results['results'].items():
+        baselineMetricToValueDict: Optional[Dict[str, float]] = baseline['results'].get(key)
+        if baselineMetricToValueDict is None:
+            continue
+        for metricName, value in metricToValueDict.items():
+            higherIsBetter: Optional[bool] = HigherIsBetter(metricName)
+            baselineValue: Optional[float] = baselineMetricToValueDict.get(metricName)
+            if higherIsBetter is None or baselineValue is None or baselineValue == 0:
+                continue
+            ratio: float = value / baselineValue
+            isRegression: bool = ratio < 1.0 - tolerance if higherIsBetter else ratio > 1.0 + tolerance
+            comparisonsList.append({'key': key, 'metric': metricName, 'value': value, 'baseline': baselineValue, 'ratio': ratio,
+                                    'regression': isRegression})
+    return comparisonsList
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks of the evaluation, generation and serialization hot paths")
+    parser.add_argument('--output', help="Path of the JSON results file. Default: print to stdout", default=None)
+    parser.add_argument('--baseline', help="Path of a JSON results file to compare with", default=None)
+    parser.add_argument('--tolerance', help="Relative degradation reported as a regression. Default: 0.2", type=float, default=0.2)
+    parser.add_argument('--quick', help="Small configuration, for a smoke test", action='store_true')
+    parser.add_argument('--suites', help="Comma-separated suites among evaluation, generation, serialization", default='evaluation,generation,serialization')
+    parser.add_argument('--seed', help="Random seed. Default: 0", type=int, default=0)
+    parser.add_argument('--repeats', help="Number of timed repetitions; the minimum time is kept. Default: 3", type=int, default=3)
+    parser.add_argument('--maximumNodeEvaluations', help="Node-evaluation budget of an evaluation case. Default: 20000000", type=int, default=20000000)
+    parser.add_argument('--maximumScalarRows', help="Number of rows above which the row-by-row paths are skipped. Default: 10000", type=int, default=10000)
+    parser.add_argument('--maximumNumberOfXmlFiles', help="Number of individuals saved as XML files. Default: 1000", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)-15s %(levelname)s %(message)s')
+    configuration: Dict[str, List[int]] = QUICK_CONFIGURATION if args.quick else FULL_CONFIGURATION
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    suitesList: List[str] = args.suites.split(',')
+    keyToMetricsDict: Dict[str, Dict[str, float]] = {}
+    if 'evaluation' in suitesList:
+        keyToMetricsDict.update(BenchmarkEvaluation(interpreter, configuration, args.seed, args.repeats, args.maximumNodeEvaluations,
+                                                    args.maximumScalarRows))
+    if 'generation' in suitesList:
+        keyToMetricsDict.update(BenchmarkGeneration(interpreter, configuration, args.seed, args.repeats))
+    if 'serialization' in suitesList:
+        keyToMetricsDict.update(BenchmarkSerialization(interpreter, configuration, args.seed, args.repeats, args.maximumNumberOfXmlFiles))
+
+    results: Dict[str, Any] = {
+        'metadata': {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+                     'processor': platform.processor(), 'seed': args.seed, 'repeats': args.repeats, 'configuration': configuration,
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': keyToMetricsDict
+    }
+    exitCode: int = 0
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as baselineFile:
+            baseline: Dict[str, Any] = json.load(baselineFile)
+        comparisonsList: List[Dict[str, Any]] = CompareWithBaseline(results, baseline, args.tolerance)
+        results['comparison'] = {'baseline': args.baseline, 'tolerance': args.tolerance, 'metrics': comparisonsList}
+        for comparison in comparisonsList:
+            if comparison['regression']:
+                logging.warning("Regression: {} {}: {:.4g} vs {:.4g} in the baseline (ratio {:.3f})".format(
+                    comparison['key'], comparison['metric'], comparison['value'], comparison['baseline'], comparison['ratio']))
+                exitCode = 1
+
+    resultsStr: str = json.dumps(results, indent=2)
+    if args.output is None:
+        print(resultsStr)
+    else:
+        with open(args.output, 'w') as outputFile:
+            outputFile.write(resultsStr)
+    sys.exit(exitCode)
+
+
+if __name__ == '__main__':
+    main()
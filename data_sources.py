@@ -0,0 +1,213 @@
+import logging
+import abc
+import csv
+import itertools
+import queue
+import threading
+from typing import Dict, List, Any, Optional, Iterator, Iterable, Callable, Union, Tuple
+import numpy as np
+
+# A chunk maps the names used by the interpreter (the variable names, and any other column used by the cost function,
+# like the targets) to 1D arrays with the same number of rows
+Chunk = Dict[str, np.ndarray]
+
+class DataSource(abc.ABC):
+    """
+    Abstract class of the streaming datasets. variableNameToColumnDict maps each name of the produced chunks to a column of the
+    underlying data. Chunks() can be called once per pass over the data.
+    """
+    def __init__(self, variableNameToColumnDict: Optional[Dict[str, Any]], prefetchNumberOfChunks: int = 2) -> None:
+        super().__init__()
+        self._variableNameToColumnDict: Optional[Dict[str, Any]] = variableNameToColumnDict
+        self._prefetchNumberOfChunks: int = prefetchNumberOfChunks
+
+    @abc.abstractmethod
+    def ReadChunks(self) -> Iterator[Chunk]:
+        pass
+
+    def Chunks(self) -> Iterator[Chunk]:
+        """
+        Iterates over the chunks of a new pass. If prefetchNumberOfChunks > 0, the chunks are read ahead by a background thread,
+        such that reading overlaps with the evaluation. At most prefetchNumberOfChunks chunks wait in the queue.
+        """
+        if self._prefetchNumberOfChunks <= 0:
+            return self.ReadChunks()
+        return Prefetch(self.ReadChunks(), self._prefetchNumberOfChunks)
+
+
+class CsvDataSource(DataSource):
+    """
+    Reads a CSV file with a header line, chunkSize rows at a time. The columns are referred to by their header names,
+    and converted according to variableNameToTypeDict ('float' if missing), like Interpreter.TypeConverter().
+    If variableNameToColumnDict is None, all the columns are read, under their header names.
+    """
+    def __init__(self, filepath: str, variableNameToColumnDict: Optional[Dict[str, str]] = None,
+                 variableNameToTypeDict: Optional[Dict[str, str]] = None, chunkSize: int = 65536, delimiter: str = ',',
+                 prefetchNumberOfChunks: int = 2) -> None:
+        super().__init__(variableNameToColumnDict, prefetchNumberOfChunks)
+        if chunkSize <= 0:
+            raise ValueError("CsvDataSource.__init__(): chunkSize ({}) must be positive".format(chunkSize))
+        self._filepath: str = filepath
+        self._variableNameToTypeDict: Dict[str, str] = variableNameToTypeDict or {}
+        self._chunkSize: int = chunkSize
+        self._delimiter: str = delimiter
+
+    def ReadChunks(self) -> Iterator[Chunk]:
+        with open(self._filepath, 'r', newline='') as csvFile:
+            reader = csv.reader(csvFile, delimiter=self._delimiter)
+            headerList: List[str] = next(reader)
+            variableNameToColumnDict: Dict[str, str] = self._variableNameToColumnDict or {columnName: columnName for columnName in headerList}
+            variableNameAndColumnNdxList: List[Tuple[str, int]] = []
+            for variableName, columnName in variableNameToColumnDict.items():
+                if columnName not in headerList:
+                    raise KeyError("CsvDataSource.ReadChunks(): The column '{}' doesn't exist in {}".format(columnName, self._filepath))
+                variableNameAndColumnNdxList.append((variableName, headerList.index(columnName)))
+            while True:
+                rowsList: List[List[str]] = list(itertools.islice(reader, self._chunkSize))
+                if len(rowsList) == 0:
+                    return
+                yield {variableName: self.ConvertColumn([row[columnNdx] for row in rowsList],
+                                                        self._variableNameToTypeDict.get(variableName, 'float'))
+                       for variableName, columnNdx in variableNameAndColumnNdxList}
+
+    @staticmethod
+    def ConvertColumn(valuesList: List[str], type: str) -> np.ndarray:
+        if type == 'float':
+            return np.array(valuesList, dtype=float)
+        elif type == 'int':
+            return np.array(valuesList, dtype=np.int64)
+        elif type == 'bool':
+            return np.isin(np.char.lower(np.array(valuesList, dtype=str)), ['true', 'yes'])
+        elif type == 'string':
+            return np.array(valuesList, dtype=object)
+        else:
+            raise NotImplementedError("CsvDataSource.ConvertColumn(): The type {} is not implemented".format(type))
+
+
+class NpyDataSource(DataSource):
+    """
+    Reads .npy files through memory maps, chunkSize rows at a time. A column is either the path of a 1D array file,
+    or a (path, column index) tuple for a 2D array file. All the columns must have the same number of rows.
+    Only the current chunk is copied in memory; the pages of the files are loaded by the operating system on demand.
+    """
+    def __init__(self, variableNameToColumnDict: Dict[str, Union[str, Tuple[str, int]]], chunkSize: int = 65536,
+                 prefetchNumberOfChunks: int = 2) -> None:
+        super().__init__(variableNameToColumnDict, prefetchNumberOfChunks)
+        if chunkSize <= 0:
+            raise ValueError("NpyDataSource.__init__(): chunkSize ({}) must be positive".format(chunkSize))
+        self._chunkSize: int = chunkSize
+
+    def ReadChunks(self) -> Iterator[Chunk]:
+        filepathToArrayDict: Dict[str, np.ndarray] = {}
+        variableNameToColumnArrDict: Dict[str, np.ndarray] = {}
+        for variableName, column in self._variableNameToColumnDict.items():
+            filepath: str = column if isinstance(column, str) else column[0]
+            if filepath not in filepathToArrayDict:
+                filepathToArrayDict[filepath] = np.load(filepath, mmap_mode='r')
+            array: np.ndarray = filepathToArrayDict[filepath]
+            if isinstance(column, str):
+                if array.ndim != 1:
+                    raise ValueError("NpyDataSource.ReadChunks(): The array in {} has {} dimensions; specify a column index".format(filepath, array.ndim))
+                variableNameToColumnArrDict[variableName] = array
+            else:
+                if array.ndim != 2:
+                    raise ValueError("NpyDataSource.ReadChunks(): The array in {} has {} dimensions, while a column index is specified".format(
+                        filepath, array.ndim))
+                variableNameToColumnArrDict[variableName] = array[:, column[1]]
+        numberOfRowsSet = {len(columnArr) for columnArr in variableNameToColumnArrDict.values()}
+        if len(numberOfRowsSet) > 1:
+            raise ValueError("NpyDataSource.ReadChunks(): The columns have different numbers of rows: {}".format(sorted(numberOfRowsSet)))
+        numberOfRows: int = numberOfRowsSet.pop() if len(numberOfRowsSet) > 0 else 0
+        for startNdx in range(0, numberOfRows, self._chunkSize):
+            yield {variableName: np.array(columnArr[startNdx: startNdx + self._chunkSize])
+                   for variableName, columnArr in variableNameToColumnArrDict.items()}
+
+
+class GeneratorDataSource(DataSource):
+    """
+    Chunks produced by a generator function, called at the start of each pass. The generator yields dictionaries
+    of 1D arrays, whose keys are renamed through variableNameToColumnDict, if specified.
+    """
+    def __init__(self, generatorFunction: Callable[[], Iterable[Dict[str, Any]]], variableNameToColumnDict: Optional[Dict[str, str]] = None,
+                 prefetchNumberOfChunks: int = 2) -> None:
+        super().__init__(variableNameToColumnDict, prefetchNumberOfChunks)
+        self._generatorFunction: Callable[[], Iterable[Dict[str, Any]]] = generatorFunction
+
+    def ReadChunks(self) -> Iterator[Chunk]:
+        for chunk in self._generatorFunction():
+            if self._variableNameToColumnDict is None:
+                yield {name: np.asarray(values) for name, values in chunk.items()}
+            else:
+                yield {variableName: np.asarray(chunk[column]) for variableName, column in self._variableNameToColumnDict.items()}
+
+
+_PREFETCH_END = object()
+
+def Prefetch(chunksIterator: Iterator[Chunk], maximumNumberOfChunks: int) -> Iterator[Chunk]:
+    """
+    Iterates over chunksIterator, read ahead by a background thread. At most maximumNumberOfChunks chunks wait in the queue.
+    An exception raised while reading is raised again in the consumer thread. If the consumer stops early, the thread is stopped.
+    """
+    chunksQueue: queue.Queue = queue.Queue(maxsize=maximumNumberOfChunks)
+    stopEvent: threading.Event = threading.Event()
+
+    def Put(item: Any) -> bool:
+        # Waits for a free slot, unless the consumer has stopped
+        while not stopEvent.is_set():
+            try:
+                chunksQueue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def Read() -> None:
+        try:
+            for chunk in chunksIterator:
+                if not Put(chunk):
+                    return
+            Put(_PREFETCH_END)
+        except BaseException as exception:
+            Put(exception)
+        finally:
+            closeFunction: Optional[Callable[[], None]] = getattr(chunksIterator, 'close', None)
+            if closeFunction is not None:
+                closeFunction()
+
+    readerThread: threading.Thread = threading.Thread(target=Read, name='data_sources.Prefetch', daemon=True)
+    readerThread.start()
+    try:
+        while True:
+            item: Any = chunksQueue.get()
+            if item is _PREFETCH_END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stopEvent.set()
+        readerThread.join()
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import xml.etree.ElementTree as ET
+    import genetic_programming
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)-15s %(levelname)s %(message)s')
+
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse('./domains/arithmetics.xml'))
+    variableNameToTypeDict: Dict[str, str] = {'x': 'float', 'y': 'float'}
+    individual: genetic_programming.Individual = interpreter.CreateIndividual('float', {0: 1.0, 1: 0.8, 2: 0.5}, 0.3,
+                                                                              {name: 1 for name in interpreter._functionNameToSignatureDict},
+                                                                              [-5, 5], variableNameToTypeDict)
+    with tempfile.TemporaryDirectory() as directory:
+        csvFilepath: str = os.path.join(directory, 'dataset.csv')
+        with open(csvFilepath, 'w') as csvFile:
+            csvFile.write('x,y,target\n')
+            for rowNdx in range(100000):
+                csvFile.write('{},{},{}\n'.format(rowNdx / 1000, rowNdx % 7, rowNdx / 500 + rowNdx % 7))
+        dataSource: CsvDataSource = CsvDataSource(csvFilepath, chunkSize=10000)
+        cost: float = interpreter.EvaluateCostStream(individual, variableNameToTypeDict, dataSource,
+                                                     lambda predictionsArr, chunk: np.abs(predictionsArr - chunk['target']), 'float')
+        logging.info("Mean absolute error over the CSV file: {}".format(cost))
@@ -0,0 +1,419 @@
+import logging
+import argparse
+import collections
+import math
+import os
+import socket
+import threading
+import time
+import traceback
+import multiprocessing
+import multiprocessing.connection
+from typing import Dict, List, Any, Optional, Callable, Union, Tuple, Deque
+import numpy as np
+import genetic_programming
+
+# Protocol, as pickled tuples over authenticated multiprocessing connections:
+#   worker -> coordinator: ('hello', workerName), ('heartbeat',), ('result', generationId, batchId, costsList, seconds),
+#                          ('error', generationId, batchId, tracebackStr)
+#   coordinator -> worker: ('setup', interpreterClass, signatureTable, dataset, variableNameToTypeDict, returnType, costFunction, datasetId,
+#                           heartbeatInterval), ('batch', generationId, batchId, seed, uniqueNdxsList, genomeBytesList), ('stop',)
+# The coordinator keeps up to prefetchNumberOfBatches batches in flight per worker, such that a worker finds its next batch
+# in the socket buffer when it returns a result. The generation id identifies the call of Coordinator.EvaluatePopulation():
+# the results of an earlier call, which was interrupted by an exception, are ignored.
+Address = Union[str, Tuple[str, int]]
+
+class WorkerState():
+    """
+    Bookkeeping of a connected worker, on the coordinator side
+    """
+    def __init__(self, connection: multiprocessing.connection.Connection, batchSize: int) -> None:
+        self._connection: multiprocessing.connection.Connection = connection
+        self._name: str = '?'
+        self._lastMessageTime: float = time.monotonic()
+        self._batchSize: int = batchSize
+        self._batchIdToUniqueNdxsDict: Dict[int, List[int]] = {} # The batches in flight
+
+class Coordinator():
+    """
+    Scores populations on workers that connect over TCP (address = (host, port)) or a Unix socket (address = filepath).
+    The workers (cf. RunWorker()) receive the signature table of the domain file, the dataset, the cost function and the interpreter
+    class once, then pull batches of serialized genomes and return costFunction(EvaluateBatch(individual, ...), dataset), like
+    Interpreter.EvaluatePopulation().
+    dataset is either a dictionary of arrays, sent to each worker, or a picklable callable returning it, called by each worker,
+    e.g. to load a file available on the worker machine. costFunction, the dataset callable and interpreterClass must be importable
+    by the workers.
+    The batch size of each worker is adapted such that a batch takes about targetBatchSeconds. A worker that is disconnected,
+    or that doesn't send a message (its heartbeats included) for heartbeatTimeout seconds, is dropped and its batches are reassigned.
+    The connections are authenticated with authkey; a random key is generated if it is None (cf. Authkey()).
+    """
+    def __init__(self, interpreterClass: type, domainFilepath: str, dataset: Union[Dict[str, np.ndarray], Callable[[], Dict[str, np.ndarray]]],
+                 variableNameToTypeDict: Dict[str, str], returnType: str, costFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], float],
+                 address: Address = ('127.0.0.1', 0), authkey: Optional[bytes] = None, datasetId: Optional[Any] = None,
+                 initialBatchSize: int = 4, maximumBatchSize: int = 256, targetBatchSeconds: float = 0.5, prefetchNumberOfBatches: int = 2,
+                 heartbeatInterval: float = 1.0, heartbeatTimeout: float = 10.0) -> None:
+        if initialBatchSize <= 0 or maximumBatchSize < initialBatchSize:
+            raise ValueError("Coordinator.__init__(): initialBatchSize ({}) must be positive and maximumBatchSize ({}) must be at least initialBatchSize".format(
+                initialBatchSize, maximumBatchSize))
+        if prefetchNumberOfBatches <= 0:
+            raise ValueError("Coordinator.__init__(): prefetchNumberOfBatches ({}) must be positive".format(prefetchNumberOfBatches))
+        if heartbeatTimeout <= heartbeatInterval:
+            raise ValueError("Coordinator.__init__(): heartbeatTimeout ({}) must be greater than heartbeatInterval ({})".format(
+                heartbeatTimeout, heartbeatInterval))
+        self._interpreterClass: type = interpreterClass
+        self._interpreter: genetic_programming.Interpreter = interpreterClass(genetic_programming.LoadSignatureTable(domainFilepath))
+        self._setupMessage: Tuple = ('setup', interpreterClass, self._interpreter._signatureTable, dataset, variableNameToTypeDict, returnType,
+                                     costFunction, datasetId, heartbeatInterval)
+        self._initialBatchSize: int = initialBatchSize
+        self._maximumBatchSize: int = maximumBatchSize
+        self._targetBatchSeconds: float = targetBatchSeconds
+        self._prefetchNumberOfBatches: int = prefetchNumberOfBatches
+        self._heartbeatTimeout: float = heartbeatTimeout
+        self._authkey: bytes = authkey if authkey is not None else os.urandom(32)
+        self._family: str = 'AF_UNIX' if isinstance(address, str) else 'AF_INET'
+        self._listener: multiprocessing.connection.Listener = multiprocessing.connection.Listener(address, family=self._family,
+                                                                                                  authkey=self._authkey)
+        self._workersList: List[WorkerState] = []
+        self._acceptedConnectionsList: List[multiprocessing.connection.Connection] = []
+        self._acceptedConnectionsLock: threading.Lock = threading.Lock()
+        self._isClosed: bool = False
+        self._nextBatchId: int = 0
+        self._generationId: int = 0
+        self._countersDict: Dict[str, int] = {'connectedWorkers': 0, 'lostWorkers': 0, 'batches': 0, 'reassignedBatches': 0, 'individuals': 0}
+        # The listener accepts the workers in the background, such that they can connect at any time
+        self._acceptThread: threading.Thread = threading.Thread(target=self.AcceptConnections, name='distributed_evaluation.Coordinator',
+                                                                daemon=True)
+        self._acceptThread.start()
+
+    def __enter__(self) -> 'Coordinator':
+        return self
+
+    def __exit__(self, *exceptionInfo: Any) -> None:
+        self.Close()
+
+    def Address(self) -> Address:
+        return self._listener.address
+
+    def Authkey(self) -> bytes:
+        return self._authkey
+
+    def Interpreter(self) -> genetic_programming.Interpreter:
+        return self._interpreter
+
+    def NumberOfWorkers(self) -> int:
+        return len(self._workersList)
+
+    def Statistics(self) -> Dict[str, int]:
+        return dict(self._countersDict)
+
+    def AcceptConnections(self) -> None:
+        while True:
+            try:
+                connection: multiprocessing.connection.Connection = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError) as exception:
+                if self._isClosed:
+                    return
+                logging.warning("Coordinator.AcceptConnections(): Rejected a connection: {}".format(exception))
+                continue
+            if self._isClosed:
+                connection.close()
+                return
+            with self._acceptedConnectionsLock:
+                self._acceptedConnectionsList.append(connection)
+
+    def AddAcceptedWorkers(self) -> None:
+        with self._acceptedConnectionsLock:
+            connectionsList: List[multiprocessing.connection.Connection] = self._acceptedConnectionsList
+            self._acceptedConnectionsList = []
+        for connection in connectionsList:
+            try:
+                connection.send(self._setupMessage)
+            except OSError as exception:
+                logging.warning("Coordinator.AddAcceptedWorkers(): Failed to send the setup to a worker: {}".format(exception))
+                connection.close()
+                continue
+            self._workersList.append(WorkerState(connection, self._initialBatchSize))
+            self._countersDict['connectedWorkers'] += 1
+
+    def DropWorker(self, worker: WorkerState, pendingUniqueNdxsDeque: Deque[int], reason: str) -> None:
+        """
+        Closes the connection of a worker and puts its batches in flight back at the front of the pending queue
+        """
+        logging.warning("Coordinator.DropWorker(): Dropping the worker {}: {}".format(worker._name, reason))
+        self._workersList.remove(worker)
+        self._countersDict['lostWorkers'] += 1
+        self._countersDict['reassignedBatches'] += len(worker._batchIdToUniqueNdxsDict)
+        for uniqueNdxsList in reversed(list(worker._batchIdToUniqueNdxsDict.values())):
+            pendingUniqueNdxsDeque.extendleft(reversed(uniqueNdxsList))
+        worker._batchIdToUniqueNdxsDict = {}
+        try:
+            worker._connection.close()
+        except OSError:
+            pass
+
+    def AssignBatches(self, genomeBytesList: List[bytes], pendingUniqueNdxsDeque: Deque[int], seed: Optional[int]) -> None:
+        for worker in list(self._workersList):
+            while len(worker._batchIdToUniqueNdxsDict) < self._prefetchNumberOfBatches and len(pendingUniqueNdxsDeque) > 0:
+                # Near the end of the population, smaller batches keep all the workers busy
+                batchSize: int = min(worker._batchSize, math.ceil(len(pendingUniqueNdxsDeque) / len(self._workersList)))
+                uniqueNdxsList: List[int] = [pendingUniqueNdxsDeque.popleft() for _ in range(batchSize)]
+                batchId: int = self._nextBatchId
+                self._nextBatchId += 1
+                worker._batchIdToUniqueNdxsDict[batchId] = uniqueNdxsList
+                try:
+                    worker._connection.send(('batch', self._generationId, batchId, seed, uniqueNdxsList, [genomeBytesList[uniqueNdx] for uniqueNdx in uniqueNdxsList]))
+                except OSError as exception:
+                    self.DropWorker(worker, pendingUniqueNdxsDeque, "Failed to send a batch: {}".format(exception))
+                    break
+                self._countersDict['batches'] += 1
+
+    def EvaluatePopulation(self, individuals: List[genetic_programming.Individual], seed: Optional[int] = None,
+                           deduplicate: bool = True, timeout: Optional[float] = None) -> List[float]:
+        """
+        Returns the costs of individuals, in their order. Waits for workers if none is connected.
+        If deduplicate is True, the structurally identical individuals are scored once.
+        If seed is not None, the random generators are seeded before each individual from seed and its index among the unique individuals,
+        such that the results don't depend on the scheduling.
+        Raises TimeoutError if the population is not scored within timeout seconds, and RuntimeError if a worker fails to evaluate a batch.
+        """
+        if self._isClosed:
+            raise ValueError("Coordinator.EvaluatePopulation(): The coordinator is closed")
+        individualNdxToUniqueNdxList: List[int] = list(range(len(individuals)))
+        genomeBytesList: List[bytes] = []
+        rootKeyToUniqueNdxDict: Dict[Tuple[int, int], int] = {}
+        for individualNdx, individual in enumerate(individuals):
+            genome: genetic_programming.Genome = self._interpreter.Genome(individual)
+            if deduplicate:
+                rootKey: Tuple[int, int] = (genome.SubtreeHashes()[0], len(genome))
+                if rootKey in rootKeyToUniqueNdxDict:
+                    individualNdxToUniqueNdxList[individualNdx] = rootKeyToUniqueNdxDict[rootKey]
+                    continue
+                rootKeyToUniqueNdxDict[rootKey] = len(genomeBytesList)
+            individualNdxToUniqueNdxList[individualNdx] = len(genomeBytesList)
+            genomeBytesList.append(genome.ToBytes())
+
+        self._generationId += 1
+        costsList: List[Optional[float]] = [None] * len(genomeBytesList)
+        pendingUniqueNdxsDeque: Deque[int] = collections.deque(range(len(genomeBytesList)))
+        numberOfMissingCosts: int = len(genomeBytesList)
+        startTime: float = time.monotonic()
+        # The messages received while the coordinator was idle are still in the buffers: the workers get a fresh delay
+        for worker in self._workersList:
+            worker._lastMessageTime = startTime
+        try:
+            while numberOfMissingCosts > 0:
+                if timeout is not None and time.monotonic() - startTime > timeout:
+                    raise TimeoutError("Coordinator.EvaluatePopulation(): {} costs are missing after {} s, with {} workers".format(
+                        numberOfMissingCosts, timeout, len(self._workersList)))
+                self.AddAcceptedWorkers()
+                self.AssignBatches(genomeBytesList, pendingUniqueNdxsDeque, seed)
+                if len(self._workersList) == 0:
+                    time.sleep(0.05)
+                    continue
+                connectionToWorkerDict: Dict[multiprocessing.connection.Connection, WorkerState] = {worker._connection: worker
+                                                                                                    for worker in self._workersList}
+                for connection in multiprocessing.connection.wait(list(connectionToWorkerDict), timeout=0.1):
+                    worker: WorkerState = connectionToWorkerDict[connection]
+                    try:
+                        message: Tuple = connection.recv()
+                    except (EOFError, OSError) as exception:
+                        self.DropWorker(worker, pendingUniqueNdxsDeque, "Disconnected ({})".format(type(exception).__name__))
+                        continue
+                    worker._lastMessageTime = time.monotonic()
+                    if message[0] == 'hello':
+                        worker._name = message[1]
+                        logging.info("Coordinator.EvaluatePopulation(): The worker {} is connected".format(worker._name))
+                    elif message[0] == 'result':
+                        generationId, batchId, batchCostsList, seconds = message[1:]
+                        if generationId != self._generationId:
+                            continue # A result of an earlier call
+                        uniqueNdxsList: Optional[List[int]] = worker._batchIdToUniqueNdxsDict.pop(batchId, None)
+                        if uniqueNdxsList is None:
+                            continue # Not in flight anymore
+                        for uniqueNdx, cost in zip(uniqueNdxsList, batchCostsList):
+                            if costsList[uniqueNdx] is None:
+                                numberOfMissingCosts -= 1
+                            costsList[uniqueNdx] = cost
+                        self._countersDict['individuals'] += len(uniqueNdxsList)
+                        if seconds > 0:
+                            worker._batchSize = max(1, min(self._maximumBatchSize,
+                                                           round(self._targetBatchSeconds * len(uniqueNdxsList) / seconds)))
+                    elif message[0] == 'error':
+                        generationId, batchId, tracebackStr = message[1:]
+                        if generationId is not None and generationId != self._generationId:
+                            continue # A failure of an earlier call
+                        raise RuntimeError("Coordinator.EvaluatePopulation(): The worker {} failed to evaluate batch {}:\n{}".format(
+                            worker._name, batchId, tracebackStr))
+                now: float = time.monotonic()
+                for worker in list(self._workersList):
+                    if now - worker._lastMessageTime > self._heartbeatTimeout:
+                        self.DropWorker(worker, pendingUniqueNdxsDeque,
+                                        "No heartbeat for {:.1f} s".format(now - worker._lastMessageTime))
+        finally:
+            # After an exception, the batches still in flight belong to this population: they must not use the prefetch slots
+            # of the next call, and their results are ignored (cf. the generation id)
+            for worker in self._workersList:
+                worker._batchIdToUniqueNdxsDict = {}
+        return [costsList[uniqueNdx] for uniqueNdx in individualNdxToUniqueNdxList]
+
+    def Close(self) -> None:
+        """
+        Stops the workers and the listener
+        """
+        if self._isClosed:
+            return
+        self._isClosed = True
+        self.AddAcceptedWorkers()
+        for worker in self._workersList:
+            try:
+                worker._connection.send(('stop',))
+                worker._connection.close()
+            except OSError:
+                pass
+        self._workersList = []
+        # Wake the accept thread up. If the accept thread has already stopped, the connection is refused when the listener is closed
+        threading.Thread(target=self.WakeAcceptThread, name='distributed_evaluation.Coordinator.Close', daemon=True).start()
+        self._acceptThread.join(timeout=5.0)
+        self._listener.close()
+
+    def WakeAcceptThread(self) -> None:
+        try:
+            multiprocessing.connection.Client(self._listener.address, family=self._family, authkey=self._authkey).close()
+        except (OSError, EOFError, multiprocessing.AuthenticationError):
+            pass
+
+
+def RunWorker(address: Address, authkey: bytes, name: Optional[str] = None, connectionTimeout: float = 30.0) -> int:
+    """
+    Connects to a coordinator, retrying for connectionTimeout seconds, and evaluates its batches until it is stopped
+    or disconnected. Returns the number of evaluated individuals.
+    """
+    workerName: str = name or '{}:{}'.format(socket.gethostname(), os.getpid())
+    family: str = 'AF_UNIX' if isinstance(address, str) else 'AF_INET'
+    deadline: float = time.monotonic() + connectionTimeout
+    while True:
+        try:
+            connection: multiprocessing.connection.Connection = multiprocessing.connection.Client(address, family=family, authkey=authkey)
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+    sendLock: threading.Lock = threading.Lock()
+
+    def Send(message: Tuple) -> None:
+        # The heartbeat thread and the main thread share the connection
+        with sendLock:
+            connection.send(message)
+
+    stopEvent: threading.Event = threading.Event()
+    numberOfEvaluatedIndividuals: int = 0
+    try:
+        Send(('hello', workerName))
+        message: Tuple = connection.recv()
+        if message[0] == 'stop':
+            return 0
+        interpreterClass, signatureTable, dataset, variableNameToTypeDict, returnType, costFunction, datasetId, heartbeatInterval = message[1:]
+
+        def SendHeartbeats() -> None:
+            while not stopEvent.wait(heartbeatInterval):
+                try:
+                    Send(('heartbeat',))
+                except OSError:
+                    return
+
+        heartbeatThread: threading.Thread = threading.Thread(target=SendHeartbeats, name='distributed_evaluation.RunWorker', daemon=True)
+        heartbeatThread.start()
+        try:
+            interpreter: genetic_programming.Interpreter = interpreterClass(signatureTable)
+            if callable(dataset):
+                dataset = dataset()
+        except Exception:
+            Send(('error', None, None, traceback.format_exc()))
+            raise
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                logging.info("RunWorker(): The coordinator is disconnected")
+                break
+            if message[0] == 'stop':
+                break
+            generationId, batchId, seed, uniqueNdxsList, genomeBytesList = message[1:]
+            startTime: float = time.perf_counter()
+            try:
+                costsList: List[float] = []
+                for uniqueNdx, genomeBytes in zip(uniqueNdxsList, genomeBytesList):
+                    genetic_programming.SeedRandomGenerators(seed, uniqueNdx)
+                    individual: genetic_programming.Individual = genetic_programming.Individual(
+                        genome=genetic_programming.Genome.FromBytes(interpreter._signatureTable, genomeBytes))
+                    costsList.append(costFunction(interpreter.EvaluateBatch(individual, variableNameToTypeDict, dataset, returnType, datasetId),
+                                                  dataset))
+                reply: Tuple = ('result', generationId, batchId, costsList, time.perf_counter() - startTime)
+                numberOfEvaluatedIndividuals += len(costsList)
+            except Exception:
+                reply = ('error', generationId, batchId, traceback.format_exc())
+            try:
+                Send(reply)
+            except OSError:
+                logging.info("RunWorker(): The coordinator is disconnected")
+                break
+    finally:
+        stopEvent.set()
+        connection.close()
+    return numberOfEvaluatedIndividuals
+
+def ParseAddress(addressStr: str) -> Address:
+    """
+    'host:port' for TCP, a filepath for a Unix socket
+    """
+    if ':' in addressStr and os.sep not in addressStr:
+        host, portStr = addressStr.rsplit(':', 1)
+        return (host, int(portStr))
+    return addressStr
+
+def MeanSquaredError(predictionsArr: np.ndarray, dataset: Dict[str, np.ndarray]) -> float:
+    with np.errstate(over='ignore', invalid='ignore'):
+        return float(np.mean((np.broadcast_to(predictionsArr, dataset['target'].shape) - dataset['target']) ** 2))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)-15s %(levelname)s %(message)s')
+    parser = argparse.ArgumentParser(description="Distributed evaluation of populations")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    workerParser = subparsers.add_parser('worker', help="Connects to a coordinator and evaluates its batches")
+    workerParser.add_argument('--address', required=True, help="host:port, or the filepath of a Unix socket")
+    workerParser.add_argument('--authkey', required=True, help="The authentication key of the coordinator, in hexadecimal")
+    demoParser = subparsers.add_parser('demo', help="Runs a coordinator and local worker processes on domains/arithmetics.xml")
+    demoParser.add_argument('--workers', type=int, default=4)
+    demoParser.add_argument('--populationSize', type=int, default=500)
+    demoParser.add_argument('--numberOfRows', type=int, default=10000)
+    demoParser.add_argument('--unixSocket', help="The filepath of a Unix socket, instead of a localhost TCP port")
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        numberOfIndividuals: int = RunWorker(ParseAddress(args.address), bytes.fromhex(args.authkey))
+        logging.info("Evaluated {} individuals".format(numberOfIndividuals))
+    else:
+        variableNameToTypeDict: Dict[str, str] = {'x': 'float', 'y': 'float'}
+        rng: np.random.Generator = np.random.default_rng(0)
+        demoDataset: Dict[str, np.ndarray] = {'x': rng.uniform(-10, 10, args.numberOfRows), 'y': rng.uniform(-3, 3, args.numberOfRows)}
+        demoDataset['target'] = demoDataset['x'] ** 2 + demoDataset['y']
+        with Coordinator(genetic_programming.ArithmeticsInterpreter, './domains/arithmetics.xml', demoDataset, variableNameToTypeDict, 'float',
+                         MeanSquaredError, address=args.unixSocket or ('127.0.0.1', 0)) as coordinator:
+            interpreter: genetic_programming.Interpreter = coordinator.Interpreter()
+            population: List[genetic_programming.Individual] = [
+                interpreter.CreateIndividual('float', {0: 1.0, 1: 0.9, 2: 0.7, 3: 0.5}, 0.3,
+                                             {name: 1 for name in interpreter._functionNameToSignatureDict}, [-5, 5], variableNameToTypeDict)
+                for _ in range(args.populationSize)]
+            processesList: List[multiprocessing.Process] = [multiprocessing.Process(target=RunWorker,
+                                                                                    args=(coordinator.Address(), coordinator.Authkey()))
+                                                            for _ in range(args.workers)]
+            for process in processesList:
+                process.start()
+            startTime: float = time.perf_counter()
+            costsList: List[float] = coordinator.EvaluatePopulation(population)
+            logging.info("Scored {} individuals with {} workers in {:.3f} s; best cost: {}; statistics: {}".format(
+                len(costsList), coordinator.NumberOfWorkers(), time.perf_counter() - startTime, min(costsList), coordinator.Statistics()))
+        for process in processesList:
+            process.join()
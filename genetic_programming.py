@@ -1,20 +1,147 @@
 import logging
 import abc
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Any, Set, Optional, Union
-import ast
+from typing import Dict, List, Any, Set, Optional, Union, Callable, Tuple, Iterator
 import math
 import random
-import xml.dom.minidom
+import numpy as np
+import array
+import sys
+import inspect
+import struct
+import hashlib
+import collections
+import bisect
+import functools
+import itertools
+import copy
+import time
+import json
+import os
 
 class Individual(abc.ABC):
     """
     Abstract class an individual class must inherit
+    The individual is stored as an ElementTree (typically after LoadIndividual()), as a compact Genome, or both.
+    An interpreter converts the tree into a genome the first time it uses the individual. The tree is kept, such that it
+    can still be modified in place (cf. TreeHasChanged()).
     """
 
-    def __init__(self, tree: ET.ElementTree):
+    def __init__(self, tree: Optional[ET.ElementTree] = None, genome: Optional['Genome'] = None):
         super().__init__()
+        if (tree is None) == (genome is None):
+            raise ValueError("Individual.__init__(): Exactly one of tree and genome must be specified")
+        self._tree: Optional[ET.ElementTree] = tree
+        self._genome: Optional[Genome] = genome
+        self._compiledFunctionsDict: Dict[Tuple, Callable[[Dict[str, Any]], Any]] = {}
+        self._validatedTypingKeysSet: Set[Tuple] = set()
+        self._nodeOutputs: Optional[NodeOutputs] = None # Cf. Interpreter.EvaluateBatchIncremental()
+
+    def Tree(self) -> ET.ElementTree:
+        """
+        Returns the individual as an ElementTree. If the individual is only stored as a genome, the tree is built and kept.
+        The returned tree is the one of the individual: after modifying it in place, call TreeHasChanged().
+        """
+        if self._tree is None:
+            self._tree = self._genome.ToElementTree()
+        return self._tree
+
+    def SetTree(self, tree: ET.ElementTree) -> None:
         self._tree = tree
+        self._genome = None
+        self.TreeHasChanged()
+
+    def SetGenome(self, genome: 'Genome') -> None:
+        self._genome = genome
+        self._tree = None
+        self.TreeHasChanged()
+
+    def TreeHasChanged(self) -> None:
+        """
+        Must be called after the elements of the tree returned by Tree() have been modified in place. The genome is dropped,
+        to be encoded again from the tree by the next interpreter that uses the individual, and the cached compiled functions,
+        the validations and the kept node outputs are invalidated.
+        """
+        if self._tree is not None:
+            self._genome = None
+        self._compiledFunctionsDict.clear()
+        self._validatedTypingKeysSet.clear()
+        self._nodeOutputs = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The compiled functions are closures of an interpreter, and the node outputs a cache: neither is pickled
+        state: Dict[str, Any] = self.__dict__.copy()
+        state['_compiledFunctionsDict'] = {}
+        state['_nodeOutputs'] = None
+        return state
+
+    def Copy(self) -> 'Individual':
+        individualCopy: Individual = copy.copy(self)
+        if self._tree is not None:
+            individualCopy._tree = copy.deepcopy(self._tree)
+        individualCopy._compiledFunctionsDict = dict(self._compiledFunctionsDict)
+        individualCopy._validatedTypingKeysSet = set(self._validatedTypingKeysSet)
+        if self._nodeOutputs is not None:
+            individualCopy._nodeOutputs = self._nodeOutputs.Copy()
+        return individualCopy
+
+    def ReplaceSubtree(self, nodeNdx: int, donor: 'Individual', donorNodeNdx: int = 0) -> None:
+        """
+        Replaces, in place, the subtree starting at node nodeNdx (in prefix order) with a copy of the subtree of donor starting at donorNodeNdx.
+        Both individuals must be stored as genomes (cf. Interpreter.Genome()).
+        The kept node outputs are preserved, except for the new subtree and its ancestors, which will be recomputed by
+        Interpreter.EvaluateBatchIncremental(). If the donor has kept node outputs on the same dataset, they are reused for the new subtree.
+        """
+        if self._genome is None or donor._genome is None:
+            raise ValueError("Individual.ReplaceSubtree(): The individuals must be stored as genomes. Call Interpreter.Genome() first")
+        genome: Genome = self._genome
+        if not 0 <= nodeNdx < len(genome) or not 0 <= donorNodeNdx < len(donor._genome):
+            raise IndexError("Individual.ReplaceSubtree(): nodeNdx ({}) or donorNodeNdx ({}) is out of range".format(nodeNdx, donorNodeNdx))
+        subtreeType: Optional[str] = genome.SubtreeType(nodeNdx)
+        donorSubtreeType: Optional[str] = donor._genome.SubtreeType(donorNodeNdx)
+        if subtreeType is not None and donorSubtreeType is not None and subtreeType != donorSubtreeType:
+            raise ValueError("Individual.ReplaceSubtree(): The subtree at node {} has type {}, but the donor subtree at node {} has type {}".format(
+                nodeNdx, subtreeType, donorNodeNdx, donorSubtreeType))
+        endNdx: int = genome.SubtreeEnds()[nodeNdx]
+        donorEndNdx: int = donor._genome.SubtreeEnds()[donorNodeNdx]
+        nodeOutputs: Optional[NodeOutputs] = None
+        if self._nodeOutputs is not None:
+            donorOutputsList: Optional[List[Any]] = None
+            if donor._nodeOutputs is not None and donor._nodeOutputs._datasetId == self._nodeOutputs._datasetId:
+                donorOutputsList = donor._nodeOutputs._outputsList[donorNodeNdx: donorEndNdx]
+            nodeOutputs = self._nodeOutputs.Spliced(nodeNdx, endNdx, [ancestorNdx for ancestorNdx, _ in genome.Path(nodeNdx)],
+                                                    donorEndNdx - donorNodeNdx, donorOutputsList)
+        self.SetGenome(genome.ReplaceSubtree(nodeNdx, donor._genome, donorNodeNdx))
+        self._nodeOutputs = nodeOutputs
+
+    def Crossover(self, other: 'Individual', nodeNdx: int, otherNodeNdx: int) -> Tuple['Individual', 'Individual']:
+        """
+        Subtree crossover. Returns the two offspring: self with its subtree at nodeNdx replaced by the subtree of other at otherNodeNdx,
+        and other with its subtree at otherNodeNdx replaced by the subtree of self at nodeNdx.
+        The parents are not modified. The offspring inherit the kept node outputs of the parents (cf. ReplaceSubtree()).
+        Raises a ValueError if the two subtrees have different types (cf. Genome.SubtreeType()).
+        """
+        if self._genome is None or other._genome is None:
+            raise ValueError("Individual.Crossover(): The individuals must be stored as genomes. Call Interpreter.Genome() first")
+        subtreeType: Optional[str] = self._genome.SubtreeType(nodeNdx)
+        otherSubtreeType: Optional[str] = other._genome.SubtreeType(otherNodeNdx)
+        if subtreeType is not None and otherSubtreeType is not None and subtreeType != otherSubtreeType:
+            raise ValueError("Individual.Crossover(): The subtree at node {} has type {}, but the other subtree at node {} has type {}".format(
+                nodeNdx, subtreeType, otherNodeNdx, otherSubtreeType))
+        offspring1: Individual = self.Copy()
+        offspring1.ReplaceSubtree(nodeNdx, other, otherNodeNdx)
+        offspring2: Individual = other.Copy()
+        offspring2.ReplaceSubtree(otherNodeNdx, self, nodeNdx)
+        return offspring1, offspring2
+
+    def DropNodeOutputs(self) -> None:
+        """
+        Frees the node outputs kept by Interpreter.EvaluateBatchIncremental()
+        """
+        self._nodeOutputs = None
+
+    def IsValidated(self, variableNameToTypeDict: Dict[str, str], returnType: str) -> bool:
+        return TypingKey(variableNameToTypeDict, returnType) in self._validatedTypingKeysSet
 
     """@abc.abstractmethod
     def Cost(self, inputData: Any, targetOutputData: Any) -> float:
@@ -22,15 +149,20 @@ class Individual(abc.ABC):
     """
 
     def Save(self, filepath: str):
-        rootElm: ET.Element = self._tree.getroot()
+        # An individual stored as a genome doesn't keep the tree built for saving
+        rootElm: ET.Element = (self._tree if self._tree is not None else self._genome.ToElementTree()).getroot()
         treeStr: str = prettify(rootElm)
         with open(filepath, 'w') as file:
             file.write(treeStr)
 
 
+def TypingKey(variableNameToTypeDict: Dict[str, str], returnType: str) -> Tuple:
+    return (tuple(sorted(variableNameToTypeDict.items())), returnType)
+
 def prettify(elem): # Cf. https://stackoverflow.com/questions/17402323/use-xml-etree-elementtree-to-print-nicely-formatted-xml-files
     """Return a pretty-printed XML string for the Element.
     """
+    import xml.dom.minidom # Deferred: only needed to save
     rough_string = ET.tostring(elem, 'utf-8')
     reparsed = xml.dom.minidom.parseString(rough_string)
     return reparsed.toprettyxml(indent="\t")
@@ -40,71 +172,1179 @@ def LoadIndividual(filepath: str) -> Individual:
     individual: Individual = Individual(tree)
     return individual
 
+def NumberOfRows(variableNameToArrayDict: Dict[str, np.ndarray]) -> int:
+    numberOfRows: Optional[int] = None
+    for variableName, array in variableNameToArrayDict.items():
+        if numberOfRows is None:
+            numberOfRows = len(array)
+        elif len(array) != numberOfRows:
+            raise ValueError("genetic_programming.NumberOfRows(): Variable '{}' has {} rows, while the previous variables have {} rows".format(
+                variableName, len(array), numberOfRows))
+    if numberOfRows is None:
+        raise ValueError("genetic_programming.NumberOfRows(): The dictionary of arrays is empty")
+    return numberOfRows
+
+def Primitive(functionName: str, batch: bool = False, guard: Optional[Callable[..., Any]] = None,
+              lazy: bool = False) -> Callable[[Callable], Callable]:
+    """
+    Decorator marking an interpreter method as the implementation of the domain function functionName.
+    The method receives the evaluated arguments as positional parameters. If batch is True, the arguments are numpy arrays
+    or scalars, broadcastable together, and the method is used by EvaluateBatch().
+    If lazy is True, the method receives callables that evaluate its arguments on demand: without parameters for a scalar
+    primitive, with a boolean mask of the rows to evaluate (None for all the rows) for a batch primitive.
+    guard(result, *arguments) returns whether the primitive fell back to a default result (e.g. a division by zero returning 0.0),
+    or a boolean array of the rows that did. It is only called in instrumentation mode (cf. Interpreter.EnableInstrumentation()).
+    """
+    def Decorator(method: Callable) -> Callable:
+        method._primitiveFunctionName = functionName
+        method._primitiveIsBatch = batch
+        method._primitiveGuard = guard
+        method._primitiveIsLazy = lazy
+        return method
+    return Decorator
+
+class RowsSubsetDict(dict):
+    """
+    Variable name to array dictionary restricted to the rows selected by a boolean mask. The subsets are extracted on first access.
+    """
+    def __init__(self, variableNameToArrayDict: Dict[str, np.ndarray], rowsMask: np.ndarray) -> None:
+        super().__init__()
+        self._variableNameToArrayDict = variableNameToArrayDict
+        self._rowsMask = rowsMask
+
+    def __contains__(self, variableName: object) -> bool:
+        return variableName in self._variableNameToArrayDict
+
+    def __missing__(self, variableName: str) -> np.ndarray:
+        subsetArr: np.ndarray = np.asarray(self._variableNameToArrayDict[variableName])[self._rowsMask]
+        self[variableName] = subsetArr
+        return subsetArr
+
+def Identity(value: Any) -> Any:
+    return value
+
+def RowsOfValue(value: Any, rowsMask: Optional[np.ndarray] = None) -> Any:
+    """
+    The rows of an evaluated batch argument selected by rowsMask, as returned by the arguments of a lazy batch primitive
+    """
+    if rowsMask is None or np.ndim(value) == 0:
+        return value
+    return np.asarray(value)[rowsMask]
+
+def SeedRandomGenerators(seed: Optional[int], streamNdx: int) -> None:
+    """
+    Seeds the random and numpy.random generators with an independent stream per streamNdx. Does nothing if seed is None.
+    """
+    if seed is None:
+        return
+    random.seed("{}-{}".format(seed, streamNdx))
+    np.random.seed(random.getrandbits(32))
+
+class SharedDataset():
+    """
+    Copies the columns of a dataset in shared memory, such that worker processes can attach them without pickling
+    """
+    def __init__(self, dataset: Optional[Dict[str, np.ndarray]] = None,
+                 descriptors: Optional[List[Tuple[str, str, Tuple[int, ...], str]]] = None) -> None:
+        import multiprocessing.shared_memory # Deferred: only needed with worker processes
+        self._sharedMemoriesList: List[multiprocessing.shared_memory.SharedMemory] = []
+        self._descriptorsList: List[Tuple[str, str, Tuple[int, ...], str]] = [] # (column name, shared memory name, shape, dtype)
+        self._dataset: Dict[str, np.ndarray] = {}
+        if dataset is not None: # Create the shared memories
+            for columnName, column in dataset.items():
+                column = np.ascontiguousarray(column)
+                sharedMemory = multiprocessing.shared_memory.SharedMemory(create=True, size=max(column.nbytes, 1))
+                sharedColumn: np.ndarray = np.ndarray(column.shape, dtype=column.dtype, buffer=sharedMemory.buf)
+                sharedColumn[...] = column
+                self._sharedMemoriesList.append(sharedMemory)
+                self._descriptorsList.append((columnName, sharedMemory.name, column.shape, column.dtype.str))
+                self._dataset[columnName] = sharedColumn
+        elif descriptors is not None: # Attach existing shared memories
+            for columnName, sharedMemoryName, shape, dtypeStr in descriptors:
+                # The worker processes share the resource tracker of the creating process, which stays in charge of the unlinking
+                sharedMemory = multiprocessing.shared_memory.SharedMemory(name=sharedMemoryName)
+                self._sharedMemoriesList.append(sharedMemory)
+                self._descriptorsList.append((columnName, sharedMemoryName, shape, dtypeStr))
+                self._dataset[columnName] = np.ndarray(shape, dtype=np.dtype(dtypeStr), buffer=sharedMemory.buf)
+        else:
+            raise ValueError("SharedDataset.__init__(): One of dataset and descriptors must be specified")
+
+    def Dataset(self) -> Dict[str, np.ndarray]:
+        return self._dataset
+
+    def Descriptors(self) -> List[Tuple[str, str, Tuple[int, ...], str]]:
+        return list(self._descriptorsList)
+
+    def Close(self, unlink: bool = False) -> None:
+        self._dataset = {}
+        for sharedMemory in self._sharedMemoriesList:
+            sharedMemory.close()
+            if unlink:
+                sharedMemory.unlink()
+        self._sharedMemoriesList = []
+
+_populationWorkerState: Dict[str, Any] = {}
+
+def _InitializePopulationWorker(interpreter: 'Interpreter', datasetDescriptors: List[Tuple[str, str, Tuple[int, ...], str]],
+                                variableNameToTypeDict: Dict[str, str], returnType: str,
+                                costFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], float], seed: Optional[int],
+                                datasetId: Optional[Any]) -> None:
+    _populationWorkerState['interpreter'] = interpreter
+    _populationWorkerState['sharedDataset'] = SharedDataset(descriptors=datasetDescriptors)
+    _populationWorkerState['variableNameToTypeDict'] = variableNameToTypeDict
+    _populationWorkerState['returnType'] = returnType
+    _populationWorkerState['costFunction'] = costFunction
+    _populationWorkerState['seed'] = seed
+    _populationWorkerState['datasetId'] = datasetId
+
+def _EvaluatePopulationChunk(chunkNdx: int, genomeBytesList: List[bytes]) -> List[float]:
+    interpreter: Interpreter = _populationWorkerState['interpreter']
+    dataset: Dict[str, np.ndarray] = _populationWorkerState['sharedDataset'].Dataset()
+    costFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], float] = _populationWorkerState['costFunction']
+    SeedRandomGenerators(_populationWorkerState['seed'], chunkNdx)
+    costsList: List[float] = []
+    for genomeBytes in genomeBytesList:
+        individual: Individual = Individual(genome=Genome.FromBytes(interpreter._signatureTable, genomeBytes))
+        output: np.ndarray = interpreter.EvaluateBatch(individual, _populationWorkerState['variableNameToTypeDict'], dataset,
+                                                       _populationWorkerState['returnType'], _populationWorkerState['datasetId'])
+        costsList.append(costFunction(output, dataset))
+    return costsList
+
 class FunctionSignature():
-    def __init__(self, parameterTypesList: List[str], returnType: str) -> None:
+    """
+    The optional simplification rules are the texts of constants: for a function f of two parameters,
+    f(leftIdentity, x) = x, f(x, rightIdentity) = x, f(leftAnnihilator, x) = leftAnnihilator, f(x, rightAnnihilator) = rightAnnihilator.
+    A conditional function f(condition, x, y) returns x if condition is true, y otherwise.
+    """
+    def __init__(self, parameterTypesList: List[str], returnType: str,
+                 leftIdentity: Optional[str] = None, rightIdentity: Optional[str] = None,
+                 leftAnnihilator: Optional[str] = None, rightAnnihilator: Optional[str] = None, isConditional: bool = False) -> None:
         self._parameterTypesList = parameterTypesList
         self._returnType = returnType
+        self._leftIdentity = leftIdentity
+        self._rightIdentity = rightIdentity
+        self._leftAnnihilator = leftAnnihilator
+        self._rightAnnihilator = rightAnnihilator
+        self._isConditional = isConditional
 
+class SignatureTable():
+    """
+    Immutable table of the domain functions, indexed by opcode. The opcode of a function is its position in the domain file.
+    The types are interned: a type id is the index of the type name in _typeNamesTuple.
+    The table pickles as its compact state (cf. CompactState()), from which the indexes are rebuilt.
+    """
+    def __init__(self, functionNameToSignatureDict: Dict[str, FunctionSignature]) -> None:
+        typeNameToIdDict: Dict[str, int] = {}
+        for signature in functionNameToSignatureDict.values():
+            for typeName in list(signature._parameterTypesList) + [signature._returnType]:
+                typeNameToIdDict.setdefault(typeName, len(typeNameToIdDict))
+        self.SetCompactState({
+            'functionNames': list(functionNameToSignatureDict),
+            'typeNames': list(typeNameToIdDict),
+            'parameterTypeIds': [[typeNameToIdDict[typeName] for typeName in signature._parameterTypesList]
+                                 for signature in functionNameToSignatureDict.values()],
+            'returnTypeIds': [typeNameToIdDict[signature._returnType] for signature in functionNameToSignatureDict.values()],
+            'conditionalFlags': [signature._isConditional for signature in functionNameToSignatureDict.values()],
+            'simplificationRules': [[signature._leftIdentity, signature._rightIdentity, signature._leftAnnihilator, signature._rightAnnihilator]
+                                    for signature in functionNameToSignatureDict.values()]
+        })
 
+    @staticmethod
+    def FromCompactState(compactStateDict: Dict[str, Any]) -> 'SignatureTable':
+        signatureTable: SignatureTable = SignatureTable.__new__(SignatureTable)
+        signatureTable.SetCompactState(compactStateDict)
+        return signatureTable
 
+    def CompactState(self) -> Dict[str, Any]:
+        """
+        JSON-serializable description of the table
+        """
+        return {'functionNames': list(self._functionNamesTuple), 'typeNames': list(self._typeNamesTuple),
+                'parameterTypeIds': [list(parameterTypeIds) for parameterTypeIds in self._parameterTypeIdsTuple],
+                'returnTypeIds': list(self._returnTypeIdsTuple),
+                'conditionalFlags': list(self._conditionalFlagsTuple), 'simplificationRules': [list(rules) for rules in self._simplificationRulesTuple]}
 
+    def SetCompactState(self, compactStateDict: Dict[str, Any]) -> None:
+        self._functionNamesTuple: Tuple[str, ...] = tuple(sys.intern(functionName) for functionName in compactStateDict['functionNames'])
+        self._functionNameToOpcodeDict: Dict[str, int] = {functionName: opcode for opcode, functionName in enumerate(self._functionNamesTuple)}
+        if len(self._functionNameToOpcodeDict) != len(self._functionNamesTuple):
+            raise ValueError("SignatureTable.SetCompactState(): The function names are not unique")
+        self._typeNamesTuple: Tuple[str, ...] = tuple(sys.intern(typeName) for typeName in compactStateDict['typeNames'])
+        self._typeNameToIdDict: Dict[str, int] = {typeName: typeId for typeId, typeName in enumerate(self._typeNamesTuple)}
+        self._parameterTypeIdsTuple: Tuple[Tuple[int, ...], ...] = tuple(tuple(parameterTypeIds) for parameterTypeIds in compactStateDict['parameterTypeIds'])
+        self._returnTypeIdsTuple: Tuple[int, ...] = tuple(compactStateDict['returnTypeIds'])
+        self._conditionalFlagsTuple: Tuple[bool, ...] = tuple(bool(isConditional) for isConditional in compactStateDict['conditionalFlags'])
+        self._simplificationRulesTuple: Tuple[Tuple[Optional[str], ...], ...] = tuple(tuple(rules) for rules in compactStateDict['simplificationRules'])
+        numberOfFunctions: int = len(self._functionNamesTuple)
+        for fieldName in ['parameterTypeIds', 'returnTypeIds', 'conditionalFlags', 'simplificationRules']:
+            if len(compactStateDict[fieldName]) != numberOfFunctions:
+                raise ValueError("SignatureTable.SetCompactState(): {} has {} entries, for {} functions".format(
+                    fieldName, len(compactStateDict[fieldName]), numberOfFunctions))
+        # The views by type name, of the interned strings
+        self._parameterTypesTuple: Tuple[Tuple[str, ...], ...] = tuple(tuple(self._typeNamesTuple[typeId] for typeId in parameterTypeIds)
+                                                                       for parameterTypeIds in self._parameterTypeIdsTuple)
+        self._returnTypesTuple: Tuple[str, ...] = tuple(self._typeNamesTuple[typeId] for typeId in self._returnTypeIdsTuple)
+        self._aritiesTuple: Tuple[int, ...] = tuple(len(parameterTypeIds) for parameterTypeIds in self._parameterTypeIdsTuple)
+        # The opcodes of the functions that return each type id, in opcode order
+        returnTypeIdToOpcodesList: List[List[int]] = [[] for _ in self._typeNamesTuple]
+        for opcode, returnTypeId in enumerate(self._returnTypeIdsTuple):
+            returnTypeIdToOpcodesList[returnTypeId].append(opcode)
+        self._returnTypeIdToOpcodesTuple: Tuple[Tuple[int, ...], ...] = tuple(tuple(opcodesList) for opcodesList in returnTypeIdToOpcodesList)
 
-class Interpreter(abc.ABC):
-    def __init__(self, domainFunctionsTree: ET.ElementTree) -> None:
-        super().__init__()
-        _domainFunctionsTree = domainFunctionsTree
-
-        # Create dictionaries from function name to parameters
-        self._functionNameToSignatureDict: Dict[str, FunctionSignature] = {}
-
-        # Check that each function name is unique
-        root: ET.Element = _domainFunctionsTree.getroot()
-        functionNamesSet: Set = set()
-        for rootChild in root:
-            #print("rootChild = {}".format(rootChild))
-            #print ("rootChild.tag = {}".format(rootChild.tag))
-            if rootChild.tag == 'function':
-                functionNameElm: Optional[ET.Element] = rootChild.find('name')
-                if functionNameElm is None:
-                    raise ValueError("genetic_programming.py Interpreter.__init__(): A function doesn't have a <name> element")
-                functionName: Optional[str] = functionNameElm.text
-                if functionName is None:
-                    raise ValueError(
-                        "genetic_programming.py Interpreter.__init__(): A function have an empty <name> element")
-                if functionName in functionNamesSet:
-                    raise ValueError("genetic_programming.py Interpreter.__init__(): The function name '{}' is encountered more than once in the domain functions tree".format(functionName))
-                functionNamesSet.add(functionName)
-
-                parameterTypesElm: Optional[ET.Element] = rootChild.find('parameter_types')
-                if parameterTypesElm is None:
-                    raise ValueError(
-                        "genetic_programming.py Interpreter.__init__(): The function {} doesn't have a <parameter_types> element".format(functionName))
-                parameterTypesListStr: Optional[str] = parameterTypesElm.text
-                if parameterTypesListStr is None:
-                    raise ValueError("genetic_programming.py Interpreter.__init__(): The function {} have an empty <parameter_types> element.".format(
+    def __getstate__(self) -> Dict[str, Any]:
+        return self.CompactState()
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.SetCompactState(state)
+
+    def FunctionSignatures(self) -> Dict[str, FunctionSignature]:
+        return {functionName: FunctionSignature(list(self._parameterTypesTuple[opcode]), self._returnTypesTuple[opcode],
+                                                *self._simplificationRulesTuple[opcode], isConditional=self._conditionalFlagsTuple[opcode])
+                for opcode, functionName in enumerate(self._functionNamesTuple)}
+
+def ParseDomainFunctions(domainFunctionsTree: ET.ElementTree) -> Dict[str, FunctionSignature]:
+    """
+    Returns the signatures of the functions of a domain file, in the order of the file
+    """
+    functionNameToSignatureDict: Dict[str, FunctionSignature] = {}
+
+    # Check that each function name is unique
+    root: ET.Element = domainFunctionsTree.getroot()
+    functionNamesSet: Set = set()
+    for rootChild in root:
+        #print("rootChild = {}".format(rootChild))
+        #print ("rootChild.tag = {}".format(rootChild.tag))
+        if rootChild.tag == 'function':
+            functionNameElm: Optional[ET.Element] = rootChild.find('name')
+            if functionNameElm is None:
+                raise ValueError("genetic_programming.ParseDomainFunctions(): A function doesn't have a <name> element")
+            functionName: Optional[str] = functionNameElm.text
+            if functionName is None:
+                raise ValueError(
+                    "genetic_programming.ParseDomainFunctions(): A function have an empty <name> element")
+            if functionName in functionNamesSet:
+                raise ValueError("genetic_programming.ParseDomainFunctions(): The function name '{}' is encountered more than once in the domain functions tree".format(functionName))
+            functionNamesSet.add(functionName)
+
+            parameterTypesElm: Optional[ET.Element] = rootChild.find('parameter_types')
+            if parameterTypesElm is None:
+                raise ValueError(
+                    "genetic_programming.ParseDomainFunctions(): The function {} doesn't have a <parameter_types> element".format(functionName))
+            parameterTypesListStr: Optional[str] = parameterTypesElm.text
+            if parameterTypesListStr is None:
+                raise ValueError("genetic_programming.ParseDomainFunctions(): The function {} have an empty <parameter_types> element.".format(
+                    functionName))
+            parameterTypesList: List[str] = ParseParameterTypes(parameterTypesListStr)
+
+            returnTypeElm: Optional[ET.Element] = rootChild.find('return_type')
+            if returnTypeElm is None:
+                raise ValueError(
+                    "genetic_programming.ParseDomainFunctions(): The function {} doesn't have a <return_type> element".format(functionName))
+            returnType: Optional[str] = returnTypeElm.text
+            if returnType is None:
+                raise ValueError(
+                    "genetic_programming.ParseDomainFunctions(): The function {} have an empty <return_type> element".format(
                         functionName))
-                parameterTypesListStr = parameterTypesListStr.replace(' ', '')
-                parameterTypesListStr = parameterTypesListStr.replace('[', "['")
-                parameterTypesListStr = parameterTypesListStr.replace(']', "']")
-                parameterTypesListStr = parameterTypesListStr.replace(',', "','")
-                #print ("genetic_programming.py Interpreter.__init__(): parameterTypesListStr = {}".format(parameterTypesListStr))
-                parameterTypesList = ast.literal_eval(parameterTypesListStr)
-                #print ("genetic_programming.py Interpreter.__init__(): parameterTypesList = {}".format(parameterTypesList))
-
-                returnTypeElm: Optional[ET.Element] = rootChild.find('return_type')
-                if returnTypeElm is None:
-                    raise ValueError(
-                        "genetic_programming.py Interpreter.__init__(): The function {} doesn't have a <return_type> element".format(functionName))
-                returnType: Optional[str] = returnTypeElm.text
-                if returnType is None:
-                    raise ValueError(
-                        "genetic_programming.py Interpreter.__init__(): The function {} have an empty <return_type> element".format(
-                            functionName))
-
-                signature: FunctionSignature = FunctionSignature(parameterTypesList, returnType)
-                self._functionNameToSignatureDict[functionName] = signature
+
+            # Optional simplification rules, used by Simplify()
+            simplificationRuleToTextDict: Dict[str, Optional[str]] = {}
+            for ruleTag in ['left_identity', 'right_identity', 'left_annihilator', 'right_annihilator']:
+                ruleElm: Optional[ET.Element] = rootChild.find(ruleTag)
+                simplificationRuleToTextDict[ruleTag] = None if ruleElm is None or ruleElm.text is None else ruleElm.text.strip()
+                if simplificationRuleToTextDict[ruleTag] is not None and len(parameterTypesList) != 2:
+                    raise ValueError("genetic_programming.ParseDomainFunctions(): The function {} has a <{}> element, but {} parameters instead of 2".format(
+                        functionName, ruleTag, len(parameterTypesList)))
+            conditionalElm: Optional[ET.Element] = rootChild.find('conditional')
+            isConditional: bool = conditionalElm is not None and conditionalElm.text is not None and \
+                                  conditionalElm.text.strip().lower() in ['true', 'yes']
+            if isConditional and (len(parameterTypesList) != 3 or parameterTypesList[1] != returnType or parameterTypesList[2] != returnType):
+                raise ValueError("genetic_programming.ParseDomainFunctions(): The conditional function {} must have the parameters [condition, {}, {}]".format(
+                    functionName, returnType, returnType))
+
+            signature: FunctionSignature = FunctionSignature(parameterTypesList, returnType,
+                                                             simplificationRuleToTextDict['left_identity'],
+                                                             simplificationRuleToTextDict['right_identity'],
+                                                             simplificationRuleToTextDict['left_annihilator'],
+                                                             simplificationRuleToTextDict['right_annihilator'], isConditional)
+            functionNameToSignatureDict[functionName] = signature
+        else:
+            raise ValueError("genetic_programming.ParseDomainFunctions(): An child of the root element has tag '{}'".format(rootChild.tag))
+    return functionNameToSignatureDict
+
+# Cache of the signature tables, next to the domain files (cf. LoadSignatureTable())
+SIGNATURE_TABLE_CACHE_SUFFIX: str = '.signatures.json'
+SIGNATURE_TABLE_CACHE_FORMAT: int = 2
+
+def LoadSignatureTable(domainFilepath: str, useCache: bool = True) -> SignatureTable:
+    """
+    Returns the signature table of a domain file, to create an interpreter. The table is cached in <domainFilepath>.signatures.json,
+    keyed by the SHA-256 of the domain file: the XML is parsed only when the file has changed. Failing to write the cache is not an error.
+    """
+    with open(domainFilepath, 'rb') as domainFile:
+        domainBytes: bytes = domainFile.read()
+    contentHash: str = hashlib.sha256(domainBytes).hexdigest()
+    cacheFilepath: str = domainFilepath + SIGNATURE_TABLE_CACHE_SUFFIX
+    if useCache:
+        try:
+            with open(cacheFilepath, 'r') as cacheFile:
+                cacheDict: Dict[str, Any] = json.load(cacheFile)
+            if cacheDict.get('format') == SIGNATURE_TABLE_CACHE_FORMAT and cacheDict.get('sha256') == contentHash:
+                return SignatureTable.FromCompactState(cacheDict['table'])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError) as exception:
+            logging.warning("genetic_programming.LoadSignatureTable(): Ignoring the invalid cache {}: {}".format(cacheFilepath, exception))
+    signatureTable: SignatureTable = SignatureTable(ParseDomainFunctions(ET.ElementTree(ET.fromstring(domainBytes))))
+    if useCache:
+        import tempfile # Deferred: only needed to write the cache
+        try: # Written atomically, for the concurrent loads of worker processes
+            cacheFileDescriptor, temporaryFilepath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cacheFilepath)), suffix='.tmp')
+            try:
+                os.chmod(temporaryFilepath, os.stat(domainFilepath).st_mode & 0o666) # Readable like the domain file
+                with os.fdopen(cacheFileDescriptor, 'w') as cacheFile:
+                    json.dump({'format': SIGNATURE_TABLE_CACHE_FORMAT, 'sha256': contentHash, 'table': signatureTable.CompactState()}, cacheFile)
+                os.replace(temporaryFilepath, cacheFilepath)
+            except BaseException:
+                os.unlink(temporaryFilepath)
+                raise
+        except OSError as exception:
+            logging.debug("genetic_programming.LoadSignatureTable(): Failed to write the cache {}: {}".format(cacheFilepath, exception))
+    return signatureTable
+
+def ParseParameterTypes(parameterTypesStr: str) -> List[str]:
+    """
+    '[float, float]' -> ['float', 'float']
+    """
+    parameterTypesStr = parameterTypesStr.strip()
+    if not parameterTypesStr.startswith('[') or not parameterTypesStr.endswith(']'):
+        raise ValueError("genetic_programming.ParseParameterTypes(): The parameter types '{}' are not enclosed in brackets".format(parameterTypesStr))
+    innerStr: str = parameterTypesStr[1: -1].strip()
+    if len(innerStr) == 0:
+        return []
+    parameterTypesList: List[str] = [parameterType.strip() for parameterType in innerStr.split(',')]
+    if any(len(parameterType) == 0 or '[' in parameterType or ']' in parameterType for parameterType in parameterTypesList):
+        raise ValueError("genetic_programming.ParseParameterTypes(): The parameter types '{}' are malformed".format(parameterTypesStr))
+    return parameterTypesList
+
+CONSTANT_OPCODE: int = -1
+VARIABLE_OPCODE: int = -2
+GENOME_HEADER_STRUCT: struct.Struct = struct.Struct('<IIII') # Number of nodes, of float constants, of constant texts, of variable names
+
+class Genome():
+    """
+    Flat prefix-order encoding of an individual tree.
+    _opcodesArr[n] is the opcode of node n in the signature table, or CONSTANT_OPCODE, or VARIABLE_OPCODE.
+    _operandsArr[n] is the constant operand for a constant (see ConstantText()), the index in _variableNamesTuple for a variable,
+    and 0 for a function.
+    The constants whose text is the repr() of a float are stored in _constantsArr; the other constant texts are stored in _constantTextsTuple.
+    """
+    __slots__ = ('_signatureTable', '_opcodesArr', '_operandsArr', '_constantsArr', '_constantTextsTuple', '_variableNamesTuple',
+                 '_subtreeHashesArr', '_subtreeEndsArr')
+
+    def __init__(self, signatureTable: SignatureTable, opcodesArr: array.array, operandsArr: array.array, constantsArr: array.array,
+                 constantTextsTuple: Tuple[str, ...], variableNamesTuple: Tuple[str, ...]) -> None:
+        if len(opcodesArr) != len(operandsArr):
+            raise ValueError("Genome.__init__(): len(opcodesArr) ({}) != len(operandsArr) ({})".format(len(opcodesArr), len(operandsArr)))
+        self._signatureTable = signatureTable
+        self._opcodesArr = opcodesArr
+        self._operandsArr = operandsArr
+        self._constantsArr = constantsArr
+        self._constantTextsTuple = constantTextsTuple
+        self._variableNamesTuple = variableNamesTuple
+        self._subtreeHashesArr: Optional[array.array] = None # Computed on demand by SubtreeHashes()
+        self._subtreeEndsArr: Optional[array.array] = None # Computed on demand by SubtreeEnds()
+
+    def ConstantText(self, operand: int) -> str:
+        if operand >= 0:
+            return repr(self._constantsArr[operand])
+        return self._constantTextsTuple[-1 - operand]
+
+    def __len__(self) -> int:
+        return len(self._opcodesArr)
+
+    def SubtreeEnd(self, nodeNdx: int) -> int:
+        """
+        Returns the index following the last node of the subtree starting at nodeNdx
+        """
+        aritiesTuple: Tuple[int, ...] = self._signatureTable._aritiesTuple
+        numberOfPendingNodes: int = 1
+        while numberOfPendingNodes > 0:
+            opcode: int = self._opcodesArr[nodeNdx]
+            if opcode >= 0:
+                numberOfPendingNodes += aritiesTuple[opcode]
+            numberOfPendingNodes -= 1
+            nodeNdx += 1
+        return nodeNdx
+
+    def SubtreeEnds(self) -> array.array:
+        """
+        Returns, for each node, the index following the last node of its subtree. The indices are computed once and kept in the genome.
+        """
+        if self._subtreeEndsArr is None:
+            subtreeEndsArr: array.array = array.array('i', bytes(4 * len(self._opcodesArr)))
+            # In reverse prefix order, the ends of the children of a function are on top of the stack, first child on top
+            endsStack: List[int] = []
+            for nodeNdx in range(len(self._opcodesArr) - 1, -1, -1):
+                opcode: int = self._opcodesArr[nodeNdx]
+                endNdx: int = nodeNdx + 1
+                if opcode >= 0:
+                    for _ in range(self._signatureTable._aritiesTuple[opcode]):
+                        endNdx = endsStack.pop() # The last child ends the subtree
+                endsStack.append(endNdx)
+                subtreeEndsArr[nodeNdx] = endNdx
+            self._subtreeEndsArr = subtreeEndsArr
+        return self._subtreeEndsArr
+
+    def Path(self, nodeNdx: int) -> List[Tuple[int, int]]:
+        """
+        Returns the (ancestor index, position of the next node of the path among the ancestor children) pairs, from the root down
+        to the parent of nodeNdx
+        """
+        if not 0 <= nodeNdx < len(self._opcodesArr):
+            raise IndexError("Genome.Path(): nodeNdx ({}) is out of range".format(nodeNdx))
+        subtreeEndsArr: array.array = self.SubtreeEnds()
+        pathList: List[Tuple[int, int]] = []
+        ancestorNdx: int = 0
+        while ancestorNdx != nodeNdx:
+            childNdx: int = ancestorNdx + 1
+            childPosition: int = 0
+            while subtreeEndsArr[childNdx] <= nodeNdx:
+                childNdx = subtreeEndsArr[childNdx]
+                childPosition += 1
+            pathList.append((ancestorNdx, childPosition))
+            ancestorNdx = childNdx
+        return pathList
+
+    def SubtreeType(self, nodeNdx: int, pathList: Optional[List[Tuple[int, int]]] = None) -> Optional[str]:
+        """
+        Returns the type of the subtree starting at nodeNdx: the parameter type expected by its parent, or the return type of the root
+        function. Returns None for a root constant or variable, whose type depends on the typing of the individual.
+        pathList is genome.Path(nodeNdx), if already computed.
+        """
+        if pathList is None:
+            pathList = self.Path(nodeNdx)
+        if len(pathList) > 0:
+            parentNdx, childPosition = pathList[-1]
+            return self._signatureTable._parameterTypesTuple[self._opcodesArr[parentNdx]][childPosition]
+        if self._opcodesArr[nodeNdx] >= 0:
+            return self._signatureTable._returnTypesTuple[self._opcodesArr[nodeNdx]]
+        return None
+
+    def ReplaceSubtree(self, nodeNdx: int, donorGenome: 'Genome', donorNodeNdx: int = 0) -> 'Genome':
+        """
+        Returns a new genome where the subtree starting at nodeNdx is replaced with the subtree of donorGenome starting at donorNodeNdx
+        """
+        if donorGenome._signatureTable is not self._signatureTable and \
+                donorGenome._signatureTable._functionNamesTuple != self._signatureTable._functionNamesTuple:
+            raise ValueError("Genome.ReplaceSubtree(): The donor genome was encoded with a different signature table")
+        variableNameToNdxDict: Dict[str, int] = {variableName: variableNdx for variableNdx, variableName in enumerate(self._variableNamesTuple)}
+        genomeBuffers: GenomeBuffers = GenomeBuffers()
+        genomeBuffers.AppendNodes(self, 0, nodeNdx, variableNameToNdxDict)
+        genomeBuffers.AppendNodes(donorGenome, donorNodeNdx, donorGenome.SubtreeEnds()[donorNodeNdx], variableNameToNdxDict)
+        genomeBuffers.AppendNodes(self, self.SubtreeEnds()[nodeNdx], len(self._opcodesArr), variableNameToNdxDict)
+        variableNamesTuple: Tuple[str, ...] = self._variableNamesTuple
+        if len(variableNameToNdxDict) > len(variableNamesTuple): # The donor subtree brought new variables
+            variableNamesTuple = tuple(variableNameToNdxDict)
+        return genomeBuffers.ToGenome(self._signatureTable, variableNamesTuple)
+
+    def SubtreeHashes(self) -> array.array:
+        """
+        Returns, for each node, a canonical 64-bit structural hash of the subtree starting at that node.
+        The hash covers the function names, the constant texts, the variable names and the children, so it doesn't depend
+        on the signature table or on the genome encoding. The hashes are computed once and kept in the genome.
+        """
+        if self._subtreeHashesArr is None:
+            subtreeHashesArr: array.array = array.array('Q', bytes(8 * len(self._opcodesArr)))
+            childrenDigestsStack: List[bytes] = []
+            # In reverse prefix order, the digests of the children of a function are on top of the stack, first child on top
+            for nodeNdx in range(len(self._opcodesArr) - 1, -1, -1):
+                opcode: int = self._opcodesArr[nodeNdx]
+                if opcode == CONSTANT_OPCODE:
+                    digest: bytes = hashlib.blake2b(b'c' + self.ConstantText(self._operandsArr[nodeNdx]).encode('utf-8'), digest_size=8).digest()
+                elif opcode == VARIABLE_OPCODE:
+                    digest = hashlib.blake2b(b'v' + self._variableNamesTuple[self._operandsArr[nodeNdx]].encode('utf-8'), digest_size=8).digest()
+                else:
+                    hasher = hashlib.blake2b(b'f' + self._signatureTable._functionNamesTuple[opcode].encode('utf-8') + b'\x00', digest_size=8)
+                    for _ in range(self._signatureTable._aritiesTuple[opcode]):
+                        hasher.update(childrenDigestsStack.pop())
+                    digest = hasher.digest()
+                childrenDigestsStack.append(digest)
+                subtreeHashesArr[nodeNdx] = int.from_bytes(digest, 'little')
+            self._subtreeHashesArr = subtreeHashesArr
+        return self._subtreeHashesArr
+
+    def ToBytes(self) -> bytes:
+        """
+        Compact little-endian serialization of the genome. The signature table is not included.
+        """
+        opcodesArr: array.array = self._opcodesArr
+        operandsArr: array.array = self._operandsArr
+        constantsArr: array.array = self._constantsArr
+        if sys.byteorder == 'big':
+            opcodesArr, operandsArr, constantsArr = array.array('h', opcodesArr), array.array('i', operandsArr), array.array('d', constantsArr)
+            for arr in [opcodesArr, operandsArr, constantsArr]:
+                arr.byteswap()
+        stringsBytes: bytes = '\x00'.join(self._constantTextsTuple + self._variableNamesTuple).encode('utf-8')
+        return GENOME_HEADER_STRUCT.pack(len(opcodesArr), len(constantsArr), len(self._constantTextsTuple), len(self._variableNamesTuple)) + \
+            opcodesArr.tobytes() + operandsArr.tobytes() + constantsArr.tobytes() + stringsBytes
+
+    @staticmethod
+    def FromBytes(signatureTable: SignatureTable, genomeBytes: Union[bytes, memoryview],
+                  opcodeRemappingList: Optional[List[int]] = None) -> 'Genome':
+        """
+        Inverse of ToBytes(). If the genome was serialized with a different signature table, opcodeRemappingList maps
+        its opcodes to the opcodes of signatureTable.
+        """
+        numberOfNodes, numberOfConstants, numberOfConstantTexts, numberOfVariableNames = GENOME_HEADER_STRUCT.unpack_from(genomeBytes, 0)
+        position: int = GENOME_HEADER_STRUCT.size
+        opcodesArr: array.array = array.array('h')
+        opcodesArr.frombytes(genomeBytes[position: position + 2 * numberOfNodes])
+        position += 2 * numberOfNodes
+        operandsArr: array.array = array.array('i')
+        operandsArr.frombytes(genomeBytes[position: position + 4 * numberOfNodes])
+        position += 4 * numberOfNodes
+        constantsArr: array.array = array.array('d')
+        constantsArr.frombytes(genomeBytes[position: position + 8 * numberOfConstants])
+        position += 8 * numberOfConstants
+        if sys.byteorder == 'big':
+            for arr in [opcodesArr, operandsArr, constantsArr]:
+                arr.byteswap()
+        if opcodeRemappingList is not None:
+            opcodesArr = array.array('h', [opcodeRemappingList[opcode] if opcode >= 0 else opcode for opcode in opcodesArr])
+        if len(opcodesArr) > 0 and max(opcodesArr) >= len(signatureTable._functionNamesTuple):
+            raise ValueError("Genome.FromBytes(): The opcode {} is out of the signature table".format(max(opcodesArr)))
+        stringsList: List[str] = []
+        if numberOfConstantTexts + numberOfVariableNames > 0:
+            stringsList = bytes(genomeBytes[position:]).decode('utf-8').split('\x00')
+        if len(stringsList) != numberOfConstantTexts + numberOfVariableNames:
+            raise ValueError("Genome.FromBytes(): Expected {} strings, got {}".format(numberOfConstantTexts + numberOfVariableNames, len(stringsList)))
+        return Genome(signatureTable, opcodesArr, operandsArr, constantsArr, tuple(stringsList[: numberOfConstantTexts]),
+                      tuple(stringsList[numberOfConstantTexts:]))
+
+    def NumberOfBytes(self) -> int:
+        """
+        Memory footprint of the genome, excluding the shared signature table and variable names
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self._opcodesArr) + sys.getsizeof(self._operandsArr) + sys.getsizeof(self._constantsArr) + \
+            sys.getsizeof(self._constantTextsTuple) + sum(sys.getsizeof(constantText) for constantText in self._constantTextsTuple)
+
+    def ToElementTree(self) -> ET.ElementTree:
+        root: ET.Element = ET.Element('individual')
+        # Stack of [element, number of children still to be appended]
+        parentsStack: List[List[Any]] = [[root, 1]]
+        for nodeNdx in range(len(self._opcodesArr)):
+            parentAndRemaining: List[Any] = parentsStack[-1]
+            opcode: int = self._opcodesArr[nodeNdx]
+            if opcode == CONSTANT_OPCODE:
+                element: ET.Element = ET.SubElement(parentAndRemaining[0], 'constant')
+                element.text = self.ConstantText(self._operandsArr[nodeNdx])
+            elif opcode == VARIABLE_OPCODE:
+                element = ET.SubElement(parentAndRemaining[0], 'variable')
+                element.text = self._variableNamesTuple[self._operandsArr[nodeNdx]]
             else:
-                raise ValueError("genetic_programming.py Interpreter.__init__(): An child of the root element has tag '{}'".format(rootChild.tag))
+                element = ET.SubElement(parentAndRemaining[0], self._signatureTable._functionNamesTuple[opcode])
+            parentAndRemaining[1] -= 1
+            if parentAndRemaining[1] == 0:
+                parentsStack.pop()
+            if opcode >= 0 and self._signatureTable._aritiesTuple[opcode] > 0:
+                parentsStack.append([element, self._signatureTable._aritiesTuple[opcode]])
+        return ET.ElementTree(root)
+
+class SubtreeCache():
+    """
+    Memoization of subtree results, keyed by (subtree hash, dataset id), with least-recently-used eviction
+    when the stored results exceed maximumNumberOfBytes
+    """
+    def __init__(self, maximumNumberOfBytes: int) -> None:
+        self._maximumNumberOfBytes: int = maximumNumberOfBytes
+        self._keyToResultDict: collections.OrderedDict = collections.OrderedDict()
+        self._numberOfBytes: int = 0
+        self._numberOfHits: int = 0
+        self._numberOfMisses: int = 0
+        self._numberOfEvictions: int = 0
+
+    @staticmethod
+    def ResultNumberOfBytes(result: Any) -> int:
+        if isinstance(result, np.ndarray):
+            return result.nbytes
+        return sys.getsizeof(result)
+
+    def Get(self, key: Tuple[int, Any]) -> Optional[Any]:
+        result: Optional[Any] = self._keyToResultDict.get(key)
+        if result is None:
+            self._numberOfMisses += 1
+            return None
+        self._numberOfHits += 1
+        self._keyToResultDict.move_to_end(key)
+        return result
+
+    def Put(self, key: Tuple[int, Any], result: Any) -> None:
+        resultNumberOfBytes: int = self.ResultNumberOfBytes(result)
+        if resultNumberOfBytes > self._maximumNumberOfBytes or key in self._keyToResultDict:
+            return
+        if isinstance(result, np.ndarray): # The cached arrays are shared by all the individuals
+            # A read-only view: the result can be an array of the caller, e.g. a dataset column returned by a primitive
+            result = result.view()
+            result.flags.writeable = False
+        self._keyToResultDict[key] = result
+        self._numberOfBytes += resultNumberOfBytes
+        while self._numberOfBytes > self._maximumNumberOfBytes:
+            evictedKey, evictedResult = self._keyToResultDict.popitem(last=False)
+            self._numberOfBytes -= self.ResultNumberOfBytes(evictedResult)
+            self._numberOfEvictions += 1
+
+    def Clear(self) -> None:
+        self._keyToResultDict.clear()
+        self._numberOfBytes = 0
+
+    def Statistics(self) -> Dict[str, int]:
+        return {'hits': self._numberOfHits, 'misses': self._numberOfMisses, 'evictions': self._numberOfEvictions,
+                'numberOfEntries': len(self._keyToResultDict), 'numberOfBytes': self._numberOfBytes,
+                'maximumNumberOfBytes': self._maximumNumberOfBytes}
+
+def RacingRowsOrder(numberOfRows: int, order: str, seed: Optional[int] = None, strataArr: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the row indices in the order used by Interpreter.EvaluateCostRacing(): 'sequential', 'shuffled', or 'stratified'.
+    In the stratified order, the rows of each stratum (the distinct values of strataArr) are shuffled and spread evenly, such that
+    every prefix of the order has about the proportions of the strata in the whole dataset.
+    The order can be computed once and reused for all the individuals of a population.
+    """
+    if order == 'sequential':
+        return np.arange(numberOfRows)
+    randomGenerator: np.random.Generator = np.random.default_rng(seed)
+    if order == 'shuffled':
+        return randomGenerator.permutation(numberOfRows)
+    elif order == 'stratified':
+        if strataArr is None or len(strataArr) != numberOfRows:
+            raise ValueError("genetic_programming.RacingRowsOrder(): The stratified order requires strataArr, with one stratum per row")
+        _, stratumNdxsArr, stratumSizesArr = np.unique(np.asarray(strataArr), return_inverse=True, return_counts=True)
+        # Rank of each row in its shuffled stratum, jittered and divided by the stratum size: the strata interleave evenly
+        shuffledRowsArr: np.ndarray = randomGenerator.permutation(numberOfRows)
+        shuffledStratumNdxsArr: np.ndarray = stratumNdxsArr.ravel()[shuffledRowsArr]
+        sortedNdxsArr: np.ndarray = np.argsort(shuffledStratumNdxsArr, kind='stable')
+        stratumStartsArr: np.ndarray = np.concatenate(([0], np.cumsum(stratumSizesArr)[:-1]))
+        ranksArr: np.ndarray = np.empty(numberOfRows, dtype=float)
+        ranksArr[sortedNdxsArr] = np.arange(numberOfRows) - stratumStartsArr[shuffledStratumNdxsArr[sortedNdxsArr]]
+        positionsArr: np.ndarray = (ranksArr + randomGenerator.random(numberOfRows)) / stratumSizesArr[shuffledStratumNdxsArr]
+        return shuffledRowsArr[np.argsort(positionsArr, kind='stable')]
+    raise ValueError("genetic_programming.RacingRowsOrder(): Unknown order '{}'".format(order))
+
+class RacingResult():
+    """
+    Result of Interpreter.EvaluateCostRacing(). If the evaluation was aborted, IsPartial() is True and Cost() is the cost over
+    the evaluated rows only, which can't be compared with full costs; CostLowerBound() is the bound that exceeded the threshold.
+    """
+    def __init__(self, cost: float, isPartial: bool, costLowerBound: float, numberOfEvaluatedRows: int, numberOfRows: int) -> None:
+        self._cost = cost
+        self._isPartial = isPartial
+        self._costLowerBound = costLowerBound
+        self._numberOfEvaluatedRows = numberOfEvaluatedRows
+        self._numberOfRows = numberOfRows
+
+    def Cost(self) -> float:
+        return self._cost
+
+    def IsPartial(self) -> bool:
+        return self._isPartial
+
+    def CostLowerBound(self) -> float:
+        return self._costLowerBound
+
+    def NumberOfEvaluatedRows(self) -> int:
+        return self._numberOfEvaluatedRows
+
+    def NumberOfSavedRows(self) -> int:
+        return self._numberOfRows - self._numberOfEvaluatedRows
+
+    def __repr__(self) -> str:
+        return "RacingResult(cost={}, isPartial={}, costLowerBound={}, numberOfEvaluatedRows={}, numberOfRows={})".format(
+            self._cost, self._isPartial, self._costLowerBound, self._numberOfEvaluatedRows, self._numberOfRows)
+
+DEFAULT_NODE_OUTPUTS_MAXIMUM_NUMBER_OF_BYTES: int = 64 * 1024 * 1024
+
+class NodeOutputs():
+    """
+    Outputs of the function nodes of an individual over one dataset, kept for incremental re-evaluation.
+    _outputsList[n] is the output of the subtree starting at node n, or None if it must be computed.
+    Outputs are kept while their total size doesn't exceed maximumNumberOfBytes.
+    """
+    def __init__(self, datasetId: Any, numberOfNodes: int, maximumNumberOfBytes: int) -> None:
+        self._datasetId: Any = datasetId
+        self._maximumNumberOfBytes: int = maximumNumberOfBytes
+        self._outputsList: List[Any] = [None] * numberOfNodes
+        self._numberOfBytes: int = 0
+        self._numberOfComputedNodes: int = 0
+        self._numberOfReusedNodes: int = 0
+
+    def __len__(self) -> int:
+        return len(self._outputsList)
+
+    def Put(self, nodeNdx: int, output: Any) -> None:
+        outputNumberOfBytes: int = SubtreeCache.ResultNumberOfBytes(output)
+        if self._numberOfBytes + outputNumberOfBytes <= self._maximumNumberOfBytes:
+            self._outputsList[nodeNdx] = output
+            self._numberOfBytes += outputNumberOfBytes
+
+    def Copy(self) -> 'NodeOutputs':
+        nodeOutputs: NodeOutputs = copy.copy(self)
+        nodeOutputs._outputsList = list(self._outputsList)
+        return nodeOutputs
+
+    def Spliced(self, startNdx: int, endNdx: int, ancestorNdxsList: List[int], newSubtreeNumberOfNodes: int,
+                newSubtreeOutputsList: Optional[List[Any]]) -> 'NodeOutputs':
+        """
+        Returns the node outputs after the replacement of the nodes [startNdx, endNdx) with a new subtree.
+        The ancestors of the replaced subtree are marked to be computed, as well as the new subtree if newSubtreeOutputsList is None.
+        """
+        if newSubtreeOutputsList is None:
+            newSubtreeOutputsList = [None] * newSubtreeNumberOfNodes
+        nodeOutputs: NodeOutputs = NodeOutputs(self._datasetId, 0, self._maximumNumberOfBytes)
+        nodeOutputs._outputsList = self._outputsList[: startNdx] + newSubtreeOutputsList + self._outputsList[endNdx:]
+        for ancestorNdx in ancestorNdxsList:
+            nodeOutputs._outputsList[ancestorNdx] = None
+        for nodeNdx, output in enumerate(nodeOutputs._outputsList):
+            if output is not None:
+                outputNumberOfBytes: int = SubtreeCache.ResultNumberOfBytes(output)
+                if nodeOutputs._numberOfBytes + outputNumberOfBytes > nodeOutputs._maximumNumberOfBytes: # The donor outputs can exceed the cap
+                    nodeOutputs._outputsList[nodeNdx] = None
+                else:
+                    nodeOutputs._numberOfBytes += outputNumberOfBytes
+        return nodeOutputs
+
+    def Statistics(self) -> Dict[str, int]:
+        return {'computedNodes': self._numberOfComputedNodes, 'reusedNodes': self._numberOfReusedNodes,
+                'numberOfOutputs': sum(output is not None for output in self._outputsList), 'numberOfBytes': self._numberOfBytes,
+                'maximumNumberOfBytes': self._maximumNumberOfBytes}
+
+class GenomeBuffers():
+    """
+    Growable buffers used to build a Genome node by node, in prefix order
+    """
+    def __init__(self) -> None:
+        self._opcodesArr: array.array = array.array('h')
+        self._operandsArr: array.array = array.array('i')
+        self._constantsArr: array.array = array.array('d')
+        self._constantTextsList: List[str] = []
+
+    def AppendFunction(self, opcode: int) -> None:
+        self._opcodesArr.append(opcode)
+        self._operandsArr.append(0)
+
+    def AppendVariable(self, variableNdx: int) -> None:
+        self._opcodesArr.append(VARIABLE_OPCODE)
+        self._operandsArr.append(variableNdx)
+
+    def AppendConstant(self, constantText: str) -> None:
+        self._opcodesArr.append(CONSTANT_OPCODE)
+        try:
+            constantValue: Optional[float] = float(constantText)
+        except ValueError:
+            constantValue = None
+        if constantValue is not None and repr(constantValue) == constantText: # The text can be recovered exactly from the float
+            self._operandsArr.append(len(self._constantsArr))
+            self._constantsArr.append(constantValue)
+        else:
+            self._operandsArr.append(-1 - len(self._constantTextsList))
+            self._constantTextsList.append(constantText)
+
+    def AppendNodes(self, genome: Genome, startNdx: int, endNdx: int, variableNameToNdxDict: Dict[str, int]) -> None:
+        """
+        Appends a copy of the nodes [startNdx, endNdx) of genome. The variable indices are taken from variableNameToNdxDict,
+        where the missing variable names are added.
+        """
+        for nodeNdx in range(startNdx, endNdx):
+            opcode: int = genome._opcodesArr[nodeNdx]
+            operand: int = genome._operandsArr[nodeNdx]
+            if opcode == CONSTANT_OPCODE:
+                if operand >= 0:
+                    self._opcodesArr.append(CONSTANT_OPCODE)
+                    self._operandsArr.append(len(self._constantsArr))
+                    self._constantsArr.append(genome._constantsArr[operand])
+                else:
+                    self.AppendConstant(genome.ConstantText(operand))
+            elif opcode == VARIABLE_OPCODE:
+                variableName: str = genome._variableNamesTuple[operand]
+                self.AppendVariable(variableNameToNdxDict.setdefault(variableName, len(variableNameToNdxDict)))
+            else:
+                self.AppendFunction(opcode)
+
+    def ToGenome(self, signatureTable: SignatureTable, variableNamesTuple: Tuple[str, ...]) -> Genome:
+        # Copying the arrays drops the over-allocation of the growing buffers
+        return Genome(signatureTable, array.array('h', self._opcodesArr), array.array('i', self._operandsArr),
+                      array.array('d', self._constantsArr), tuple(self._constantTextsList), variableNamesTuple)
+
+
+
+
+
+def CallWithArgumentsList(function: Callable, functionName: str, *argumentsTuple: Any) -> Any:
+    return function(functionName, list(argumentsTuple))
+
+# The methods replaced with an instrumented version, as instance attributes, in instrumentation mode
+INSTRUMENTED_METHOD_NAMES: Tuple[str, ...] = ('Validate', 'CheckIfSignatureMatches', 'FunctionDefinition', 'Evaluate', 'EvaluateBatch',
+                                              'EvaluateBatchIncremental')
+
+class Instrumentation():
+    """
+    Statistics collected by an interpreter in instrumentation mode (cf. Interpreter.EnableInstrumentation()).
+    The seconds of a lazy primitive include the evaluation of its arguments.
+    The 'primitiveDispatch' method counters cover the calls of all the primitives, including the fallbacks to FunctionDefinition() and
+    FunctionDefinitionBatch(); their seconds count the nested calls in the arguments of a lazy primitive once.
+    """
+    def __init__(self) -> None:
+        self._functionNameToCountersDict: Dict[str, Dict[str, Any]] = {}
+        self._functionNameToBatchCountersDict: Dict[str, Dict[str, Any]] = {}
+        self._methodNameToCountersDict: Dict[str, Dict[str, Any]] = {'Validate': {'calls': 0, 'seconds': 0.0},
+                                                                     'primitiveDispatch': {'calls': 0, 'seconds': 0.0},
+                                                                     'CheckIfSignatureMatches': {'calls': 0, 'seconds': 0.0}}
+        self._evaluationCountersDict: Dict[str, Any] = {}
+        self._numberOfFunctionCalls: int = 0 # Running count, for the function nodes evaluated per evaluation
+        self._primitiveCallsDepth: int = 0 # Number of instrumented primitives being called, for the lazy primitives
+        self.Reset()
+
+    def Reset(self) -> None:
+        # The counters dictionaries are referenced by the instrumented callables: they are zeroed in place
+        for countersDict in list(self._functionNameToCountersDict.values()) + list(self._functionNameToBatchCountersDict.values()) + \
+                list(self._methodNameToCountersDict.values()):
+            for counterName in countersDict:
+                countersDict[counterName] = 0.0 if counterName == 'seconds' else 0
+        self._evaluationCountersDict.update({'evaluations': 0, 'functionNodes': 0, 'minimumFunctionNodes': None, 'maximumFunctionNodes': None})
+
+    def FunctionCounters(self, functionName: str, isBatch: bool) -> Dict[str, Any]:
+        functionNameToCountersDict: Dict[str, Dict[str, Any]] = self._functionNameToBatchCountersDict if isBatch else self._functionNameToCountersDict
+        if functionName not in functionNameToCountersDict:
+            functionNameToCountersDict[functionName] = {'calls': 0, 'seconds': 0.0, 'exceptions': 0, 'guardFallbacks': 0}
+            if isBatch:
+                functionNameToCountersDict[functionName]['rows'] = 0
+        return functionNameToCountersDict[functionName]
+
+    def InstrumentedPrimitive(self, functionName: str, primitive: Callable, isBatch: bool, isLazy: bool,
+                              guardedPrimitive: Optional[Callable] = None) -> Callable:
+        """
+        Wraps primitive, with the guard of guardedPrimitive (primitive itself by default)
+        """
+        countersDict: Dict[str, Any] = self.FunctionCounters(functionName, isBatch)
+        dispatchCountersDict: Dict[str, Any] = self._methodNameToCountersDict['primitiveDispatch']
+        # The arguments of a lazy primitive are callables
+        guard: Optional[Callable[..., Any]] = None if isLazy else getattr(guardedPrimitive or primitive, '_primitiveGuard', None)
+
+        def InstrumentedPrimitive(*argumentsTuple: Any) -> Any:
+            self._primitiveCallsDepth += 1
+            startTime: float = time.perf_counter()
+            try:
+                result: Any = primitive(*argumentsTuple)
+            except Exception:
+                countersDict['exceptions'] += 1
+                raise
+            finally:
+                seconds: float = time.perf_counter() - startTime
+                self._primitiveCallsDepth -= 1
+                countersDict['seconds'] += seconds
+                countersDict['calls'] += 1
+                dispatchCountersDict['calls'] += 1
+                if self._primitiveCallsDepth == 0:
+                    dispatchCountersDict['seconds'] += seconds
+                self._numberOfFunctionCalls += 1
+            if guard is not None:
+                countersDict['guardFallbacks'] += int(np.count_nonzero(np.broadcast_to(guard(result, *argumentsTuple), np.shape(result))))
+            if isBatch:
+                countersDict['rows'] += int(np.size(result))
+            return result
+        return InstrumentedPrimitive
+
+    def InstrumentPrimitiveTables(self, interpreter: 'Interpreter') -> None:
+        for opcode, functionName in enumerate(interpreter._signatureTable._functionNamesTuple):
+            interpreter._opcodeToPrimitiveList[opcode] = self.InstrumentedPrimitive(
+                functionName, interpreter._opcodeToPrimitiveList[opcode], False, interpreter._opcodeToPrimitiveIsLazyList[opcode])
+            interpreter._opcodeToBatchPrimitiveList[opcode] = self.InstrumentedPrimitive(
+                functionName, interpreter._opcodeToBatchPrimitiveList[opcode], True, interpreter._opcodeToBatchPrimitiveIsLazyList[opcode])
+
+    def InstrumentMethods(self, interpreter: 'Interpreter') -> None:
+        """
+        Shadows the methods of INSTRUMENTED_METHOD_NAMES with instance attributes
+        """
+        # CheckIfSignatureMatches() is only called by EvaluateElement(): the genome paths are checked once by Validate()
+        for methodName in ['Validate', 'CheckIfSignatureMatches']:
+            setattr(interpreter, methodName, self.TimedMethod(getattr(interpreter, methodName), self._methodNameToCountersDict[methodName]))
+        # FunctionDefinition() calls the primitives directly: the calls of the element path are counted per function there
+        functionDefinition: Callable = interpreter.FunctionDefinition
+        functionNameToPrimitiveDict: Dict[str, Callable] = {}
+
+        def InstrumentedFunctionDefinition(functionName: str, argumentsList: List[Any]) -> Any:
+            primitive: Optional[Callable] = functionNameToPrimitiveDict.get(functionName)
+            if primitive is None:
+                # FunctionDefinition() receives the evaluated arguments
+                primitive = self.InstrumentedPrimitive(functionName, functools.partial(CallWithArgumentsList, functionDefinition, functionName),
+                                                       False, False, interpreter.TablePrimitive(functionName, False))
+                functionNameToPrimitiveDict[functionName] = primitive
+            return primitive(*argumentsList)
+        interpreter.FunctionDefinition = InstrumentedFunctionDefinition
+        for methodName in ['Evaluate', 'EvaluateBatch', 'EvaluateBatchIncremental']:
+            setattr(interpreter, methodName, self.CountedEvaluation(getattr(interpreter, methodName)))
+
+    def TimedMethod(self, method: Callable, countersDict: Dict[str, Any]) -> Callable:
+        def TimedMethod(*argumentsTuple: Any, **keywordArgumentsDict: Any) -> Any:
+            startTime: float = time.perf_counter()
+            try:
+                return method(*argumentsTuple, **keywordArgumentsDict)
+            finally:
+                countersDict['seconds'] += time.perf_counter() - startTime
+                countersDict['calls'] += 1
+        return TimedMethod
+
+    def CountedEvaluation(self, evaluationMethod: Callable) -> Callable:
+        evaluationCountersDict: Dict[str, Any] = self._evaluationCountersDict
+
+        def CountedEvaluation(*argumentsTuple: Any, **keywordArgumentsDict: Any) -> Any:
+            startNumberOfFunctionCalls: int = self._numberOfFunctionCalls
+            result: Any = evaluationMethod(*argumentsTuple, **keywordArgumentsDict)
+            numberOfFunctionNodes: int = self._numberOfFunctionCalls - startNumberOfFunctionCalls
+            evaluationCountersDict['evaluations'] += 1
+            evaluationCountersDict['functionNodes'] += numberOfFunctionNodes
+            if evaluationCountersDict['minimumFunctionNodes'] is None or numberOfFunctionNodes < evaluationCountersDict['minimumFunctionNodes']:
+                evaluationCountersDict['minimumFunctionNodes'] = numberOfFunctionNodes
+            if evaluationCountersDict['maximumFunctionNodes'] is None or numberOfFunctionNodes > evaluationCountersDict['maximumFunctionNodes']:
+                evaluationCountersDict['maximumFunctionNodes'] = numberOfFunctionNodes
+            return result
+        return CountedEvaluation
+
+    def Statistics(self) -> Dict[str, Any]:
+        evaluationStatisticsDict: Dict[str, Any] = dict(self._evaluationCountersDict)
+        evaluationStatisticsDict['meanFunctionNodes'] = evaluationStatisticsDict['functionNodes'] / evaluationStatisticsDict['evaluations'] \
+            if evaluationStatisticsDict['evaluations'] > 0 else None
+        return {'functions': {functionName: dict(countersDict) for functionName, countersDict in self._functionNameToCountersDict.items()
+                              if countersDict['calls'] > 0},
+                'batchFunctions': {functionName: dict(countersDict) for functionName, countersDict in self._functionNameToBatchCountersDict.items()
+                                   if countersDict['calls'] > 0},
+                'methods': {methodName: dict(countersDict) for methodName, countersDict in self._methodNameToCountersDict.items()},
+                'evaluations': evaluationStatisticsDict}
+
+# The (function, arity) pairs of the methods already checked by CanBeCalledWithArity()
+_checkedMethodAritiesSet: Set[Tuple[Callable, int]] = set()
+
+def CanBeCalledWithArity(function: Callable, arity: int) -> bool:
+    """
+    Whether function accepts arity positional arguments. The checks of methods are memoized, since the interpreters of a class
+    register the same methods.
+    """
+    methodKey: Optional[Tuple[Callable, int]] = (function.__func__, arity) if inspect.ismethod(function) else None
+    if methodKey is not None and methodKey in _checkedMethodAritiesSet:
+        return True
+    try:
+        inspect.signature(function).bind(*range(arity))
+    except TypeError:
+        return False
+    if methodKey is not None:
+        _checkedMethodAritiesSet.add(methodKey)
+    return True
+
+# Identifies the primitive tables built by BuildPrimitiveTables(), across all the interpreters of the process
+_primitiveTablesVersions: Iterator[int] = itertools.count()
+
+def DeclaringClass(cls: type, attributeName: str) -> Optional[type]:
+    """
+    The class of the method resolution order of cls that defines attributeName
+    """
+    for baseClass in cls.__mro__:
+        if attributeName in baseClass.__dict__:
+            return baseClass
+    return None
+
+def IsStrictSubclass(cls: Optional[type], baseClass: Optional[type]) -> bool:
+    return cls is not None and baseClass is not None and cls is not baseClass and issubclass(cls, baseClass)
+
+class Interpreter(abc.ABC):
+    def __init__(self, domainFunctionsTree: Union[ET.ElementTree, SignatureTable]) -> None:
+        """
+        domainFunctionsTree is the parsed domain file, or its signature table (cf. LoadSignatureTable())
+        """
+        super().__init__()
+        if isinstance(domainFunctionsTree, SignatureTable):
+            self._signatureTable: SignatureTable = domainFunctionsTree
+            self._functionNameToSignatureDict: Dict[str, FunctionSignature] = domainFunctionsTree.FunctionSignatures()
+        else:
+            self._functionNameToSignatureDict = ParseDomainFunctions(domainFunctionsTree)
+            self._signatureTable = SignatureTable(self._functionNameToSignatureDict)
+        self._subtreeCache: Optional[SubtreeCache] = None
+        self._instrumentation: Optional[Instrumentation] = None
+        self.ResetRacingStatistics()
+
+        # Register the methods decorated with @Primitive
+        self._functionNameToPrimitiveDict: Dict[str, Callable] = {}
+        self._functionNameToBatchPrimitiveDict: Dict[str, Callable] = {}
+        self._lazyPrimitiveFunctionNamesSet: Set[str] = set()
+        self._lazyBatchPrimitiveFunctionNamesSet: Set[str] = set()
+        # The decorated primitives bypassed by the primitive tables, because a derived class of the class declaring them overrides
+        # FunctionDefinition() (or FunctionDefinitionBatch(), for a batch primitive)
+        self._overriddenPrimitiveFunctionNamesSet: Set[str] = set()
+        self._overriddenBatchPrimitiveFunctionNamesSet: Set[str] = set()
+        functionDefinitionClass: type = DeclaringClass(type(self), 'FunctionDefinition')
+        functionDefinitionBatchClass: type = DeclaringClass(type(self), 'FunctionDefinitionBatch')
+        for attributeName in dir(type(self)):
+            classAttribute: Any = getattr(type(self), attributeName, None)
+            primitiveFunctionName: Optional[str] = getattr(classAttribute, '_primitiveFunctionName', None)
+            if primitiveFunctionName is not None and primitiveFunctionName in self._signatureTable._functionNameToOpcodeDict:
+                self.RegisterPrimitive(primitiveFunctionName, getattr(self, attributeName), classAttribute._primitiveIsBatch,
+                                       rebuildTables=False, lazy=classAttribute._primitiveIsLazy)
+                primitiveClass: type = DeclaringClass(type(self), attributeName)
+                isOverridden: bool = IsStrictSubclass(functionDefinitionClass, primitiveClass)
+                if classAttribute._primitiveIsBatch:
+                    if isOverridden or IsStrictSubclass(functionDefinitionBatchClass, primitiveClass):
+                        self._overriddenBatchPrimitiveFunctionNamesSet.add(primitiveFunctionName)
+                elif isOverridden:
+                    self._overriddenPrimitiveFunctionNamesSet.add(primitiveFunctionName)
+        self.BuildPrimitiveTables()
+
+    def RegisterPrimitive(self, functionName: str, primitive: Callable, batch: bool = False, rebuildTables: bool = True,
+                          lazy: bool = False) -> None:
+        """
+        Registers a callable implementing the domain function functionName. The callable receives the evaluated arguments
+        as positional parameters, or callables that evaluate them if lazy is True (cf. Primitive()).
+        The registered callable takes precedence over an overridden FunctionDefinition() or FunctionDefinitionBatch().
+        """
+        if functionName not in self._signatureTable._functionNameToOpcodeDict:
+            raise KeyError("Interpreter.RegisterPrimitive(): The function name '{}' doesn't exist in the domain functions".format(functionName))
+        arity: int = self._signatureTable._aritiesTuple[self._signatureTable._functionNameToOpcodeDict[functionName]]
+        if not CanBeCalledWithArity(primitive, arity):
+            raise ValueError("Interpreter.RegisterPrimitive(): The primitive for function '{}' can't be called with {} arguments".format(
+                functionName, arity))
+        lazyPrimitiveFunctionNamesSet: Set[str] = self._lazyBatchPrimitiveFunctionNamesSet if batch else self._lazyPrimitiveFunctionNamesSet
+        if batch:
+            self._functionNameToBatchPrimitiveDict[functionName] = primitive
+            self._overriddenBatchPrimitiveFunctionNamesSet.discard(functionName)
+        else:
+            self._functionNameToPrimitiveDict[functionName] = primitive
+            self._overriddenPrimitiveFunctionNamesSet.discard(functionName)
+        if lazy:
+            lazyPrimitiveFunctionNamesSet.add(functionName)
+        else:
+            lazyPrimitiveFunctionNamesSet.discard(functionName)
+        if rebuildTables:
+            self.BuildPrimitiveTables()
+
+    def BuildPrimitiveTables(self) -> None:
+        """
+        Resolves each opcode once to a callable. The functions without a registered primitive go through
+        FunctionDefinition() and FunctionDefinitionBatch(), such that derived classes that override them keep working.
+        So do the functions whose decorated primitive is declared by a base class of the class overriding these methods.
+        Only the lazy primitives receive callables as arguments: FunctionDefinition() and FunctionDefinitionBatch() receive the values.
+        """
+        self._opcodeToPrimitiveList: List[Callable] = []
+        self._opcodeToBatchPrimitiveList: List[Callable] = []
+        self._opcodeToPrimitiveIsLazyList: List[bool] = []
+        self._opcodeToBatchPrimitiveIsLazyList: List[bool] = []
+        self._primitiveTablesVersion: int = next(_primitiveTablesVersions) # The functions compiled with previous tables are stale
+        # The class methods, rather than their instrumented version, if any
+        functionDefinition: Callable = type(self).FunctionDefinition.__get__(self)
+        functionDefinitionBatch: Callable = type(self).FunctionDefinitionBatch.__get__(self)
+        for functionName in self._signatureTable._functionNamesTuple:
+            primitive: Optional[Callable] = self.TablePrimitive(functionName, False)
+            batchPrimitive: Optional[Callable] = self.TablePrimitive(functionName, True)
+            self._opcodeToPrimitiveList.append(primitive or self.FallbackPrimitive(functionDefinition, functionName))
+            self._opcodeToBatchPrimitiveList.append(batchPrimitive or self.FallbackPrimitive(functionDefinitionBatch, functionName))
+            self._opcodeToPrimitiveIsLazyList.append(primitive is not None and functionName in self._lazyPrimitiveFunctionNamesSet)
+            self._opcodeToBatchPrimitiveIsLazyList.append(batchPrimitive is not None and functionName in self._lazyBatchPrimitiveFunctionNamesSet)
+        if getattr(self, '_instrumentation', None) is not None:
+            self._instrumentation.InstrumentPrimitiveTables(self)
+
+    def TablePrimitive(self, functionName: str, batch: bool) -> Optional[Callable]:
+        """
+        The registered primitive called directly by the primitive tables, or None if the function goes through
+        FunctionDefinition() or FunctionDefinitionBatch()
+        """
+        if batch:
+            if functionName in self._overriddenBatchPrimitiveFunctionNamesSet:
+                return None
+            return self._functionNameToBatchPrimitiveDict.get(functionName)
+        if functionName in self._overriddenPrimitiveFunctionNamesSet:
+            return None
+        return self._functionNameToPrimitiveDict.get(functionName)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The primitive tables contain lambdas: they are rebuilt after unpickling
+        state: Dict[str, Any] = self.__dict__.copy()
+        del state['_opcodeToPrimitiveList']
+        del state['_opcodeToBatchPrimitiveList']
+        if self._subtreeCache is not None: # Don't copy the cached results
+            state['_subtreeCache'] = SubtreeCache(self._subtreeCache._maximumNumberOfBytes)
+        # Rebuilt from the signature table
+        del state['_functionNameToSignatureDict']
+        # The copy is not instrumented
+        state['_instrumentation'] = None
+        for methodName in INSTRUMENTED_METHOD_NAMES:
+            state.pop(methodName, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._functionNameToSignatureDict = self._signatureTable.FunctionSignatures()
+        self.BuildPrimitiveTables()
+
+    def EnableSubtreeCache(self, maximumNumberOfBytes: int) -> None:
+        """
+        Memoizes the results of the function subtrees, when Evaluate() or EvaluateBatch() is called with a datasetId
+        """
+        self._subtreeCache = SubtreeCache(maximumNumberOfBytes)
+
+    def DisableSubtreeCache(self) -> None:
+        self._subtreeCache = None
+
+    def SubtreeCacheStatistics(self) -> Optional[Dict[str, int]]:
+        if self._subtreeCache is None:
+            return None
+        return self._subtreeCache.Statistics()
+
+    def EnableInstrumentation(self) -> None:
+        """
+        Starts collecting statistics: calls, cumulative time, exceptions and guard fallbacks of each function (cf. Primitive()),
+        function nodes evaluated per evaluation, and time spent in Validate(), in the primitives altogether and in
+        CheckIfSignatureMatches() (cf. Instrumentation).
+        The primitives and these methods are replaced with instrumented versions, such that a disabled instrumentation costs nothing.
+        The compiled functions (cf. Compile()) are instrumented if they are compiled while the instrumentation is enabled.
+        """
+        if self._instrumentation is not None:
+            return
+        self._instrumentation = Instrumentation()
+        self.BuildPrimitiveTables()
+        self._instrumentation.InstrumentMethods(self)
+
+    def DisableInstrumentation(self) -> None:
+        if self._instrumentation is None:
+            return
+        for methodName in INSTRUMENTED_METHOD_NAMES:
+            self.__dict__.pop(methodName, None)
+        self._instrumentation = None
+        self.BuildPrimitiveTables()
+
+    def InstrumentationStatistics(self) -> Optional[Dict[str, Any]]:
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.Statistics()
+
+    def InstrumentationStatisticsJson(self) -> Optional[str]:
+        if self._instrumentation is None:
+            return None
+        return json.dumps(self._instrumentation.Statistics(), indent=2)
+
+    def ResetInstrumentationStatistics(self) -> None:
+        """
+        Sets the statistics back to zero, e.g. at the start of each generation
+        """
+        if self._instrumentation is not None:
+            self._instrumentation.Reset()
+
+    def ResetRacingStatistics(self) -> None:
+        self._racingCountersDict: Dict[str, int] = {'evaluations': 0, 'aborts': 0, 'evaluatedRows': 0, 'savedRows': 0}
+
+    def RacingStatistics(self) -> Dict[str, int]:
+        """
+        Counters of EvaluateCostRacing() since the last ResetRacingStatistics()
+        """
+        return dict(self._racingCountersDict)
+
+    @staticmethod
+    def FallbackPrimitive(functionDefinition: Callable[[str, List[Any]], Any], functionName: str) -> Callable:
+        return lambda *argumentsTuple: functionDefinition(functionName, list(argumentsTuple))
 
     def TypeConverter(self, type: str, value: str) -> Any:
         if type == 'float':
@@ -121,16 +1361,109 @@ class Interpreter(abc.ABC):
         else:
             raise NotImplementedError("Interpreter.TypeConverter(): The type {} is not implemented".format(type))
 
-    def Evaluate(self, individual: Individual, variableNameToTypeDict: Dict[str, str], variableNameToValueDict: Dict[str, Any],
-                        expectedReturnType: Any) -> Any:
-        individualRoot: ET.Element = individual._tree.getroot()
+    def Genome(self, individual: Individual) -> Genome:
+        """
+        Returns the genome of the individual, encoding its tree with the signature table if necessary.
+        The tree is kept in the individual (cf. Individual.TreeHasChanged()).
+        """
+        genome: Optional[Genome] = individual._genome
+        if genome is None or (genome._signatureTable is not self._signatureTable and
+                              genome._signatureTable._functionNamesTuple != self._signatureTable._functionNamesTuple):
+            genome = self.TreeToGenome(individual.Tree())
+            individual._genome = genome
+        return genome
+
+    def TreeToGenome(self, tree: ET.ElementTree) -> Genome:
+        individualRoot: ET.Element = tree.getroot()
         if len(list(individualRoot)) != 1:
-            raise ValueError("Interpreter.Evaluate(): The root has more than one children ({})".format(len(list(individualRoot))))
-        headElement = list(individualRoot)[0]
-        return self.EvaluateElement(headElement, variableNameToTypeDict, variableNameToValueDict, expectedReturnType)
+            raise ValueError("Interpreter.TreeToGenome(): The root has more than one children ({})".format(len(list(individualRoot))))
+        genomeBuffers: GenomeBuffers = GenomeBuffers()
+        variableNameToNdxDict: Dict[str, int] = {}
+        elementsStack: List[ET.Element] = [list(individualRoot)[0]]
+        while len(elementsStack) > 0:
+            element: ET.Element = elementsStack.pop()
+            elementTag = element.tag
+            if elementTag == 'constant':
+                if element.text is None:
+                    raise ValueError("Interpreter.TreeToGenome(): A constant has no value")
+                genomeBuffers.AppendConstant(element.text)
+            elif elementTag == 'variable':
+                if element.text is None:
+                    raise ValueError("Interpreter.TreeToGenome(): A variable has no name")
+                genomeBuffers.AppendVariable(variableNameToNdxDict.setdefault(element.text, len(variableNameToNdxDict)))
+            else: # Function
+                if elementTag not in self._signatureTable._functionNameToOpcodeDict:
+                    raise KeyError("Interpreter.TreeToGenome(): The function name '{}' doesn't exist in the signature table".format(elementTag))
+                opcode: int = self._signatureTable._functionNameToOpcodeDict[elementTag]
+                childrenList: List[ET.Element] = list(element)
+                if len(childrenList) != self._signatureTable._aritiesTuple[opcode]:
+                    raise ValueError("Interpreter.TreeToGenome(): For function '{}', the number of children ({}) != the number of parameters ({})".format(
+                        elementTag, len(childrenList), self._signatureTable._aritiesTuple[opcode]))
+                genomeBuffers.AppendFunction(opcode)
+                elementsStack.extend(reversed(childrenList))
+        return genomeBuffers.ToGenome(self._signatureTable, tuple(variableNameToNdxDict))
+
+    def Evaluate(self, individual: Individual, variableNameToTypeDict: Dict[str, str], variableNameToValueDict: Dict[str, Any],
+                        expectedReturnType: Any, datasetId: Optional[Any] = None) -> Any:
+        """
+        If the subtree cache is enabled and datasetId is not None, the function subtrees results are memoized for this
+        datasetId, which must identify variableNameToValueDict.
+        """
+        genome: Genome = self.Genome(individual)
+        if not individual.IsValidated(variableNameToTypeDict, expectedReturnType):
+            self.Validate(individual, variableNameToTypeDict, expectedReturnType)
+        subtreeHashesArr: Optional[array.array] = None
+        if self._subtreeCache is not None and datasetId is not None:
+            subtreeHashesArr = genome.SubtreeHashes()
+        return self.EvaluateGenomeNode(genome, 0, variableNameToValueDict, expectedReturnType, subtreeHashesArr, datasetId)[0]
+
+    def EvaluateGenomeNode(self, genome: Genome, nodeNdx: int, variableNameToValueDict: Dict[str, Any],
+                           expectedReturnType: Any, subtreeHashesArr: Optional[array.array] = None,
+                           datasetId: Optional[Any] = None) -> Tuple[Any, int]:
+        """
+        Evaluates the subtree of a validated genome starting at nodeNdx. Returns the value and the index following the subtree.
+        The subtree cache is used if subtreeHashesArr is not None.
+        """
+        opcode: int = genome._opcodesArr[nodeNdx]
+        if opcode == CONSTANT_OPCODE:
+            return self.TypeConverter(expectedReturnType, genome.ConstantText(genome._operandsArr[nodeNdx])), nodeNdx + 1
+        elif opcode == VARIABLE_OPCODE:
+            variableName: str = genome._variableNamesTuple[genome._operandsArr[nodeNdx]]
+            if variableName not in variableNameToValueDict:
+                raise KeyError("Interpreter.EvaluateGenomeNode(): Variable '{}' doesn't exist as a key in variableNameToValueDict".format(variableName))
+            return variableNameToValueDict[variableName], nodeNdx + 1
+        else: # Function
+            if subtreeHashesArr is not None:
+                cacheKey: Tuple[int, Any] = (subtreeHashesArr[nodeNdx], datasetId)
+                cachedResult: Optional[Any] = self._subtreeCache.Get(cacheKey)
+                if cachedResult is not None:
+                    return cachedResult, genome.SubtreeEnd(nodeNdx)
+            childrenEvaluationsList: List[Any] = []
+            childNdx: int = nodeNdx + 1
+            if self._opcodeToPrimitiveIsLazyList[opcode]: # The primitive evaluates the arguments it needs
+                for childExpectedReturnType in self._signatureTable._parameterTypesTuple[opcode]:
+                    childrenEvaluationsList.append(self.GenomeNodeThunk(genome, childNdx, variableNameToValueDict, childExpectedReturnType,
+                                                                        subtreeHashesArr, datasetId))
+                    childNdx = genome.SubtreeEnd(childNdx)
+            else:
+                for childExpectedReturnType in self._signatureTable._parameterTypesTuple[opcode]:
+                    childEvaluation, childNdx = self.EvaluateGenomeNode(genome, childNdx, variableNameToValueDict, childExpectedReturnType,
+                                                                        subtreeHashesArr, datasetId)
+                    childrenEvaluationsList.append(childEvaluation)
+            result: Any = self._opcodeToPrimitiveList[opcode](*childrenEvaluationsList)
+            if subtreeHashesArr is not None:
+                self._subtreeCache.Put(cacheKey, result)
+            return result, childNdx
+
+    def GenomeNodeThunk(self, genome: Genome, nodeNdx: int, variableNameToValueDict: Dict[str, Any], expectedReturnType: Any,
+                        subtreeHashesArr: Optional[array.array], datasetId: Optional[Any]) -> Callable[[], Any]:
+        """
+        Returns a callable that evaluates the subtree starting at nodeNdx, for the arguments of lazy primitives
+        """
+        return lambda: self.EvaluateGenomeNode(genome, nodeNdx, variableNameToValueDict, expectedReturnType, subtreeHashesArr, datasetId)[0]
 
     def EvaluateElement(self, element: ET.Element, variableNameToTypeDict: Dict[str, str], variableNameToValueDict: Dict[str, Any],
-                        expectedReturnType: Any) -> Any:
+                        expectedReturnType: Any, checkSignatures: bool = True) -> Any:
         childrenList: List[ET.Element] = list(element)
         elementTag = element.tag
 
@@ -147,18 +1480,535 @@ class Interpreter(abc.ABC):
                 raise KeyError("Interpreter.EvaluateElement(): Variable '{}' doesn't exist as a key in variableNameToValueDict".format(variableName))
             return variableNameToValueDict[variableName]
         else: # Function
-            self.CheckIfSignatureMatches(elementTag, childrenList, variableNameToTypeDict, expectedReturnType)
+            if checkSignatures:
+                self.CheckIfSignatureMatches(elementTag, childrenList, variableNameToTypeDict, expectedReturnType)
             childrenEvaluationsList: List[Any] = []
             for childNdx in range(len(childrenList)):
                 childExpectedReturnType = self._functionNameToSignatureDict[elementTag]._parameterTypesList[childNdx]
-                childEvaluation: Any = self.EvaluateElement(childrenList[childNdx], variableNameToTypeDict, variableNameToValueDict, childExpectedReturnType)
+                childEvaluation: Any = self.EvaluateElement(childrenList[childNdx], variableNameToTypeDict, variableNameToValueDict,
+                                                            childExpectedReturnType, checkSignatures)
                 childrenEvaluationsList.append(childEvaluation)
             return self.FunctionDefinition(elementTag, childrenEvaluationsList)
 
 
-    @abc.abstractmethod
+    def EvaluateBatch(self, individual: Individual, variableNameToTypeDict: Dict[str, str], variableNameToArrayDict: Dict[str, np.ndarray],
+                      expectedReturnType: Any, datasetId: Optional[Any] = None) -> np.ndarray:
+        """
+        Evaluates the individual over a whole dataset, where each variable maps to a 1D array of values (one entry per row).
+        Each node is computed once for all the rows. Returns an array of length equal to the number of rows.
+        If the subtree cache is enabled and datasetId is not None, the function subtrees results are memoized for this
+        datasetId, which must identify variableNameToArrayDict.
+        """
+        genome: Genome = self.Genome(individual)
+        if not individual.IsValidated(variableNameToTypeDict, expectedReturnType):
+            self.Validate(individual, variableNameToTypeDict, expectedReturnType)
+        numberOfRows: int = NumberOfRows(variableNameToArrayDict)
+        subtreeHashesArr: Optional[array.array] = None
+        if self._subtreeCache is not None and datasetId is not None:
+            subtreeHashesArr = genome.SubtreeHashes()
+        # The primitives guard their invalid inputs, so the numpy warnings are not relevant
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result: Any = self.EvaluateGenomeNodeBatch(genome, 0, variableNameToArrayDict, expectedReturnType, subtreeHashesArr, datasetId)[0]
+        return np.broadcast_to(np.asarray(result), (numberOfRows,)).copy()
+
+    def EvaluateGenomeNodeBatch(self, genome: Genome, nodeNdx: int, variableNameToArrayDict: Dict[str, np.ndarray],
+                                expectedReturnType: Any, subtreeHashesArr: Optional[array.array] = None,
+                                datasetId: Optional[Any] = None) -> Tuple[Any, int]:
+        opcode: int = genome._opcodesArr[nodeNdx]
+        if opcode == CONSTANT_OPCODE: # A scalar, broadcast by the functions
+            return self.TypeConverter(expectedReturnType, genome.ConstantText(genome._operandsArr[nodeNdx])), nodeNdx + 1
+        elif opcode == VARIABLE_OPCODE:
+            variableName: str = genome._variableNamesTuple[genome._operandsArr[nodeNdx]]
+            if variableName not in variableNameToArrayDict:
+                raise KeyError("Interpreter.EvaluateGenomeNodeBatch(): Variable '{}' doesn't exist as a key in variableNameToArrayDict".format(variableName))
+            return variableNameToArrayDict[variableName], nodeNdx + 1
+        else: # Function
+            if subtreeHashesArr is not None:
+                cacheKey: Tuple[int, Any] = (subtreeHashesArr[nodeNdx], datasetId)
+                cachedResult: Optional[Any] = self._subtreeCache.Get(cacheKey)
+                if cachedResult is not None:
+                    return cachedResult, genome.SubtreeEnd(nodeNdx)
+            childrenEvaluationsList: List[Any] = []
+            childNdx: int = nodeNdx + 1
+            if self._opcodeToBatchPrimitiveIsLazyList[opcode]: # The primitive evaluates the arguments it needs, on the rows it needs
+                for childExpectedReturnType in self._signatureTable._parameterTypesTuple[opcode]:
+                    childrenEvaluationsList.append(self.GenomeNodeBatchThunk(genome, childNdx, variableNameToArrayDict, childExpectedReturnType,
+                                                                             subtreeHashesArr, datasetId))
+                    childNdx = genome.SubtreeEnd(childNdx)
+            else:
+                for childExpectedReturnType in self._signatureTable._parameterTypesTuple[opcode]:
+                    childEvaluation, childNdx = self.EvaluateGenomeNodeBatch(genome, childNdx, variableNameToArrayDict, childExpectedReturnType,
+                                                                             subtreeHashesArr, datasetId)
+                    childrenEvaluationsList.append(childEvaluation)
+            result: Any = self._opcodeToBatchPrimitiveList[opcode](*childrenEvaluationsList)
+            if subtreeHashesArr is not None:
+                self._subtreeCache.Put(cacheKey, result)
+            return result, childNdx
+
+    def GenomeNodeBatchThunk(self, genome: Genome, nodeNdx: int, variableNameToArrayDict: Dict[str, np.ndarray], expectedReturnType: Any,
+                             subtreeHashesArr: Optional[array.array], datasetId: Optional[Any]) -> Callable[[Optional[np.ndarray]], Any]:
+        """
+        Returns a callable that evaluates the subtree starting at nodeNdx, for the arguments of lazy primitives.
+        The callable takes a boolean mask of the rows to evaluate (None for all the rows), and returns the values for these rows.
+        """
+        def Thunk(rowsMask: Optional[np.ndarray] = None) -> Any:
+            if rowsMask is None:
+                return self.EvaluateGenomeNodeBatch(genome, nodeNdx, variableNameToArrayDict, expectedReturnType, subtreeHashesArr, datasetId)[0]
+            # The cached results are for all the rows, so the subtree cache is not used on a subset of rows
+            return self.EvaluateGenomeNodeBatch(genome, nodeNdx, RowsSubsetDict(variableNameToArrayDict, rowsMask), expectedReturnType)[0]
+        return Thunk
+
+    def EvaluateBatchIncremental(self, individual: Individual, variableNameToTypeDict: Dict[str, str],
+                                 variableNameToArrayDict: Dict[str, np.ndarray], expectedReturnType: Any, datasetId: Any,
+                                 maximumNumberOfBytes: int = DEFAULT_NODE_OUTPUTS_MAXIMUM_NUMBER_OF_BYTES) -> np.ndarray:
+        """
+        Same as EvaluateBatch(), keeping in the individual the outputs of its function nodes over the dataset identified by datasetId,
+        up to maximumNumberOfBytes. After Individual.ReplaceSubtree(), Individual.Crossover() or IndividualGenerator.Mutate(),
+        only the new subtree and its ancestors are computed again.
+        The kept outputs are dropped by Individual.DropNodeOutputs(), or replaced when the individual is evaluated over another dataset.
+        """
+        genome: Genome = self.Genome(individual)
+        if not individual.IsValidated(variableNameToTypeDict, expectedReturnType):
+            self.Validate(individual, variableNameToTypeDict, expectedReturnType)
+        numberOfRows: int = NumberOfRows(variableNameToArrayDict)
+        nodeOutputs: Optional[NodeOutputs] = individual._nodeOutputs
+        if nodeOutputs is None or nodeOutputs._datasetId != datasetId or len(nodeOutputs) != len(genome):
+            nodeOutputs = NodeOutputs(datasetId, len(genome), maximumNumberOfBytes)
+            individual._nodeOutputs = nodeOutputs
+        nodeOutputs._maximumNumberOfBytes = maximumNumberOfBytes
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result: Any = self.EvaluateGenomeNodeIncremental(genome, 0, variableNameToArrayDict, expectedReturnType, genome.SubtreeEnds(),
+                                                             nodeOutputs)
+        return np.broadcast_to(np.asarray(result), (numberOfRows,)).copy()
+
+    def EvaluateGenomeNodeIncremental(self, genome: Genome, nodeNdx: int, variableNameToArrayDict: Dict[str, np.ndarray],
+                                      expectedReturnType: Any, subtreeEndsArr: array.array, nodeOutputs: NodeOutputs) -> Any:
+        opcode: int = genome._opcodesArr[nodeNdx]
+        if opcode < 0: # A constant or a variable
+            return self.EvaluateGenomeNodeBatch(genome, nodeNdx, variableNameToArrayDict, expectedReturnType)[0]
+        output: Any = nodeOutputs._outputsList[nodeNdx]
+        if output is not None:
+            nodeOutputs._numberOfReusedNodes += 1
+            return output
+        childrenEvaluationsList: List[Any] = []
+        childNdx: int = nodeNdx + 1
+        isLazy: bool = self._opcodeToBatchPrimitiveIsLazyList[opcode]
+        for childExpectedReturnType in self._signatureTable._parameterTypesTuple[opcode]:
+            if isLazy:
+                childrenEvaluationsList.append(self.GenomeNodeIncrementalThunk(genome, childNdx, variableNameToArrayDict, childExpectedReturnType,
+                                                                               subtreeEndsArr, nodeOutputs))
+            else:
+                childrenEvaluationsList.append(self.EvaluateGenomeNodeIncremental(genome, childNdx, variableNameToArrayDict, childExpectedReturnType,
+                                                                                  subtreeEndsArr, nodeOutputs))
+            childNdx = subtreeEndsArr[childNdx]
+        output = self._opcodeToBatchPrimitiveList[opcode](*childrenEvaluationsList)
+        nodeOutputs._numberOfComputedNodes += 1
+        nodeOutputs.Put(nodeNdx, output)
+        return output
+
+    def GenomeNodeIncrementalThunk(self, genome: Genome, nodeNdx: int, variableNameToArrayDict: Dict[str, np.ndarray], expectedReturnType: Any,
+                                   subtreeEndsArr: array.array, nodeOutputs: NodeOutputs) -> Callable[[Optional[np.ndarray]], Any]:
+        """
+        Same as GenomeNodeBatchThunk(). The node outputs are used and kept only when all the rows are evaluated.
+        """
+        def Thunk(rowsMask: Optional[np.ndarray] = None) -> Any:
+            if rowsMask is None:
+                return self.EvaluateGenomeNodeIncremental(genome, nodeNdx, variableNameToArrayDict, expectedReturnType, subtreeEndsArr, nodeOutputs)
+            return self.EvaluateGenomeNodeBatch(genome, nodeNdx, RowsSubsetDict(variableNameToArrayDict, rowsMask), expectedReturnType)[0]
+        return Thunk
+
+    def EvaluateCostRacing(self, individual: Individual, variableNameToTypeDict: Dict[str, str], dataset: Dict[str, np.ndarray],
+                           rowCostFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], np.ndarray], returnType: str,
+                           abortThreshold: Optional[float] = None, chunkSize: Optional[int] = None,
+                           order: Union[str, np.ndarray] = 'sequential', seed: Optional[int] = None, strataArr: Optional[np.ndarray] = None,
+                           reduction: str = 'mean', minimumRowCost: float = 0.0,
+                           boundStandardDeviations: Optional[float] = None) -> 'RacingResult':
+        """
+        Cost of the individual over dataset, evaluated chunk by chunk with EvaluateBatch(), with early abort.
+        rowCostFunction(predictionsArr, chunkDataset) returns the cost of each row of the chunk; the cost of the individual is their
+        mean or sum, according to reduction.
+        The rows are visited in the order given by RacingRowsOrder(numberOfRows, order, seed, strataArr), or in the order of the
+        row indices array order.
+        After each chunk, a lower bound of the final cost is computed, assuming that the remaining rows cost at least minimumRowCost.
+        With boundStandardDeviations = z, the remaining rows are assumed to cost at least the mean of the evaluated row costs minus z
+        standard errors, which is only meaningful for a shuffled or stratified order.
+        The evaluation stops as soon as this bound exceeds abortThreshold; the result is then marked as partial.
+        """
+        if reduction not in ['mean', 'sum']:
+            raise ValueError("Interpreter.EvaluateCostRacing(): Unknown reduction '{}'".format(reduction))
+        numberOfRows: int = NumberOfRows(dataset)
+        rowsOrderArr: Optional[np.ndarray] = None
+        if isinstance(order, str):
+            if order != 'sequential':
+                rowsOrderArr = RacingRowsOrder(numberOfRows, order, seed, strataArr)
+        else:
+            rowsOrderArr = np.asarray(order)
+            if len(rowsOrderArr) != numberOfRows:
+                raise ValueError("Interpreter.EvaluateCostRacing(): The rows order has {} rows, while the dataset has {} rows".format(
+                    len(rowsOrderArr), numberOfRows))
+        if chunkSize is None:
+            chunkSize = max(1, math.ceil(numberOfRows / 20))
+
+        costsSum: float = 0.0
+        meanCost: float = 0.0
+        sumOfSquaredDeviations: float = 0.0
+        numberOfEvaluatedRows: int = 0
+        costLowerBound: float = -math.inf
+        while numberOfEvaluatedRows < numberOfRows:
+            chunkEndNdx: int = min(numberOfEvaluatedRows + chunkSize, numberOfRows)
+            if rowsOrderArr is None: # Slices are views of the dataset arrays
+                chunkDataset: Dict[str, np.ndarray] = {name: array[numberOfEvaluatedRows: chunkEndNdx] for name, array in dataset.items()}
+            else:
+                chunkRowsArr: np.ndarray = rowsOrderArr[numberOfEvaluatedRows: chunkEndNdx]
+                chunkDataset = {name: np.asarray(array)[chunkRowsArr] for name, array in dataset.items()}
+            rowCostsArr: np.ndarray = np.asarray(rowCostFunction(self.EvaluateBatch(individual, variableNameToTypeDict, chunkDataset, returnType),
+                                                                 chunkDataset), dtype=float)
+            chunkNumberOfRows: int = chunkEndNdx - numberOfEvaluatedRows
+            with np.errstate(over='ignore', invalid='ignore'): # Diverging individuals have infinite costs
+                costsSum = float(costsSum + rowCostsArr.sum())
+                # Running mean and sum of squared deviations, merged chunk by chunk (Chan et al.)
+                chunkMeanCost: float = float(rowCostsArr.mean())
+                meanCostDelta: float = chunkMeanCost - meanCost
+                sumOfSquaredDeviations = float(sumOfSquaredDeviations + np.square(rowCostsArr - chunkMeanCost).sum() +
+                                               np.float64(meanCostDelta) * meanCostDelta * numberOfEvaluatedRows * chunkNumberOfRows / chunkEndNdx)
+                meanCost = float(meanCost + np.float64(meanCostDelta) * chunkNumberOfRows / chunkEndNdx)
+            numberOfEvaluatedRows = chunkEndNdx
+            if abortThreshold is None or numberOfEvaluatedRows == numberOfRows:
+                continue
+            remainingRowCostLowerBound: float = minimumRowCost
+            if boundStandardDeviations is not None:
+                standardError: float = math.sqrt(sumOfSquaredDeviations / numberOfEvaluatedRows / numberOfEvaluatedRows)
+                if not math.isnan(meanCost - boundStandardDeviations * standardError):
+                    remainingRowCostLowerBound = max(minimumRowCost, meanCost - boundStandardDeviations * standardError)
+            costLowerBound = costsSum + (numberOfRows - numberOfEvaluatedRows) * remainingRowCostLowerBound
+            if reduction == 'mean':
+                costLowerBound /= numberOfRows
+            if costLowerBound > abortThreshold:
+                break
+
+        isPartial: bool = numberOfEvaluatedRows < numberOfRows
+        cost: float = costsSum / numberOfEvaluatedRows if reduction == 'mean' else costsSum
+        self._racingCountersDict['evaluations'] += 1
+        self._racingCountersDict['evaluatedRows'] += numberOfEvaluatedRows
+        if isPartial:
+            self._racingCountersDict['aborts'] += 1
+            self._racingCountersDict['savedRows'] += numberOfRows - numberOfEvaluatedRows
+        else:
+            costLowerBound = cost
+        return RacingResult(cost, isPartial, costLowerBound, numberOfEvaluatedRows, numberOfRows)
+
+    def EvaluateStream(self, individual: Individual, variableNameToTypeDict: Dict[str, str], dataSource: Any,
+                       expectedReturnType: Any) -> Iterator[np.ndarray]:
+        """
+        Evaluates the individual over a streaming dataset (cf. data_sources.DataSource), yielding the array of results of each chunk.
+        Only the chunks being read ahead and the current chunk are held in memory.
+        """
+        for chunk in dataSource.Chunks():
+            yield self.EvaluateBatch(individual, variableNameToTypeDict, chunk, expectedReturnType)
+
+    def EvaluateCostStream(self, individual: Individual, variableNameToTypeDict: Dict[str, str], dataSource: Any,
+                           rowCostFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], np.ndarray], returnType: str,
+                           reduction: str = 'mean') -> float:
+        return self.EvaluatePopulationStream([individual], variableNameToTypeDict, dataSource, rowCostFunction, returnType, reduction)[0]
+
+    def EvaluatePopulationStream(self, individuals: List[Individual], variableNameToTypeDict: Dict[str, str], dataSource: Any,
+                                 rowCostFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], np.ndarray], returnType: str,
+                                 reduction: str = 'mean') -> List[float]:
+        """
+        Returns the cost of each individual over a streaming dataset (cf. data_sources.DataSource), in one pass over the data:
+        each chunk is read once and all the individuals are evaluated on it.
+        rowCostFunction(predictionsArr, chunk) returns the cost of each row of the chunk; the cost of an individual is their
+        mean or sum, according to reduction. The memory doesn't depend on the number of rows.
+        """
+        if reduction not in ['mean', 'sum']:
+            raise ValueError("Interpreter.EvaluatePopulationStream(): Unknown reduction '{}'".format(reduction))
+        costsSumsArr: np.ndarray = np.zeros(len(individuals))
+        numberOfRows: int = 0
+        for chunk in dataSource.Chunks():
+            for individualNdx, individual in enumerate(individuals):
+                rowCostsArr: np.ndarray = np.asarray(rowCostFunction(self.EvaluateBatch(individual, variableNameToTypeDict, chunk, returnType),
+                                                                     chunk), dtype=float)
+                with np.errstate(over='ignore', invalid='ignore'): # Diverging individuals have infinite costs
+                    costsSumsArr[individualNdx] += rowCostsArr.sum()
+            numberOfRows += NumberOfRows(chunk)
+        if reduction == 'mean':
+            if numberOfRows == 0:
+                raise ValueError("Interpreter.EvaluatePopulationStream(): The data source is empty")
+            costsSumsArr /= numberOfRows
+        return costsSumsArr.tolist()
+
+    def EvaluatePopulation(self, individuals: List[Individual], variableNameToTypeDict: Dict[str, str], dataset: Dict[str, np.ndarray],
+                           costFunction: Callable[[np.ndarray, Dict[str, np.ndarray]], float], returnType: str,
+                           workers: int = 1, seed: Optional[int] = None, chunkSize: Optional[int] = None,
+                           datasetId: Optional[Any] = None, deduplicate: bool = True) -> List[float]:
+        """
+        Returns the list of costFunction(EvaluateBatch(individual, ...), dataset), in the order of individuals.
+        dataset maps the variable names (and any other column used by the cost function, like the targets) to 1D arrays.
+        datasetId is passed to EvaluateBatch(), for the subtree cache.
+        If deduplicate is True, the structurally identical individuals are scored once.
+        With workers > 1, the individuals are evaluated by a pool of processes, in chunks of serialized genomes. The interpreter,
+        costFunction and the dataset description are sent once to each worker, and the dataset arrays are placed in shared memory.
+        The interpreter primitives and costFunction must therefore be picklable (e.g. module-level functions).
+        If seed is not None, the random generators are seeded at the start of each chunk from seed and the chunk index,
+        such that the results don't depend on the number of workers or on the scheduling.
+        """
+        individualNdxToUniqueNdxList: List[int] = list(range(len(individuals)))
+        uniqueIndividualsList: List[Individual] = individuals
+        if deduplicate:
+            rootHashToUniqueNdxDict: Dict[Tuple[int, int], int] = {}
+            uniqueIndividualsList = []
+            for individualNdx, individual in enumerate(individuals):
+                genome: Genome = self.Genome(individual)
+                rootKey: Tuple[int, int] = (genome.SubtreeHashes()[0], len(genome))
+                if rootKey not in rootHashToUniqueNdxDict:
+                    rootHashToUniqueNdxDict[rootKey] = len(uniqueIndividualsList)
+                    uniqueIndividualsList.append(individual)
+                individualNdxToUniqueNdxList[individualNdx] = rootHashToUniqueNdxDict[rootKey]
+
+        if chunkSize is None:
+            chunkSize = max(1, math.ceil(len(uniqueIndividualsList) / (4 * max(workers, 1))))
+        chunksList: List[List[Individual]] = [uniqueIndividualsList[startNdx: startNdx + chunkSize]
+                                              for startNdx in range(0, len(uniqueIndividualsList), chunkSize)]
+        costsList: List[float] = []
+        if workers <= 1:
+            for chunkNdx, chunk in enumerate(chunksList):
+                SeedRandomGenerators(seed, chunkNdx)
+                costsList.extend(costFunction(self.EvaluateBatch(individual, variableNameToTypeDict, dataset, returnType, datasetId), dataset)
+                                 for individual in chunk)
+            return [costsList[uniqueNdx] for uniqueNdx in individualNdxToUniqueNdxList]
+
+        import concurrent.futures # Deferred: only needed with worker processes
+        sharedDataset: SharedDataset = SharedDataset(dataset)
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_InitializePopulationWorker,
+                                                        initargs=(self, sharedDataset.Descriptors(), variableNameToTypeDict, returnType,
+                                                                  costFunction, seed, datasetId)) as executor:
+                serializedChunksList: List[List[bytes]] = [[self.Genome(individual).ToBytes() for individual in chunk] for chunk in chunksList]
+                for chunkCostsList in executor.map(_EvaluatePopulationChunk, range(len(serializedChunksList)), serializedChunksList):
+                    costsList.extend(chunkCostsList)
+        finally:
+            sharedDataset.Close(unlink=True)
+        return [costsList[uniqueNdx] for uniqueNdx in individualNdxToUniqueNdxList]
+
+    def FunctionDefinitionBatch(self, functionName: str, argumentsList: List[Any]) -> Any:
+        """
+        Vectorized version of FunctionDefinition(). The arguments are arrays or scalars, broadcastable together.
+        Calls the batch primitive registered for functionName, if any. Otherwise, the scalar primitive is called row by row.
+        """
+        batchPrimitive: Optional[Callable] = self.TablePrimitive(functionName, True)
+        if batchPrimitive is not None:
+            if functionName in self._lazyBatchPrimitiveFunctionNamesSet:
+                return batchPrimitive(*[functools.partial(RowsOfValue, argument) for argument in argumentsList])
+            return batchPrimitive(*argumentsList)
+        opcode: int = self._signatureTable._functionNameToOpcodeDict[functionName]
+        primitive: Callable = self._opcodeToPrimitiveList[opcode]
+        isLazy: bool = self._opcodeToPrimitiveIsLazyList[opcode]
+        broadcastArgumentsList: List[np.ndarray] = np.broadcast_arrays(*[np.asarray(argument) for argument in argumentsList])
+        if len(broadcastArgumentsList) == 0 or broadcastArgumentsList[0].ndim == 0:
+            rowsArgumentsList: List[Tuple[Any, ...]] = [tuple(argument.item() for argument in broadcastArgumentsList)]
+        else:
+            rowsArgumentsList = list(zip(*[argument.ravel().tolist() for argument in broadcastArgumentsList]))
+        if isLazy:
+            resultsList: List[Any] = [primitive(*[functools.partial(Identity, argument) for argument in rowArguments]) for rowArguments in rowsArgumentsList]
+        else:
+            resultsList = [primitive(*rowArguments) for rowArguments in rowsArgumentsList]
+        if len(broadcastArgumentsList) == 0 or broadcastArgumentsList[0].ndim == 0:
+            return resultsList[0]
+        return np.array(resultsList)
+
+    def Validate(self, individual: Individual, variableNameToTypeDict: Dict[str, str], returnType: str) -> None:
+        """
+        Checks the types of the whole individual once. Raises an exception if the individual is not type-correct.
+        Once validated for a given variableNameToTypeDict and returnType, the individual is evaluated without signature checks.
+        """
+        genome: Genome = self.Genome(individual)
+        signatureTable: SignatureTable = self._signatureTable
+        # In prefix order, the expected type of each node is on top of the stack
+        expectedTypesStack: List[str] = [returnType]
+        for nodeNdx in range(len(genome)):
+            if len(expectedTypesStack) == 0:
+                raise ValueError("Interpreter.Validate(): The genome has extra nodes after node {}".format(nodeNdx - 1))
+            expectedType: str = expectedTypesStack.pop()
+            opcode: int = genome._opcodesArr[nodeNdx]
+            if opcode == CONSTANT_OPCODE:
+                continue # Will be cast at evaluation
+            elif opcode == VARIABLE_OPCODE:
+                variableName: str = genome._variableNamesTuple[genome._operandsArr[nodeNdx]]
+                if variableName not in variableNameToTypeDict:
+                    raise KeyError("Interpreter.Validate(): The variable name '{}' is not in variableNameToTypeDict".format(variableName))
+                if variableNameToTypeDict[variableName] != expectedType:
+                    raise ValueError("Interpreter.Validate(): Expected parameter type {}, got variable '{}' of type {}".format(
+                        expectedType, variableName, variableNameToTypeDict[variableName]))
+            else: # Function
+                if signatureTable._returnTypesTuple[opcode] != expectedType:
+                    raise ValueError("Interpreter.Validate(): The expected type ({}) do not match the return type of function '{}' ({})".format(
+                        expectedType, signatureTable._functionNamesTuple[opcode], signatureTable._returnTypesTuple[opcode]))
+                expectedTypesStack.extend(reversed(signatureTable._parameterTypesTuple[opcode]))
+        if len(expectedTypesStack) > 0:
+            raise ValueError("Interpreter.Validate(): The genome is missing {} nodes".format(len(expectedTypesStack)))
+        individual._validatedTypingKeysSet.add(TypingKey(variableNameToTypeDict, returnType))
+
+    def Simplify(self, individual: Individual, variableNameToTypeDict: Dict[str, str], returnType: str) -> Tuple[Individual, int]:
+        """
+        Returns an equivalent individual, simplified bottom-up, and the number of removed nodes:
+        - the functions whose arguments are all constants are folded into a constant, computed with FunctionDefinition();
+        - the identity and annihilator rules declared in the domain (cf. FunctionSignature) are applied;
+        - the conditional functions with a constant condition, or with identical branches, are replaced with the selected branch.
+        """
+        if not individual.IsValidated(variableNameToTypeDict, returnType):
+            self.Validate(individual, variableNameToTypeDict, returnType)
+        genome: Genome = self.Genome(individual)
+        simplifiedNode, _ = self.SimplifyGenomeNode(genome, 0, returnType)
+        genomeBuffers: GenomeBuffers = GenomeBuffers()
+        nodesStack: List[Tuple] = [simplifiedNode]
+        while len(nodesStack) > 0:
+            node: Tuple = nodesStack.pop()
+            if node[0] == CONSTANT_OPCODE:
+                genomeBuffers.AppendConstant(node[1])
+            elif node[0] == VARIABLE_OPCODE:
+                genomeBuffers.AppendVariable(node[1])
+            else:
+                genomeBuffers.AppendFunction(node[0])
+                nodesStack.extend(reversed(node[1]))
+        simplifiedIndividual: Individual = Individual(genome=genomeBuffers.ToGenome(self._signatureTable, genome._variableNamesTuple))
+        simplifiedIndividual._validatedTypingKeysSet.add(TypingKey(variableNameToTypeDict, returnType)) # The rules preserve the types
+        return simplifiedIndividual, len(genome) - len(simplifiedIndividual._genome)
+
+    def SimplifyGenomeNode(self, genome: Genome, nodeNdx: int, expectedReturnType: str) -> Tuple[Tuple, int]:
+        """
+        Returns the simplified subtree starting at nodeNdx, as nested tuples: (CONSTANT_OPCODE, constant text), (VARIABLE_OPCODE, variable index)
+        or (opcode, tuple of the children), and the index following the subtree
+        """
+        opcode: int = genome._opcodesArr[nodeNdx]
+        if opcode == CONSTANT_OPCODE:
+            return (CONSTANT_OPCODE, genome.ConstantText(genome._operandsArr[nodeNdx])), nodeNdx + 1
+        elif opcode == VARIABLE_OPCODE:
+            return (VARIABLE_OPCODE, genome._operandsArr[nodeNdx]), nodeNdx + 1
+        functionName: str = self._signatureTable._functionNamesTuple[opcode]
+        signature: FunctionSignature = self._functionNameToSignatureDict[functionName]
+        childrenList: List[Tuple] = []
+        childNdx: int = nodeNdx + 1
+        for childExpectedReturnType in signature._parameterTypesList:
+            child, childNdx = self.SimplifyGenomeNode(genome, childNdx, childExpectedReturnType)
+            childrenList.append(child)
+
+        def IsConstant(child: Tuple, parameterNdx: int, constantText: Optional[str]) -> bool:
+            if child[0] != CONSTANT_OPCODE or constantText is None:
+                return False
+            parameterType: str = signature._parameterTypesList[parameterNdx]
+            return self.TypeConverter(parameterType, child[1]) == self.TypeConverter(parameterType, constantText)
+
+        if signature._isConditional:
+            if childrenList[0][0] == CONSTANT_OPCODE: # Dead branch
+                return (childrenList[1] if self.TypeConverter(signature._parameterTypesList[0], childrenList[0][1]) else childrenList[2]), childNdx
+            if childrenList[1] == childrenList[2]:
+                return childrenList[1], childNdx
+        if len(childrenList) > 0 and all(child[0] == CONSTANT_OPCODE for child in childrenList):
+            foldedConstantText: Optional[str] = self.FoldConstant(functionName, signature, childrenList)
+            if foldedConstantText is not None:
+                return (CONSTANT_OPCODE, foldedConstantText), childNdx
+        if len(childrenList) == 2:
+            if IsConstant(childrenList[0], 0, signature._leftAnnihilator):
+                return (CONSTANT_OPCODE, signature._leftAnnihilator), childNdx
+            if IsConstant(childrenList[1], 1, signature._rightAnnihilator):
+                return (CONSTANT_OPCODE, signature._rightAnnihilator), childNdx
+            if IsConstant(childrenList[0], 0, signature._leftIdentity) and signature._parameterTypesList[1] == signature._returnType:
+                return childrenList[1], childNdx
+            if IsConstant(childrenList[1], 1, signature._rightIdentity) and signature._parameterTypesList[0] == signature._returnType:
+                return childrenList[0], childNdx
+        return (opcode, tuple(childrenList)), childNdx
+
+    def FoldConstant(self, functionName: str, signature: FunctionSignature, childrenList: List[Tuple]) -> Optional[str]:
+        """
+        Returns the text of the constant result of the function applied to constant arguments, or None if the result can't be
+        represented exactly by a constant text
+        """
+        argumentsList: List[Any] = [self.TypeConverter(parameterType, child[1]) for parameterType, child in zip(signature._parameterTypesList, childrenList)]
+        try:
+            result: Any = self.FunctionDefinition(functionName, argumentsList)
+            resultText: str = str(float(result)) if signature._returnType == 'float' else str(result)
+            convertedResult: Any = self.TypeConverter(signature._returnType, resultText)
+        except Exception: # E.g. a primitive that raises, or a type that TypeConverter() doesn't handle: the subtree is kept
+            return None
+        if convertedResult != result and not (isinstance(result, float) and math.isnan(result) and math.isnan(convertedResult)):
+            return None
+        return resultText
+
+    def Compile(self, individual: Individual, variableNameToTypeDict: Dict[str, str], returnType: str) -> Callable[[Dict[str, Any]], Any]:
+        """
+        Converts the individual into nested closures, such that compiledFunction(variableNameToValueDict) gives the same
+        result as Evaluate(individual, variableNameToTypeDict, variableNameToValueDict, returnType).
+        The individual is validated and the constants are converted once, at compilation time.
+        The compiled function is cached in the individual, until its tree changes or the primitive tables of the interpreter
+        are rebuilt (cf. RegisterPrimitive(), EnableInstrumentation()). Only the functions compiled with the current tables of
+        the last interpreter are kept, such that the individual doesn't keep previous interpreters alive.
+        """
+        compilationKey: Tuple = (self._primitiveTablesVersion, TypingKey(variableNameToTypeDict, returnType))
+        compiledFunction: Optional[Callable[[Dict[str, Any]], Any]] = individual._compiledFunctionsDict.get(compilationKey)
+        if compiledFunction is None:
+            genome: Genome = self.Genome(individual)
+            if not individual.IsValidated(variableNameToTypeDict, returnType):
+                self.Validate(individual, variableNameToTypeDict, returnType)
+            compiledFunction = self.CompileGenomeNode(genome, 0, returnType)[0]
+            for staleKey in [key for key in individual._compiledFunctionsDict if key[0] != self._primitiveTablesVersion]:
+                del individual._compiledFunctionsDict[staleKey]
+            individual._compiledFunctionsDict[compilationKey] = compiledFunction
+        return compiledFunction
+
+    def CompileGenomeNode(self, genome: Genome, nodeNdx: int, expectedReturnType: Any) -> Tuple[Callable[[Dict[str, Any]], Any], int]:
+        """
+        Compiles the subtree of a validated genome starting at nodeNdx. Returns the closure and the index following the subtree.
+        """
+        opcode: int = genome._opcodesArr[nodeNdx]
+        if opcode == CONSTANT_OPCODE:
+            constantValue: Any = self.TypeConverter(expectedReturnType, genome.ConstantText(genome._operandsArr[nodeNdx]))
+            return (lambda variableNameToValueDict: constantValue), nodeNdx + 1
+        elif opcode == VARIABLE_OPCODE:
+            variableName: str = genome._variableNamesTuple[genome._operandsArr[nodeNdx]]
+
+            def variableFunction(variableNameToValueDict: Dict[str, Any]) -> Any:
+                try:
+                    return variableNameToValueDict[variableName]
+                except KeyError:
+                    raise KeyError("Interpreter.EvaluateGenomeNode(): Variable '{}' doesn't exist as a key in variableNameToValueDict".format(variableName))
+            return variableFunction, nodeNdx + 1
+        else: # Function
+            childrenFunctionsList: List[Callable[[Dict[str, Any]], Any]] = []
+            childNdx: int = nodeNdx + 1
+            for childExpectedReturnType in self._signatureTable._parameterTypesTuple[opcode]:
+                childFunction, childNdx = self.CompileGenomeNode(genome, childNdx, childExpectedReturnType)
+                childrenFunctionsList.append(childFunction)
+            primitive: Callable = self._opcodeToPrimitiveList[opcode]
+            if self._opcodeToPrimitiveIsLazyList[opcode]: # The primitive evaluates the arguments it needs
+                return (lambda variableNameToValueDict: primitive(*[functools.partial(childFunction, variableNameToValueDict)
+                                                                    for childFunction in childrenFunctionsList])), childNdx
+            # Specialize the most common arities to avoid building the arguments with a loop
+            if len(childrenFunctionsList) == 1:
+                child0 = childrenFunctionsList[0]
+                return (lambda variableNameToValueDict: primitive(child0(variableNameToValueDict))), childNdx
+            elif len(childrenFunctionsList) == 2:
+                child0, child1 = childrenFunctionsList
+                return (lambda variableNameToValueDict: primitive(child0(variableNameToValueDict),
+                                                                  child1(variableNameToValueDict))), childNdx
+            elif len(childrenFunctionsList) == 3:
+                child0, child1, child2 = childrenFunctionsList
+                return (lambda variableNameToValueDict: primitive(child0(variableNameToValueDict),
+                                                                  child1(variableNameToValueDict),
+                                                                  child2(variableNameToValueDict))), childNdx
+            return (lambda variableNameToValueDict: primitive(*[childFunction(variableNameToValueDict)
+                                                                for childFunction in childrenFunctionsList])), childNdx
+
     def FunctionDefinition(self, functionName: str, argumentsList: List[Any]) -> Any:
-        pass
+        """
+        Calls the primitive registered for functionName. Derived classes that don't register primitives must override this method.
+        The arguments are the evaluated values, including for a lazy primitive.
+        """
+        primitive: Optional[Callable] = self._functionNameToPrimitiveDict.get(functionName)
+        if primitive is None:
+            raise NotImplementedError("Interpreter.FunctionDefinition(): No primitive is registered for function '{}'".format(functionName))
+        if functionName in self._lazyPrimitiveFunctionNamesSet:
+            return primitive(*[functools.partial(Identity, argument) for argument in argumentsList])
+        return primitive(*argumentsList)
 
     @abc.abstractmethod
     def CreateConstant(self, returnType: str, parametersList: Optional[ List[Any] ] ) -> str:
@@ -196,12 +2046,12 @@ class Interpreter(abc.ABC):
         if expectedReturnType != expectedSignature._returnType:
             raise ValueError("Interpreter.CheckIfSignatureMatches(): The expected return type ({}) do not match the function signature return type ({})".format(expectedReturnType, expectedSignature._returnType))
 
-    def FunctionsWhoseReturnTypeIs(self, returnType: str):
-        functionsNamesList: List[str] = []
-        for functionName, signature in self._functionNameToSignatureDict.items():
-            if signature._returnType == returnType:
-                functionsNamesList.append(functionName)
-        return functionsNamesList
+    def FunctionsWhoseReturnTypeIs(self, returnType: str) -> List[str]:
+        signatureTable: SignatureTable = self._signatureTable
+        returnTypeId: Optional[int] = signatureTable._typeNameToIdDict.get(returnType)
+        if returnTypeId is None:
+            return []
+        return [signatureTable._functionNamesTuple[opcode] for opcode in signatureTable._returnTypeIdToOpcodesTuple[returnTypeId]]
 
     def CreateElement(self, returnType: str,
                       level: int,
@@ -210,56 +2060,11 @@ class Interpreter(abc.ABC):
                       functionNameToWeightDict: Dict[str, float],
                       constantCreationParametersList: List[Any],
                       variableNameToTypeDict: Dict[str, str] ) -> ET.Element:
-        # Is it a function?
-        functionProbability: float = 0.0
-        if level in levelToFunctionProbabilityDict:
-            functionProbability = levelToFunctionProbabilityDict[level]
-        if random.random() < functionProbability: # It is a function
-            functionNamesList = self.FunctionsWhoseReturnTypeIs(returnType)
-            # Normalize the probabilities
-            functionNameToProbabilityDict: Dict[str, float] = {}
-            weightsSum: float = 0.
-            for functionName in functionNamesList:
-                weightsSum += max(functionNameToWeightDict[functionName], 0.)
-            if weightsSum == 0:
-                raise ValueError("Interpreter.CreateElement(): returnType = {}; level = {}; The sum of weights is 0".format(returnType, level))
-            for functionName in functionNamesList:
-                functionNameToProbabilityDict[functionName] = max(functionNameToWeightDict[functionName], 0.0) / weightsSum
-            randomNbr: float = random.random()
-            runningSum: float = 0.0
-            theRandomNbrIsReached: bool = False
-            for functionName, probability in functionNameToProbabilityDict.items():
-                runningSum += probability
-                if runningSum >= randomNbr and not theRandomNbrIsReached:
-                    element = ET.Element(functionName)
-                    signature = self._functionNameToSignatureDict[functionName]
-                    for parameterType in signature._parameterTypesList:
-                        childElement = self.CreateElement(parameterType, level + 1, levelToFunctionProbabilityDict, proportionOfConstants,
-                                                          functionNameToWeightDict, constantCreationParametersList,
-                                                          variableNameToTypeDict)
-                        element.append(childElement)
-                    theRandomNbrIsReached = True
-            return element
-        else: # A variable or a constant
-            # Try a variable
-            itMustBeAConstant = False
-            candidateVariableNamesList = []
-            for variableName, type in variableNameToTypeDict.items():
-                if type == returnType:
-                    candidateVariableNamesList.append(variableName)
-            if len(candidateVariableNamesList) == 0:
-                itMustBeAConstant = True
-
-            if itMustBeAConstant or random.random() < proportionOfConstants: # A constant
-                element = ET.Element('constant')
-                constantValueStr = self.CreateConstant(returnType, constantCreationParametersList)
-                element.text = constantValueStr
-                return element
-            else: # A variable
-                element = ET.Element('variable')
-                chosenNdx: int = random.randint(0, len(candidateVariableNamesList) - 1)
-                element.text = candidateVariableNamesList[chosenNdx]
-                return element
+        generator: IndividualGenerator = IndividualGenerator(self, returnType, levelToFunctionProbabilityDict, proportionOfConstants,
+                                                             functionNameToWeightDict, constantCreationParametersList, variableNameToTypeDict)
+        genomeBuffers: GenomeBuffers = GenomeBuffers()
+        generator.AppendNodes(returnType, level, genomeBuffers)
+        return list(genomeBuffers.ToGenome(self._signatureTable, generator._variableNamesTuple).ToElementTree().getroot())[0]
 
     def CreateIndividual(self, returnType: str,
                         levelToFunctionProbabilityDict: Dict[int, float],
@@ -267,99 +2072,368 @@ class Interpreter(abc.ABC):
                         functionNameToWeightDict: Dict[str, float],
                         constantCreationParametersList: List[Any],
                         variableNameToTypeDict: Dict[str, str] ) -> Individual:
-        root: ET.Element = ET.Element('individual')
-        headElm: ET.Element = self.CreateElement(
-            returnType,
-            0,
-            levelToFunctionProbabilityDict,
-            proportionOfConstants,
-            functionNameToWeightDict,
-            constantCreationParametersList,
-            variableNameToTypeDict
-        )
-        root.append(headElm)
-        individual: Individual = Individual(ET.ElementTree(root))
+        generator: IndividualGenerator = IndividualGenerator(self, returnType, levelToFunctionProbabilityDict, proportionOfConstants,
+                                                             functionNameToWeightDict, constantCreationParametersList, variableNameToTypeDict)
+        return generator.CreateIndividual()
+
+
+class IndividualGenerator():
+    """
+    Creates individuals from a grammar index precomputed once: for each return type, the candidate functions with their
+    cumulative probabilities, and the candidate variables.
+    The 'grow' method makes the same random choices as Interpreter.CreateElement().
+    """
+    def __init__(self, interpreter: Interpreter,
+                 returnType: str,
+                 levelToFunctionProbabilityDict: Dict[int, float],
+                 proportionOfConstants: float,
+                 functionNameToWeightDict: Dict[str, float],
+                 constantCreationParametersList: List[Any],
+                 variableNameToTypeDict: Dict[str, str]) -> None:
+        self._interpreter: Interpreter = interpreter
+        self._returnType: str = returnType
+        self._levelToFunctionProbabilityDict: Dict[int, float] = levelToFunctionProbabilityDict
+        self._proportionOfConstants: float = proportionOfConstants
+        self._constantCreationParametersList: List[Any] = constantCreationParametersList
+        self._variableNameToTypeDict: Dict[str, str] = variableNameToTypeDict
+        signatureTable: SignatureTable = interpreter._signatureTable
+
+        # Candidate functions and cumulative probabilities, for bisect
+        self._returnTypeToOpcodesDict: Dict[str, List[int]] = {}
+        self._returnTypeToCumulativeProbabilitiesDict: Dict[str, List[float]] = {}
+        self._returnTypeToErrorDict: Dict[str, Exception] = {} # Raised only if a function of this type must be created
+        for opcode, functionReturnType in enumerate(signatureTable._returnTypesTuple):
+            self._returnTypeToOpcodesDict.setdefault(functionReturnType, []).append(opcode)
+        for functionReturnType, opcodesList in self._returnTypeToOpcodesDict.items():
+            missingFunctionNamesList: List[str] = [signatureTable._functionNamesTuple[opcode] for opcode in opcodesList
+                                                   if signatureTable._functionNamesTuple[opcode] not in functionNameToWeightDict]
+            if len(missingFunctionNamesList) > 0:
+                self._returnTypeToErrorDict[functionReturnType] = KeyError(
+                    "IndividualGenerator.__init__(): The function '{}' is not in functionNameToWeightDict".format(missingFunctionNamesList[0]))
+                continue
+            weightsList: List[float] = [max(functionNameToWeightDict[signatureTable._functionNamesTuple[opcode]], 0.) for opcode in opcodesList]
+            weightsSum: float = 0.
+            for weight in weightsList:
+                weightsSum += weight
+            if weightsSum == 0:
+                self._returnTypeToErrorDict[functionReturnType] = ValueError(
+                    "IndividualGenerator.__init__(): returnType = {}; The sum of weights is 0".format(functionReturnType))
+                continue
+            cumulativeProbabilitiesList: List[float] = []
+            runningSum: float = 0.0
+            for weight in weightsList:
+                runningSum += weight / weightsSum
+                cumulativeProbabilitiesList.append(runningSum)
+            self._returnTypeToCumulativeProbabilitiesDict[functionReturnType] = cumulativeProbabilitiesList
+
+        # Candidate variables, as indices in the variable names tuple shared by all the created genomes
+        self._variableNamesTuple: Tuple[str, ...] = tuple(variableNameToTypeDict)
+        self._returnTypeToCandidateVariableNdxsDict: Dict[str, List[int]] = {}
+        for variableNdx, variableName in enumerate(self._variableNamesTuple):
+            self._returnTypeToCandidateVariableNdxsDict.setdefault(variableNameToTypeDict[variableName], []).append(variableNdx)
+
+    def ChooseFunction(self, returnType: str) -> int:
+        if returnType in self._returnTypeToErrorDict:
+            raise self._returnTypeToErrorDict[returnType]
+        if returnType not in self._returnTypeToCumulativeProbabilitiesDict:
+            raise ValueError("IndividualGenerator.ChooseFunction(): There is no function whose return type is {}".format(returnType))
+        cumulativeProbabilitiesList: List[float] = self._returnTypeToCumulativeProbabilitiesDict[returnType]
+        chosenNdx: int = bisect.bisect_left(cumulativeProbabilitiesList, random.random())
+        if chosenNdx == len(cumulativeProbabilitiesList): # Rounding errors in the cumulative probabilities
+            chosenNdx -= 1
+        return self._returnTypeToOpcodesDict[returnType][chosenNdx]
+
+    def AppendNodes(self, returnType: str, level: int, genomeBuffers: GenomeBuffers, maximumDepth: Optional[int] = None,
+                    full: bool = False) -> None:
+        """
+        Appends a random subtree in prefix order. With full = True, functions are created down to maximumDepth, where the leaves are.
+        Otherwise, a function is created with the probability levelToFunctionProbabilityDict[level], and never at maximumDepth.
+        """
+        if full:
+            isAFunction: bool = level < maximumDepth and returnType in self._returnTypeToOpcodesDict
+        else:
+            isAFunction = random.random() < self._levelToFunctionProbabilityDict.get(level, 0.0) and \
+                          (maximumDepth is None or level < maximumDepth)
+        if isAFunction:
+            opcode: int = self.ChooseFunction(returnType)
+            genomeBuffers.AppendFunction(opcode)
+            for parameterType in self._interpreter._signatureTable._parameterTypesTuple[opcode]:
+                self.AppendNodes(parameterType, level + 1, genomeBuffers, maximumDepth, full)
+        else: # A variable or a constant
+            candidateVariableNdxsList: Optional[List[int]] = self._returnTypeToCandidateVariableNdxsDict.get(returnType)
+            if candidateVariableNdxsList is None or random.random() < self._proportionOfConstants: # A constant
+                genomeBuffers.AppendConstant(self._interpreter.CreateConstant(returnType, self._constantCreationParametersList))
+            else: # A variable
+                genomeBuffers.AppendVariable(candidateVariableNdxsList[random.randint(0, len(candidateVariableNdxsList) - 1)])
+
+    def CreateIndividual(self, maximumDepth: Optional[int] = None, full: bool = False) -> Individual:
+        genomeBuffers: GenomeBuffers = GenomeBuffers()
+        self.AppendNodes(self._returnType, 0, genomeBuffers, maximumDepth, full)
+        individual: Individual = Individual(genome=genomeBuffers.ToGenome(self._interpreter._signatureTable, self._variableNamesTuple))
+        # The created nodes match the signatures by construction
+        individual._validatedTypingKeysSet.add(TypingKey(self._variableNameToTypeDict, self._returnType))
         return individual
 
+    def Mutate(self, individual: Individual, nodeNdx: Optional[int] = None, maximumDepth: Optional[int] = None) -> int:
+        """
+        Subtree mutation, in place: replaces the subtree starting at nodeNdx (a random node if None) with a random subtree
+        of the same type, grown from the depth of the node. Returns nodeNdx.
+        The kept node outputs of the individual are preserved outside of the path from the node to the root (cf. Individual.ReplaceSubtree()).
+        """
+        genome: Genome = self._interpreter.Genome(individual)
+        if nodeNdx is None:
+            nodeNdx = random.randrange(len(genome))
+        pathList: List[Tuple[int, int]] = genome.Path(nodeNdx)
+        expectedReturnType: str = self._returnType if len(pathList) == 0 else genome.SubtreeType(nodeNdx, pathList)
+        genomeBuffers: GenomeBuffers = GenomeBuffers()
+        self.AppendNodes(expectedReturnType, len(pathList), genomeBuffers, maximumDepth)
+        typingKey: Tuple = TypingKey(self._variableNameToTypeDict, self._returnType)
+        wasValidated: bool = typingKey in individual._validatedTypingKeysSet
+        individual.ReplaceSubtree(nodeNdx, Individual(genome=genomeBuffers.ToGenome(self._interpreter._signatureTable, self._variableNamesTuple)))
+        if wasValidated: # The new subtree matches the signatures by construction
+            individual._validatedTypingKeysSet.add(typingKey)
+        return nodeNdx
+
+    def CreateIndividualOfPopulation(self, individualNdx: int, method: str, minimumDepth: int, maximumDepth: Optional[int]) -> Individual:
+        if method == 'grow':
+            return self.CreateIndividual(maximumDepth)
+        elif method == 'full':
+            return self.CreateIndividual(maximumDepth, full=True)
+        elif method == 'ramped': # Ramped half-and-half: cycle through the depths, alternating full and grow
+            depth: int = minimumDepth + (individualNdx // 2) % (maximumDepth - minimumDepth + 1)
+            return self.CreateIndividual(depth, full=(individualNdx % 2 == 0))
+        raise ValueError("IndividualGenerator.CreateIndividualOfPopulation(): Unknown method '{}'".format(method))
+
+    def CreatePopulation(self, numberOfIndividuals: int, method: str = 'grow', seed: Optional[int] = None, workers: int = 1,
+                         maximumDepth: Optional[int] = None, minimumDepth: int = 1, chunkSize: int = 1000) -> List[Individual]:
+        """
+        Creates numberOfIndividuals individuals with the method 'grow', 'full' or 'ramped' (ramped half-and-half).
+        'full' and 'ramped' require maximumDepth; 'grow' uses levelToFunctionProbabilityDict, limited to maximumDepth if specified.
+        'ramped' cycles through the depths from minimumDepth to maximumDepth.
+        The individuals are created in chunks of chunkSize, each chunk with its own random stream derived from seed and the
+        chunk index, such that the population doesn't depend on the number of workers.
+        With workers > 1, the chunks are created by a pool of processes and sent back as serialized genomes.
+        """
+        if method in ['full', 'ramped'] and maximumDepth is None:
+            raise ValueError("IndividualGenerator.CreatePopulation(): The method '{}' requires maximumDepth".format(method))
+        if method not in ['grow', 'full', 'ramped']:
+            raise ValueError("IndividualGenerator.CreatePopulation(): Unknown method '{}'".format(method))
+        if minimumDepth < 0 or (maximumDepth is not None and maximumDepth < 0):
+            raise ValueError("IndividualGenerator.CreatePopulation(): minimumDepth ({}) and maximumDepth ({}) must be non-negative".format(
+                minimumDepth, maximumDepth))
+        if method == 'ramped' and minimumDepth > maximumDepth:
+            raise ValueError("IndividualGenerator.CreatePopulation(): The method 'ramped' requires minimumDepth ({}) <= maximumDepth ({})".format(
+                minimumDepth, maximumDepth))
+        if seed is None and workers > 1: # Otherwise, the forked workers would share the same random state
+            seed = random.getrandbits(63)
+        chunkStartNdxsList: List[int] = list(range(0, numberOfIndividuals, chunkSize))
+        chunkSizesList: List[int] = [min(chunkSize, numberOfIndividuals - startNdx) for startNdx in chunkStartNdxsList]
+        population: List[Individual] = []
+        if workers <= 1:
+            for chunkNdx, (startNdx, size) in enumerate(zip(chunkStartNdxsList, chunkSizesList)):
+                SeedRandomGenerators(seed, chunkNdx)
+                population.extend(self.CreateIndividualOfPopulation(startNdx + offset, method, minimumDepth, maximumDepth)
+                                  for offset in range(size))
+            return population
 
+        import concurrent.futures # Deferred: only needed with worker processes
+        typingKey: Tuple = TypingKey(self._variableNameToTypeDict, self._returnType)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_InitializeGeneratorWorker,
+                                                    initargs=(self, method, minimumDepth, maximumDepth, seed)) as executor:
+            for genomeBytesList in executor.map(_CreatePopulationChunk, range(len(chunkStartNdxsList)), chunkStartNdxsList, chunkSizesList):
+                for genomeBytes in genomeBytesList:
+                    genome: Genome = Genome.FromBytes(self._interpreter._signatureTable, genomeBytes)
+                    genome._variableNamesTuple = self._variableNamesTuple # Share the tuple among the population
+                    individual: Individual = Individual(genome=genome)
+                    individual._validatedTypingKeysSet.add(typingKey)
+                    population.append(individual)
+        return population
 
+_generatorWorkerState: Dict[str, Any] = {}
 
+def _InitializeGeneratorWorker(generator: IndividualGenerator, method: str, minimumDepth: int, maximumDepth: Optional[int],
+                               seed: Optional[int]) -> None:
+    _generatorWorkerState['generator'] = generator
+    _generatorWorkerState['method'] = method
+    _generatorWorkerState['minimumDepth'] = minimumDepth
+    _generatorWorkerState['maximumDepth'] = maximumDepth
+    _generatorWorkerState['seed'] = seed
 
+def _CreatePopulationChunk(chunkNdx: int, startNdx: int, size: int) -> List[bytes]:
+    generator: IndividualGenerator = _generatorWorkerState['generator']
+    SeedRandomGenerators(_generatorWorkerState['seed'], chunkNdx)
+    return [generator._interpreter.Genome(generator.CreateIndividualOfPopulation(
+                startNdx + offset, _generatorWorkerState['method'], _generatorWorkerState['minimumDepth'], _generatorWorkerState['maximumDepth']
+            )).ToBytes() for offset in range(size)]
+
+
+# Guards of the arithmetics primitives (cf. Primitive()): the arguments for which a default result is returned
+def DivisorIsZero(result: Any, argument1: Any, argument2: Any) -> Any:
+    return np.asarray(argument2, dtype=float) == 0
+
+def LogArgumentIsNotPositive(result: Any, argument1: Any) -> Any:
+    return np.asarray(argument1, dtype=float) <= 0.0
+
+def ExpArgumentIsTooLarge(result: Any, argument1: Any) -> Any:
+    return np.asarray(argument1, dtype=float) >= 20.0
+
+def PowFailures(floatArr1: np.ndarray, floatArr2: np.ndarray, powerArr: np.ndarray) -> np.ndarray:
+    # math.pow() raises an exception when finite arguments give a non-finite result: a domain error (e.g. 0.0 ** -1.0 or
+    # (-8.0) ** (1/3)) or an overflow. An underflow to 0.0 is a legitimate result.
+    return ~np.isfinite(powerArr) & np.isfinite(floatArr1) & np.isfinite(floatArr2)
+
+def PowResultIsDefault(result: Any, argument1: Any, argument2: Any) -> Any:
+    floatArr1: np.ndarray = np.asarray(argument1, dtype=float)
+    floatArr2: np.ndarray = np.asarray(argument2, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return PowFailures(floatArr1, floatArr2, np.power(floatArr1, floatArr2))
 
 
 class ArithmeticsInterpreter(Interpreter):
 
-    def FunctionDefinition(self, functionName: str, argumentsList: List[ Union[float, bool] ]) -> Union[float, bool]:
-        if functionName == "addition_float":
-            floatArg1: float = float(argumentsList[0])
-            floatArg2: float = float(argumentsList[1])
-            return floatArg1 + floatArg2
-        elif functionName == "subtraction_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            return floatArg1 - floatArg2
-        elif functionName == "multiplication_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            return floatArg1 * floatArg2
-        elif functionName == "division_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            if floatArg2 == 0: #
-                return 0.0
-            return floatArg1 / floatArg2
-        elif functionName == "greaterThan_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            return floatArg1 > floatArg2
-        elif functionName == "greaterThanOrEqual_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            return floatArg1 >= floatArg2
-        elif functionName == "lessThan_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            return floatArg1 < floatArg2
-        elif functionName == "lessThanOrEqual_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            return floatArg1 <= floatArg2
-        elif functionName == "almostEqual_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            floatArg3: float = abs( float(argumentsList[2]) )
-            return abs(floatArg1 - floatArg2) <= floatArg3
-        elif functionName == "inverse_bool":
-            boolArg1: bool = bool(argumentsList[0])
-            return not boolArg1
-        elif functionName == "log":
-            floatArg1 = float(argumentsList[0])
-            if floatArg1 <= 0.0:
-                return 0.0
-            return math.log(floatArg1)
-        elif functionName == "exp":
-            floatArg1 = float(argumentsList[0])
-            if floatArg1 >= 20.0:
-                return 0.0
-            return math.exp(floatArg1)
-        elif functionName == "pow_float":
-            floatArg1 = float(argumentsList[0])
-            floatArg2 = float(argumentsList[1])
-            try:
-                result: float = math.pow(floatArg1, floatArg2)
-                return result
-            except:
-                return 0.0
-        elif functionName == 'if_float':
-            boolArg1 = bool(argumentsList[0])
-            floatArg1 = float(argumentsList[1])
-            floatArg2 = float(argumentsList[2])
-            if boolArg1:
-                return floatArg1
-            else:
-                return floatArg2
+    @Primitive("addition_float")
+    def AdditionFloat(self, argument1: float, argument2: float) -> float:
+        return float(argument1) + float(argument2)
+
+    @Primitive("subtraction_float")
+    def SubtractionFloat(self, argument1: float, argument2: float) -> float:
+        return float(argument1) - float(argument2)
+
+    @Primitive("multiplication_float")
+    def MultiplicationFloat(self, argument1: float, argument2: float) -> float:
+        return float(argument1) * float(argument2)
+
+    @Primitive("division_float", guard=DivisorIsZero)
+    def DivisionFloat(self, argument1: float, argument2: float) -> float:
+        floatArg2: float = float(argument2)
+        if floatArg2 == 0:
+            return 0.0
+        return float(argument1) / floatArg2
+
+    @Primitive("greaterThan_float")
+    def GreaterThanFloat(self, argument1: float, argument2: float) -> bool:
+        return float(argument1) > float(argument2)
+
+    @Primitive("greaterThanOrEqual_float")
+    def GreaterThanOrEqualFloat(self, argument1: float, argument2: float) -> bool:
+        return float(argument1) >= float(argument2)
+
+    @Primitive("lessThan_float")
+    def LessThanFloat(self, argument1: float, argument2: float) -> bool:
+        return float(argument1) < float(argument2)
+
+    @Primitive("lessThanOrEqual_float")
+    def LessThanOrEqualFloat(self, argument1: float, argument2: float) -> bool:
+        return float(argument1) <= float(argument2)
+
+    @Primitive("almostEqual_float")
+    def AlmostEqualFloat(self, argument1: float, argument2: float, tolerance: float) -> bool:
+        return abs(float(argument1) - float(argument2)) <= abs(float(tolerance))
+
+    @Primitive("inverse_bool")
+    def InverseBool(self, argument1: bool) -> bool:
+        return not argument1
+
+    @Primitive("log", guard=LogArgumentIsNotPositive)
+    def Log(self, argument1: float) -> float:
+        floatArg1: float = float(argument1)
+        if floatArg1 <= 0.0:
+            return 0.0
+        return math.log(floatArg1)
+
+    @Primitive("exp", guard=ExpArgumentIsTooLarge)
+    def Exp(self, argument1: float) -> float:
+        floatArg1: float = float(argument1)
+        if floatArg1 >= 20.0:
+            return 0.0
+        return math.exp(floatArg1)
+
+    @Primitive("pow_float", guard=PowResultIsDefault)
+    def PowFloat(self, argument1: float, argument2: float) -> float:
+        try:
+            return math.pow(argument1, argument2)
+        except:
+            return 0.0
+
+    @Primitive("if_float", lazy=True)
+    def IfFloat(self, condition: Callable[[], bool], argument1: Callable[[], float], argument2: Callable[[], float]) -> float:
+        # Lazy: only the selected branch is evaluated
+        if condition():
+            return float(argument1())
         else:
-            raise NotImplementedError("ArithmeticsInterpreter.FunctionDefinition(): Not implemented function '{}'".format(functionName))
+            return float(argument2())
+
+    @Primitive("addition_float", batch=True)
+    def AdditionFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) + np.asarray(argument2, dtype=float)
+
+    @Primitive("subtraction_float", batch=True)
+    def SubtractionFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) - np.asarray(argument2, dtype=float)
+
+    @Primitive("multiplication_float", batch=True)
+    def MultiplicationFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) * np.asarray(argument2, dtype=float)
+
+    @Primitive("division_float", batch=True, guard=DivisorIsZero)
+    def DivisionFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        floatArr2: np.ndarray = np.asarray(argument2, dtype=float)
+        return np.where(floatArr2 == 0, 0.0, np.asarray(argument1, dtype=float) / floatArr2)
+
+    @Primitive("greaterThan_float", batch=True)
+    def GreaterThanFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) > np.asarray(argument2, dtype=float)
+
+    @Primitive("greaterThanOrEqual_float", batch=True)
+    def GreaterThanOrEqualFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) >= np.asarray(argument2, dtype=float)
+
+    @Primitive("lessThan_float", batch=True)
+    def LessThanFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) < np.asarray(argument2, dtype=float)
+
+    @Primitive("lessThanOrEqual_float", batch=True)
+    def LessThanOrEqualFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        return np.asarray(argument1, dtype=float) <= np.asarray(argument2, dtype=float)
+
+    @Primitive("almostEqual_float", batch=True)
+    def AlmostEqualFloatBatch(self, argument1: Any, argument2: Any, tolerance: Any) -> np.ndarray:
+        return np.abs(np.asarray(argument1, dtype=float) - np.asarray(argument2, dtype=float)) <= np.abs(np.asarray(tolerance, dtype=float))
+
+    @Primitive("inverse_bool", batch=True)
+    def InverseBoolBatch(self, argument1: Any) -> np.ndarray:
+        return np.logical_not(argument1)
+
+    @Primitive("log", batch=True, guard=LogArgumentIsNotPositive)
+    def LogBatch(self, argument1: Any) -> np.ndarray:
+        floatArr1: np.ndarray = np.asarray(argument1, dtype=float)
+        return np.where(floatArr1 <= 0.0, 0.0, np.log(floatArr1))
+
+    @Primitive("exp", batch=True, guard=ExpArgumentIsTooLarge)
+    def ExpBatch(self, argument1: Any) -> np.ndarray:
+        floatArr1: np.ndarray = np.asarray(argument1, dtype=float)
+        return np.where(floatArr1 >= 20.0, 0.0, np.exp(floatArr1))
+
+    @Primitive("pow_float", batch=True, guard=PowResultIsDefault)
+    def PowFloatBatch(self, argument1: Any, argument2: Any) -> np.ndarray:
+        floatArr1: np.ndarray = np.asarray(argument1, dtype=float)
+        floatArr2: np.ndarray = np.asarray(argument2, dtype=float)
+        resultArr: np.ndarray = np.power(floatArr1, floatArr2)
+        return np.where(PowFailures(floatArr1, floatArr2, resultArr), 0.0, resultArr)
+
+    @Primitive("if_float", batch=True, lazy=True)
+    def IfFloatBatch(self, condition: Callable[[Optional[np.ndarray]], Any], argument1: Callable[[Optional[np.ndarray]], Any],
+                     argument2: Callable[[Optional[np.ndarray]], Any]) -> np.ndarray:
+        # Lazy: each branch is evaluated only on the rows where it is selected
+        conditionArr: np.ndarray = np.asarray(condition(None), dtype=bool)
+        if conditionArr.ndim == 0:
+            return np.asarray(argument1(None) if conditionArr else argument2(None), dtype=float)
+        resultArr: np.ndarray = np.empty(conditionArr.shape, dtype=float)
+        if conditionArr.any():
+            resultArr[conditionArr] = argument1(conditionArr)
+        if not conditionArr.all():
+            resultArr[~conditionArr] = argument2(~conditionArr)
+        return resultArr
 
     def CreateConstant(self, returnType: str, parametersList: Optional[List[Union[float, bool] ]]) -> str:
         if returnType == 'float':
@@ -396,6 +2470,8 @@ if __name__ == '__main__':
 
     output: bool = interpreter.Evaluate(individual, variableNameToTypeDict, variableNameToValueDict, 'bool')
     print ("output = {}".format(output))
+    compiledFunction = interpreter.Compile(individual, variableNameToTypeDict, 'bool')
+    print ("compiledFunction(variableNameToValueDict) = {}".format(compiledFunction(variableNameToValueDict)))
 
     candidateFunctionsList: List[str] = interpreter.FunctionsWhoseReturnTypeIs('bool')
     print ("candidateFunctionsList = {}".format(candidateFunctionsList))
@@ -0,0 +1,216 @@
+import logging
+import os
+import mmap
+import struct
+import json
+import array
+import sys
+from typing import Dict, List, Any, Optional, Iterator
+import genetic_programming
+
+# File layout:
+#   <filepath>: ARCHIVE_MAGIC, uint32 header length, JSON header, then one record per individual: uint32 length, Genome.ToBytes()
+#   <filepath>.idx: uint64 offset of each record in <filepath>
+ARCHIVE_MAGIC: bytes = b'GPARCH01'
+LENGTH_STRUCT: struct.Struct = struct.Struct('<I')
+OFFSET_TYPECODE: str = 'Q'
+
+class PopulationArchive():
+    """
+    Single-file archive of a population, with an offset index for random access through mmap.
+    mode 'r' opens an existing archive, 'w' creates a new one, 'a' appends to an existing one.
+    The individuals are deserialized lazily, when accessed.
+    """
+    def __init__(self, filepath: str, interpreter: genetic_programming.Interpreter, mode: str = 'r') -> None:
+        if mode not in ['r', 'w', 'a']:
+            raise ValueError("PopulationArchive.__init__(): Unknown mode '{}'".format(mode))
+        self._filepath: str = filepath
+        self._indexFilepath: str = filepath + '.idx'
+        self._interpreter: genetic_programming.Interpreter = interpreter
+        self._mode: str = mode
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsetsArr: array.array = array.array(OFFSET_TYPECODE)
+        self._opcodeRemappingList: Optional[List[int]] = None
+
+        if mode == 'w':
+            headerBytes: bytes = json.dumps({'functionNames': list(interpreter._signatureTable._functionNamesTuple)}).encode('utf-8')
+            with open(filepath, 'wb') as dataFile:
+                dataFile.write(ARCHIVE_MAGIC + LENGTH_STRUCT.pack(len(headerBytes)) + headerBytes)
+            self._dataEnd: int = len(ARCHIVE_MAGIC) + LENGTH_STRUCT.size + len(headerBytes)
+        else:
+            self.ReadHeaderAndIndex()
+
+        self._dataFile = None
+        self._indexFile = None
+        if mode in ['w', 'a']:
+            self._dataFile = open(filepath, 'r+b')
+            self._dataFile.truncate(self._dataEnd) # Drops a partially written record, if any
+            self._dataFile.seek(self._dataEnd)
+            # Rewrite the index, which may have been recovered by ReadHeaderAndIndex()
+            self._indexFile = open(self._indexFilepath, 'wb')
+            self._indexFile.write(self.LittleEndianOffsets().tobytes())
+
+    def ReadHeaderAndIndex(self) -> None:
+        with open(self._filepath, 'rb') as dataFile:
+            dataMmap: mmap.mmap = mmap.mmap(dataFile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if dataMmap[: len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+                raise ValueError("PopulationArchive.ReadHeaderAndIndex(): The file {} is not a population archive".format(self._filepath))
+            headerLength: int = LENGTH_STRUCT.unpack_from(dataMmap, len(ARCHIVE_MAGIC))[0]
+            headerStart: int = len(ARCHIVE_MAGIC) + LENGTH_STRUCT.size
+            header: Dict[str, Any] = json.loads(bytes(dataMmap[headerStart: headerStart + headerLength]).decode('utf-8'))
+            archiveFunctionNamesList: List[str] = header['functionNames']
+            if tuple(archiveFunctionNamesList) != self._interpreter._signatureTable._functionNamesTuple:
+                functionNameToOpcodeDict: Dict[str, int] = self._interpreter._signatureTable._functionNameToOpcodeDict
+                for functionName in archiveFunctionNamesList:
+                    if functionName not in functionNameToOpcodeDict:
+                        raise KeyError("PopulationArchive.ReadHeaderAndIndex(): The archived function '{}' is not in the interpreter domain".format(
+                            functionName))
+                self._opcodeRemappingList = [functionNameToOpcodeDict[functionName] for functionName in archiveFunctionNamesList]
+
+            if os.path.exists(self._indexFilepath):
+                with open(self._indexFilepath, 'rb') as indexFile:
+                    indexBytes: bytes = indexFile.read()
+                self._offsetsArr.frombytes(indexBytes[: len(indexBytes) - len(indexBytes) % self._offsetsArr.itemsize])
+                if sys.byteorder == 'big':
+                    self._offsetsArr.byteswap()
+            # Keep the complete records only, and index the records that were appended after the last index update
+            self._dataEnd = headerStart + headerLength
+            validNumberOfOffsets: int = 0
+            for offset in self._offsetsArr:
+                if offset != self._dataEnd or offset + LENGTH_STRUCT.size > len(dataMmap):
+                    break
+                recordEnd: int = offset + LENGTH_STRUCT.size + LENGTH_STRUCT.unpack_from(dataMmap, offset)[0]
+                if recordEnd > len(dataMmap):
+                    break
+                self._dataEnd = recordEnd
+                validNumberOfOffsets += 1
+            if validNumberOfOffsets < len(self._offsetsArr):
+                logging.warning("PopulationArchive.ReadHeaderAndIndex(): Ignoring {} invalid index entries in {}".format(
+                    len(self._offsetsArr) - validNumberOfOffsets, self._indexFilepath))
+                del self._offsetsArr[validNumberOfOffsets:]
+            while self._dataEnd + LENGTH_STRUCT.size <= len(dataMmap):
+                recordEnd = self._dataEnd + LENGTH_STRUCT.size + LENGTH_STRUCT.unpack_from(dataMmap, self._dataEnd)[0]
+                if recordEnd > len(dataMmap):
+                    break
+                self._offsetsArr.append(self._dataEnd)
+                self._dataEnd = recordEnd
+        finally:
+            dataMmap.close()
+
+    def LittleEndianOffsets(self) -> array.array:
+        if sys.byteorder == 'big':
+            offsetsArr: array.array = array.array(OFFSET_TYPECODE, self._offsetsArr)
+            offsetsArr.byteswap()
+            return offsetsArr
+        return self._offsetsArr
+
+    def __len__(self) -> int:
+        return len(self._offsetsArr)
+
+    def __getitem__(self, individualNdx: int) -> genetic_programming.Individual:
+        if individualNdx < 0:
+            individualNdx += len(self._offsetsArr)
+        if individualNdx < 0 or individualNdx >= len(self._offsetsArr):
+            raise IndexError("PopulationArchive.__getitem__(): Index {} is out of range [0, {})".format(individualNdx, len(self._offsetsArr)))
+        dataMmap: mmap.mmap = self.Mmap()
+        offset: int = self._offsetsArr[individualNdx]
+        recordLength: int = LENGTH_STRUCT.unpack_from(dataMmap, offset)[0]
+        recordStart: int = offset + LENGTH_STRUCT.size
+        with memoryview(dataMmap) as dataView:
+            genome: genetic_programming.Genome = genetic_programming.Genome.FromBytes(
+                self._interpreter._signatureTable, dataView[recordStart: recordStart + recordLength], self._opcodeRemappingList)
+        return genetic_programming.Individual(genome=genome)
+
+    def __iter__(self) -> Iterator[genetic_programming.Individual]:
+        for individualNdx in range(len(self._offsetsArr)):
+            yield self[individualNdx]
+
+    def Mmap(self) -> mmap.mmap:
+        """
+        Maps the data file in memory, remapping it if records were appended since the last mapping
+        """
+        if self._mmap is None or len(self._mmap) < self._dataEnd:
+            if self._dataFile is not None:
+                self._dataFile.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self._filepath, 'rb') as dataFile:
+                self._mmap = mmap.mmap(dataFile.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def Append(self, individual: genetic_programming.Individual) -> None:
+        if self._dataFile is None:
+            raise ValueError("PopulationArchive.Append(): The archive {} is opened in mode '{}'".format(self._filepath, self._mode))
+        if self._opcodeRemappingList is not None:
+            raise ValueError("PopulationArchive.Append(): The archive {} was written with a different domain".format(self._filepath))
+        genomeBytes: bytes = self._interpreter.Genome(individual).ToBytes()
+        self._dataFile.write(LENGTH_STRUCT.pack(len(genomeBytes)) + genomeBytes)
+        self._offsetsArr.append(self._dataEnd)
+        self._indexFile.write(struct.pack('<' + OFFSET_TYPECODE, self._dataEnd))
+        self._dataEnd += LENGTH_STRUCT.size + len(genomeBytes)
+
+    def Extend(self, individuals: List[genetic_programming.Individual]) -> None:
+        for individual in individuals:
+            self.Append(individual)
+
+    def Flush(self) -> None:
+        if self._dataFile is not None:
+            self._dataFile.flush() # The data first, such that the index never points beyond the data
+            self._indexFile.flush()
+
+    def Close(self) -> None:
+        self.Flush()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._dataFile is not None:
+            self._dataFile.close()
+            self._indexFile.close()
+            self._dataFile = None
+            self._indexFile = None
+
+    def __enter__(self) -> 'PopulationArchive':
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback) -> None:
+        self.Close()
+
+    def ExportXml(self, directory: str, filenamePrefix: str = 'individual_') -> List[str]:
+        """
+        Saves each individual as an XML file, like Individual.Save(). Returns the list of file paths.
+        """
+        filepathsList: List[str] = []
+        numberOfDigits: int = len(str(max(len(self) - 1, 0)))
+        for individualNdx, individual in enumerate(self):
+            filepath: str = os.path.join(directory, '{}{}.xml'.format(filenamePrefix, str(individualNdx).zfill(numberOfDigits)))
+            individual.Save(filepath)
+            filepathsList.append(filepath)
+        return filepathsList
+
+    def ImportXml(self, filepathsList: List[str]) -> None:
+        """
+        Appends the individuals saved as XML files, like LoadIndividual()
+        """
+        for filepath in filepathsList:
+            self.Append(genetic_programming.LoadIndividual(filepath))
+
+
+def SavePopulation(filepath: str, interpreter: genetic_programming.Interpreter, individuals: List[genetic_programming.Individual]) -> None:
+    with PopulationArchive(filepath, interpreter, 'w') as archive:
+        archive.Extend(individuals)
+
+def LoadPopulation(filepath: str, interpreter: genetic_programming.Interpreter) -> List[genetic_programming.Individual]:
+    with PopulationArchive(filepath, interpreter, 'r') as archive:
+        return list(archive)
+
+
+if __name__ == '__main__':
+    import xml.etree.ElementTree as ET
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)-15s %(levelname)s %(message)s')
+
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse('./domains/arithmetics.xml'))
+    with PopulationArchive('./population.gparch', interpreter, 'w') as archive:
+        archive.ImportXml(['./domains/arithmetics_individual_example.xml'])
+    with PopulationArchive('./population.gparch', interpreter, 'r') as archive:
+        logging.info("len(archive) = {}; archive[0] = {}".format(len(archive), ET.tostring(archive[0].Tree().getroot())))
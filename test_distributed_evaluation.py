@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import random
+import threading
+import time
+from typing import Dict, List
+import numpy as np
+import pytest
+import genetic_programming
+import distributed_evaluation
+
+DOMAIN_FILEPATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'domains', 'arithmetics.xml')
+VARIABLE_NAME_TO_TYPE_DICT: Dict[str, str] = {'x': 'float', 'y': 'float'}
+
+def Dataset() -> Dict[str, np.ndarray]:
+    rng: np.random.Generator = np.random.default_rng(0)
+    dataset: Dict[str, np.ndarray] = {'x': rng.uniform(-10, 10, 200), 'y': rng.uniform(-3, 3, 200)}
+    dataset['target'] = dataset['x'] ** 2 + dataset['y']
+    return dataset
+
+def SlowMeanSquaredError(predictionsArr: np.ndarray, dataset: Dict[str, np.ndarray]) -> float:
+    time.sleep(0.02)
+    return distributed_evaluation.MeanSquaredError(predictionsArr, dataset)
+
+def Population(interpreter: genetic_programming.Interpreter, size: int, seed: int) -> List[genetic_programming.Individual]:
+    random.seed(seed)
+    return [interpreter.CreateIndividual('float', {0: 1.0, 1: 0.9, 2: 0.7, 3: 0.5}, 0.3,
+                                         {name: 1 for name in interpreter._functionNameToSignatureDict}, [-5, 5], VARIABLE_NAME_TO_TYPE_DICT)
+            for _ in range(size)]
+
+def SameCosts(costsList: List[float], expectedCostsList: List[float]) -> bool:
+    return len(costsList) == len(expectedCostsList) and \
+        all(cost == expectedCost or (np.isnan(cost) and np.isnan(expectedCost)) for cost, expectedCost in zip(costsList, expectedCostsList))
+
+def StartWorkers(coordinator: distributed_evaluation.Coordinator, numberOfWorkers: int) -> List[multiprocessing.Process]:
+    processesList: List[multiprocessing.Process] = [multiprocessing.Process(target=distributed_evaluation.RunWorker,
+                                                                            args=(coordinator.Address(), coordinator.Authkey()), daemon=True)
+                                                    for _ in range(numberOfWorkers)]
+    for process in processesList:
+        process.start()
+    return processesList
+
+def StopWorkers(processesList: List[multiprocessing.Process]) -> None:
+    for process in processesList:
+        process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+
+def test_EvaluatePopulation_matches_the_interpreter():
+    dataset: Dict[str, np.ndarray] = Dataset()
+    with distributed_evaluation.Coordinator(genetic_programming.ArithmeticsInterpreter, DOMAIN_FILEPATH, dataset, VARIABLE_NAME_TO_TYPE_DICT,
+                                            'float', distributed_evaluation.MeanSquaredError) as coordinator:
+        processesList: List[multiprocessing.Process] = StartWorkers(coordinator, 3)
+        population: List[genetic_programming.Individual] = Population(coordinator.Interpreter(), 200, 1)
+        expectedCostsList: List[float] = coordinator.Interpreter().EvaluatePopulation(population, VARIABLE_NAME_TO_TYPE_DICT, dataset,
+                                                                                       distributed_evaluation.MeanSquaredError, 'float')
+        assert SameCosts(coordinator.EvaluatePopulation(population, timeout=60), expectedCostsList)
+    StopWorkers(processesList)
+
+@pytest.mark.parametrize('secondPopulationSize', [8, 40])
+def test_EvaluatePopulation_ignores_the_batches_of_an_interrupted_call(secondPopulationSize):
+    dataset: Dict[str, np.ndarray] = Dataset()
+    with distributed_evaluation.Coordinator(genetic_programming.ArithmeticsInterpreter, DOMAIN_FILEPATH, dataset, VARIABLE_NAME_TO_TYPE_DICT,
+                                            'float', SlowMeanSquaredError) as coordinator:
+        processesList: List[multiprocessing.Process] = StartWorkers(coordinator, 2)
+        interpreter: genetic_programming.Interpreter = coordinator.Interpreter()
+        with pytest.raises(TimeoutError):
+            coordinator.EvaluatePopulation(Population(interpreter, 40, 2), timeout=0.3)
+        population: List[genetic_programming.Individual] = Population(interpreter, secondPopulationSize, 3)
+        expectedCostsList: List[float] = interpreter.EvaluatePopulation(population, VARIABLE_NAME_TO_TYPE_DICT, dataset,
+                                                                         distributed_evaluation.MeanSquaredError, 'float')
+        assert SameCosts(coordinator.EvaluatePopulation(population, timeout=60), expectedCostsList)
+    StopWorkers(processesList)
+
+def test_Close_returns_after_a_rejected_connection():
+    coordinator: distributed_evaluation.Coordinator = distributed_evaluation.Coordinator(
+        genetic_programming.ArithmeticsInterpreter, DOMAIN_FILEPATH, Dataset(), VARIABLE_NAME_TO_TYPE_DICT, 'float',
+        distributed_evaluation.MeanSquaredError)
+    with pytest.raises(multiprocessing.AuthenticationError):
+        distributed_evaluation.RunWorker(coordinator.Address(), b'wrong key', connectionTimeout=1.0)
+    closeThread: threading.Thread = threading.Thread(target=coordinator.Close, daemon=True)
+    closeThread.start()
+    closeThread.join(timeout=10)
+    assert not closeThread.is_alive()
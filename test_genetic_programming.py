@@ -0,0 +1,368 @@
+import gc
+import hashlib
+import json
+import os
+import pickle
+import random
+import shutil
+import subprocess
+import sys
+import weakref
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List
+import numpy as np
+import pytest
+import genetic_programming
+
+DOMAIN_FILEPATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'domains', 'arithmetics.xml')
+VARIABLE_NAME_TO_TYPE_DICT: Dict[str, str] = {'x': 'float', 'y': 'float'}
+IF_FLOAT_INDIVIDUAL_STR: str = '''<individual><if_float>
+    <greaterThan_float><variable>x</variable><constant>0.0</constant></greaterThan_float>
+    <division_float><variable>y</variable><variable>x</variable></division_float>
+    <addition_float><variable>x</variable><constant>1.0</constant></addition_float>
+</if_float></individual>'''
+
+class ValuesInterpreter(genetic_programming.Interpreter):
+    """
+    Interpreter implementing the domain functions with an if/elif chain, without registered primitives
+    """
+    def FunctionDefinition(self, functionName: str, argumentsList: List[Any]) -> Any:
+        if functionName == 'greaterThan_float':
+            return float(argumentsList[0]) > float(argumentsList[1])
+        elif functionName == 'division_float':
+            return 0.0 if float(argumentsList[1]) == 0 else float(argumentsList[0]) / float(argumentsList[1])
+        elif functionName == 'addition_float':
+            return float(argumentsList[0]) + float(argumentsList[1])
+        elif functionName == 'if_float':
+            return float(argumentsList[1]) if argumentsList[0] else float(argumentsList[2])
+        raise NotImplementedError("ValuesInterpreter.FunctionDefinition(): Not implemented function '{}'".format(functionName))
+
+    def CreateConstant(self, returnType: str, parametersList: Any) -> str:
+        return '0.0'
+
+    def TypeConverter(self, type: str, value: Any) -> Any:
+        return float(value)
+
+def IfFloatIndividual() -> genetic_programming.Individual:
+    return genetic_programming.Individual(ET.ElementTree(ET.fromstring(IF_FLOAT_INDIVIDUAL_STR)))
+
+def Population(interpreter: genetic_programming.Interpreter, size: int, seed: int, returnType: str = 'float') -> List[genetic_programming.Individual]:
+    random.seed(seed)
+    return [interpreter.CreateIndividual(returnType, {0: 1.0, 1: 0.9, 2: 0.7, 3: 0.5, 4: 0.3}, 0.3,
+                                         {name: 1 for name in interpreter._functionNameToSignatureDict}, [-5, 5], VARIABLE_NAME_TO_TYPE_DICT)
+            for _ in range(size)]
+
+def Rows(numberOfRows: int, seed: int) -> List[Dict[str, float]]:
+    rng: random.Random = random.Random(seed)
+    return [{'x': rng.choice([0.0, rng.uniform(-10, 10)]), 'y': rng.uniform(-3, 3)} for _ in range(numberOfRows)]
+
+def ExpectedValue(x: float, y: float) -> float:
+    return y / x if x > 0 else x + 1.0
+
+@pytest.mark.parametrize('interpreterClass', [ValuesInterpreter, genetic_programming.ArithmeticsInterpreter])
+def test_FunctionDefinition_receives_the_evaluated_arguments(interpreterClass: type) -> None:
+    interpreter: genetic_programming.Interpreter = interpreterClass(ET.parse(DOMAIN_FILEPATH))
+    individual: genetic_programming.Individual = IfFloatIndividual()
+    rootElm: ET.Element = list(individual.Tree().getroot())[0]
+    for x, y in [(2.0, 3.0), (-2.0, 3.0)]:
+        variableNameToValueDict: Dict[str, float] = {'x': x, 'y': y}
+        assert interpreter.EvaluateElement(rootElm, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == ExpectedValue(x, y)
+        assert interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == ExpectedValue(x, y)
+        assert interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == ExpectedValue(x, y)
+    variableNameToArrayDict: Dict[str, np.ndarray] = {'x': np.array([2.0, -2.0, 0.0]), 'y': np.array([3.0, 3.0, 1.0])}
+    expectedArr: np.ndarray = np.array([ExpectedValue(x, y) for x, y in zip(variableNameToArrayDict['x'], variableNameToArrayDict['y'])])
+    assert np.array_equal(interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict, 'float'), expectedArr)
+    assert np.array_equal(interpreter.EvaluateBatchIncremental(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict, 'float', 'dataset'),
+                          expectedArr)
+
+def test_only_the_primitives_declared_lazy_receive_callables() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    ifFloatOpcode: int = interpreter._signatureTable._functionNameToOpcodeDict['if_float']
+    assert interpreter._opcodeToPrimitiveIsLazyList[ifFloatOpcode] and interpreter._opcodeToBatchPrimitiveIsLazyList[ifFloatOpcode]
+    assert sum(interpreter._opcodeToPrimitiveIsLazyList) == 1 and sum(interpreter._opcodeToBatchPrimitiveIsLazyList) == 1
+    valuesInterpreter: ValuesInterpreter = ValuesInterpreter(ET.parse(DOMAIN_FILEPATH))
+    assert not any(valuesInterpreter._opcodeToPrimitiveIsLazyList) and not any(valuesInterpreter._opcodeToBatchPrimitiveIsLazyList)
+    assert interpreter.FunctionDefinition('if_float', [False, 1.0, 2.0]) == 2.0
+    assert np.array_equal(interpreter.FunctionDefinitionBatch('if_float', [np.array([True, False]), np.array([1.0, 2.0]), 3.0]),
+                          np.array([1.0, 3.0]))
+
+def test_TreeHasChanged_keeps_the_modifications_in_place() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    variableNameToValueDict: Dict[str, float] = {'x': -2.0, 'y': 3.0}
+    loadedIndividual: genetic_programming.Individual = IfFloatIndividual()
+    createdIndividual: genetic_programming.Individual = genetic_programming.Individual(genome=interpreter.Genome(IfFloatIndividual()))
+    for individual in [loadedIndividual, createdIndividual]:
+        assert interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == -1.0
+        compiledFunction = interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')
+        # x + 1.0 -> x + 5.0
+        individual.Tree().getroot().find('if_float/addition_float/constant').text = '5.0'
+        individual.TreeHasChanged()
+        assert interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == 3.0
+        assert interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float') is not compiledFunction
+        assert interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == 3.0
+        assert interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, {'x': np.array([-2.0]), 'y': np.array([3.0])}, 'float')[0] == 3.0
+
+def test_instrumentation_times_Validate_and_the_primitive_dispatch() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    interpreter.EnableInstrumentation()
+    variableNameToValueDict: Dict[str, float] = {'x': 2.0, 'y': 3.0}
+    interpreter.Evaluate(IfFloatIndividual(), VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float')
+    interpreter.EvaluateBatch(IfFloatIndividual(), VARIABLE_NAME_TO_TYPE_DICT, {'x': np.array([2.0, -2.0]), 'y': np.array([3.0, 3.0])}, 'float')
+    interpreter.Compile(IfFloatIndividual(), VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict)
+    statisticsDict: Dict[str, Any] = interpreter.InstrumentationStatistics()
+    assert statisticsDict['methods']['Validate']['calls'] == 3 and statisticsDict['methods']['Validate']['seconds'] > 0
+    # if_float, greaterThan_float and the selected branch; both branches for the two rows of the batch
+    assert statisticsDict['methods']['primitiveDispatch']['calls'] == 3 + 4 + 3
+    assert 0 < statisticsDict['methods']['primitiveDispatch']['seconds'] <= \
+        sum(countersDict['seconds'] for countersDict in list(statisticsDict['functions'].values()) + list(statisticsDict['batchFunctions'].values()))
+    assert statisticsDict['methods']['CheckIfSignatureMatches']['calls'] == 0
+    interpreter.EvaluateElement(list(IfFloatIndividual().Tree().getroot())[0], VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float')
+    assert interpreter.InstrumentationStatistics()['methods']['CheckIfSignatureMatches']['calls'] == 4
+
+@pytest.mark.parametrize('method, minimumDepth, maximumDepth', [('ramped', 3, 2), ('ramped', -1, 2), ('grow', 1, -1), ('full', -2, 3)])
+def test_CreatePopulation_rejects_invalid_depths(method: str, minimumDepth: int, maximumDepth: int) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    generator: genetic_programming.IndividualGenerator = genetic_programming.IndividualGenerator(
+        interpreter, 'float', {0: 1.0, 1: 0.5}, 0.3, {name: 1 for name in interpreter._functionNameToSignatureDict}, [-5, 5],
+        VARIABLE_NAME_TO_TYPE_DICT)
+    with pytest.raises(ValueError):
+        generator.CreatePopulation(4, method, seed=0, maximumDepth=maximumDepth, minimumDepth=minimumDepth)
+    assert len(generator.CreatePopulation(4, 'ramped', seed=0, maximumDepth=2, minimumDepth=2)) == 4
+
+def test_subtree_cache_leaves_the_dataset_writable() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    interpreter.EnableSubtreeCache(1 << 20)
+    individual: genetic_programming.Individual = genetic_programming.Individual(ET.ElementTree(ET.fromstring(
+        '<individual><if_float><constant>true</constant><variable>x</variable><variable>y</variable></if_float></individual>')))
+    variableNameToArrayDict: Dict[str, np.ndarray] = {'x': np.array([1.0, 2.0]), 'y': np.array([3.0, 4.0])}
+    for _ in range(2):
+        assert np.array_equal(interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict, 'float', 'train'),
+                              [1.0, 2.0])
+    assert interpreter.SubtreeCacheStatistics()['hits'] == 1
+    variableNameToArrayDict['x'][0] = 42.0
+    assert all(cachedResult is not variableNameToArrayDict['x'] and not cachedResult.flags.writeable
+               for cachedResult in interpreter._subtreeCache._keyToResultDict.values())
+
+class OverridingArithmeticsInterpreter(genetic_programming.ArithmeticsInterpreter):
+    def FunctionDefinition(self, functionName: str, argumentsList: List[Any]) -> Any:
+        if functionName == 'division_float':
+            return 12345.0
+        return super().FunctionDefinition(functionName, argumentsList)
+
+def test_FunctionDefinition_overrides_the_primitives_of_a_base_class() -> None:
+    interpreter: OverridingArithmeticsInterpreter = OverridingArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    individual: genetic_programming.Individual = IfFloatIndividual()
+    variableNameToValueDict: Dict[str, float] = {'x': 2.0, 'y': 1.0}
+    rootElm: ET.Element = list(individual.Tree().getroot())[0]
+    assert interpreter.EvaluateElement(rootElm, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == 12345.0
+    assert interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == 12345.0
+    assert interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == 12345.0
+    variableNameToArrayDict: Dict[str, np.ndarray] = {'x': np.array([2.0, -2.0]), 'y': np.array([1.0, 1.0])}
+    assert np.array_equal(interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict, 'float'), [12345.0, -1.0])
+    # An explicitly registered primitive takes precedence
+    interpreter.RegisterPrimitive('division_float', lambda argument1, argument2: 0.5)
+    assert interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') == 0.5
+
+@pytest.mark.parametrize('returnType', ['float', 'bool'])
+def test_Compile_matches_Evaluate(returnType: str) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    rowsList: List[Dict[str, float]] = Rows(20, 1)
+    for individual in Population(interpreter, 100, 2, returnType):
+        compiledFunction = interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, returnType)
+        evaluationsArr: np.ndarray = np.array([interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, row, returnType) for row in rowsList],
+                                              dtype=float)
+        assert np.array_equal(np.array([compiledFunction(row) for row in rowsList], dtype=float), evaluationsArr, equal_nan=True)
+
+def test_compiled_individuals_can_be_pickled() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    individual: genetic_programming.Individual = IfFloatIndividual()
+    variableNameToValueDict: Dict[str, float] = {'x': 2.0, 'y': 1.0}
+    interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')
+    interpreter.EvaluateBatchIncremental(individual, VARIABLE_NAME_TO_TYPE_DICT, {'x': np.array([2.0]), 'y': np.array([1.0])}, 'float', 'train')
+    unpickledIndividual: genetic_programming.Individual = pickle.loads(pickle.dumps(individual))
+    assert unpickledIndividual._compiledFunctionsDict == {} and unpickledIndividual._nodeOutputs is None
+    assert individual._compiledFunctionsDict and individual._nodeOutputs is not None
+    assert interpreter.Compile(unpickledIndividual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == 0.5
+
+def test_Compile_doesnt_reuse_stale_functions_nor_keep_interpreters_alive() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    individual: genetic_programming.Individual = IfFloatIndividual()
+    variableNameToValueDict: Dict[str, float] = {'x': 2.0, 'y': 1.0}
+    assert interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == 0.5
+    interpreter.RegisterPrimitive('division_float', lambda argument1, argument2: 7.0)
+    assert interpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == 7.0
+    interpreterRef: weakref.ref = weakref.ref(interpreter)
+    del interpreter
+    otherInterpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    assert otherInterpreter.Compile(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')(variableNameToValueDict) == 0.5
+    gc.collect()
+    assert interpreterRef() is None and len(individual._compiledFunctionsDict) == 1
+
+def test_pow_float_guard_counts_the_exceptions_of_math_pow() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    interpreter.EnableInstrumentation()
+    individual: genetic_programming.Individual = genetic_programming.Individual(ET.ElementTree(ET.fromstring(
+        '<individual><pow_float><variable>x</variable><variable>y</variable></pow_float></individual>')))
+    # Domain error, overflow, underflow to 0.0, 0.0 ** 2.0, regular power
+    for x, y, isFallback in [(0.0, -1.0, True), (10.0, 400.0, True), (0.5, 5000.0, False), (0.0, 2.0, False), (2.0, 3.0, False)]:
+        interpreter.ResetInstrumentationStatistics()
+        interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, {'x': x, 'y': y}, 'float')
+        interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, {'x': np.array([x, x]), 'y': np.array([y, y])}, 'float')
+        statisticsDict: Dict[str, Any] = interpreter.InstrumentationStatistics()
+        assert statisticsDict['functions']['pow_float']['guardFallbacks'] == int(isFallback), (x, y)
+        assert statisticsDict['batchFunctions']['pow_float']['guardFallbacks'] == 2 * int(isFallback), (x, y)
+
+def Generator(interpreter: genetic_programming.Interpreter) -> genetic_programming.IndividualGenerator:
+    return genetic_programming.IndividualGenerator(interpreter, 'float', {0: 1.0, 1: 0.9, 2: 0.7, 3: 0.5, 4: 0.3}, 0.3,
+                                                   {name: 1 for name in interpreter._functionNameToSignatureDict}, [-5, 5],
+                                                   VARIABLE_NAME_TO_TYPE_DICT)
+
+def test_Crossover_rejects_subtrees_of_different_types() -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    individual: genetic_programming.Individual = IfFloatIndividual()
+    other: genetic_programming.Individual = IfFloatIndividual()
+    interpreter.Genome(individual)
+    interpreter.Genome(other)
+    # Node 1 is the bool condition, node 4 the float division
+    with pytest.raises(ValueError):
+        individual.Crossover(other, 1, 4)
+    with pytest.raises(ValueError):
+        individual.ReplaceSubtree(4, other, 1)
+    offspring1, offspring2 = individual.Crossover(other, 1, 1)
+    assert interpreter.Evaluate(offspring1, VARIABLE_NAME_TO_TYPE_DICT, {'x': 2.0, 'y': 1.0}, 'float') == 0.5
+
+@pytest.mark.parametrize('maximumNumberOfBytes', [1 << 30, 1000])
+def test_EvaluateBatchIncremental_matches_EvaluateBatch_after_Mutate_and_Crossover(maximumNumberOfBytes: int) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    generator: genetic_programming.IndividualGenerator = Generator(interpreter)
+    rng: np.random.Generator = np.random.default_rng(0)
+    variableNameToArrayDict: Dict[str, np.ndarray] = {'x': np.where(rng.random(50) < 0.2, 0.0, rng.uniform(-10, 10, 50)), 'y': rng.uniform(-3, 3, 50)}
+    population: List[genetic_programming.Individual] = generator.CreatePopulation(40, 'ramped', seed=3, maximumDepth=5, minimumDepth=2)
+    random.seed(4)
+    numberOfReusedNodes: int = 0
+    for generationNdx in range(5):
+        for individual in population:
+            incrementalArr: np.ndarray = interpreter.EvaluateBatchIncremental(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict,
+                                                                               'float', 'train', maximumNumberOfBytes)
+            assert np.array_equal(incrementalArr, interpreter.EvaluateBatch(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict, 'float'),
+                                  equal_nan=True)
+            nodeOutputsStatisticsDict: Dict[str, int] = individual._nodeOutputs.Statistics()
+            assert nodeOutputsStatisticsDict['numberOfBytes'] <= maximumNumberOfBytes
+            assert nodeOutputsStatisticsDict['numberOfBytes'] == sum(genetic_programming.SubtreeCache.ResultNumberOfBytes(output)
+                                                                     for output in individual._nodeOutputs._outputsList if output is not None)
+            numberOfReusedNodes += nodeOutputsStatisticsDict['reusedNodes']
+        offspringList: List[genetic_programming.Individual] = []
+        for individualNdx in range(0, len(population), 2):
+            parent1, parent2 = population[individualNdx], population[individualNdx + 1]
+            otherTypeToNodeNdxsDict: Dict[Any, List[int]] = {}
+            for otherNdx in range(len(parent2._genome)):
+                otherTypeToNodeNdxsDict.setdefault(parent2._genome.SubtreeType(otherNdx), []).append(otherNdx)
+            nodeNdxsList: List[int] = [nodeNdx for nodeNdx in range(len(parent1._genome)) if parent1._genome.SubtreeType(nodeNdx) in otherTypeToNodeNdxsDict]
+            nodeNdx: int = random.choice(nodeNdxsList) if len(nodeNdxsList) > 0 else 0 # The root of a single-node individual has no known type
+            otherNodeNdx: int = random.choice(otherTypeToNodeNdxsDict.get(parent1._genome.SubtreeType(nodeNdx), [0]))
+            offspringList.extend(parent1.Crossover(parent2, nodeNdx, otherNodeNdx))
+        for offspring in offspringList[::3]:
+            generator.Mutate(offspring, maximumDepth=6)
+        population = offspringList
+    if maximumNumberOfBytes > 1000:
+        assert numberOfReusedNodes > 0
+
+def test_import_defers_the_worker_modules() -> None:
+    completedProcess: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, '-c', "import sys, genetic_programming; print(sorted(m for m in ['concurrent.futures', 'multiprocessing.shared_memory', "
+                               "'tempfile', 'xml.dom.minidom'] if m in sys.modules))"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True)
+    assert completedProcess.stdout.strip() == '[]'
+
+def test_LoadSignatureTable_reuses_rebuilds_and_ignores_the_cache(tmp_path: Any, monkeypatch: Any) -> None:
+    domainFilepath: str = str(tmp_path / 'arithmetics.xml')
+    shutil.copyfile(DOMAIN_FILEPATH, domainFilepath)
+    cacheFilepath: str = domainFilepath + genetic_programming.SIGNATURE_TABLE_CACHE_SUFFIX
+    parseDomainFunctions = genetic_programming.ParseDomainFunctions
+    numberOfParsesList: List[int] = [0]
+
+    def CountedParseDomainFunctions(domainFunctionsTree: ET.ElementTree) -> Dict[str, genetic_programming.FunctionSignature]:
+        numberOfParsesList[0] += 1
+        return parseDomainFunctions(domainFunctionsTree)
+    monkeypatch.setattr(genetic_programming, 'ParseDomainFunctions', CountedParseDomainFunctions)
+    expectedCompactStateDict: Dict[str, Any] = genetic_programming.SignatureTable(parseDomainFunctions(ET.parse(DOMAIN_FILEPATH))).CompactState()
+
+    # Written, then reused while the domain file is unchanged
+    for _ in range(2):
+        assert genetic_programming.LoadSignatureTable(domainFilepath).CompactState() == expectedCompactStateDict
+    assert numberOfParsesList[0] == 1 and os.path.exists(cacheFilepath)
+
+    # Rebuilt when the domain file changes
+    with open(domainFilepath, 'r') as domainFile:
+        domainStr: str = domainFile.read()
+    with open(domainFilepath, 'w') as domainFile:
+        domainFile.write(domainStr.replace('<name>exp</name>', '<name>exponential</name>'))
+    signatureTable: genetic_programming.SignatureTable = genetic_programming.LoadSignatureTable(domainFilepath)
+    assert numberOfParsesList[0] == 2 and 'exponential' in signatureTable._functionNameToOpcodeDict
+    genetic_programming.LoadSignatureTable(domainFilepath)
+    assert numberOfParsesList[0] == 2
+
+    # Corrupt caches are ignored, and replaced
+    with open(domainFilepath, 'rb') as domainFile:
+        contentHash: str = hashlib.sha256(domainFile.read()).hexdigest()
+    for corruptCacheStr in ['{"format": ', json.dumps({'format': genetic_programming.SIGNATURE_TABLE_CACHE_FORMAT, 'sha256': contentHash,
+                                                       'table': {'functionNames': ['f']}})]:
+        with open(cacheFilepath, 'w') as cacheFile:
+            cacheFile.write(corruptCacheStr)
+        numberOfParses: int = numberOfParsesList[0]
+        assert genetic_programming.LoadSignatureTable(domainFilepath).CompactState() == signatureTable.CompactState()
+        assert numberOfParsesList[0] == numberOfParses + 1
+        genetic_programming.LoadSignatureTable(domainFilepath)
+        assert numberOfParsesList[0] == numberOfParses + 1
+
+@pytest.mark.parametrize('functionStr, expectedStr, expectedNumberOfRemovedNodes', [
+    # Constant folding
+    ('<addition_float><constant>1.5</constant><multiplication_float><constant>2.0</constant><constant>3.0</constant></multiplication_float>'
+     '</addition_float>', '<constant>7.5</constant>', 4),
+    # Identities
+    ('<multiplication_float><constant>1.0</constant><subtraction_float><variable>x</variable><constant>0.0</constant></subtraction_float>'
+     '</multiplication_float>', '<variable>x</variable>', 4),
+    # Annihilator
+    ('<addition_float><variable>y</variable><division_float><variable>x</variable><constant>0.0</constant></division_float></addition_float>',
+     '<variable>y</variable>', 4),
+    # Dead branch, once the condition is folded
+    ('<if_float><greaterThan_float><constant>1.0</constant><constant>2.0</constant></greaterThan_float><variable>x</variable>'
+     '<addition_float><variable>y</variable><variable>x</variable></addition_float></if_float>',
+     '<addition_float><variable>y</variable><variable>x</variable></addition_float>', 5),
+    # Identical branches
+    ('<if_float><greaterThan_float><variable>x</variable><variable>y</variable></greaterThan_float><variable>y</variable><variable>y</variable>'
+     '</if_float>', '<variable>y</variable>', 5),
+    # Nothing to simplify
+    ('<division_float><variable>y</variable><constant>2.0</constant></division_float>',
+     '<division_float><variable>y</variable><constant>2.0</constant></division_float>', 0)])
+def test_Simplify_applies_the_rules(functionStr: str, expectedStr: str, expectedNumberOfRemovedNodes: int) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    individual: genetic_programming.Individual = genetic_programming.Individual(ET.ElementTree(ET.fromstring(
+        '<individual>' + functionStr + '</individual>')))
+    simplifiedIndividual, numberOfRemovedNodes = interpreter.Simplify(individual, VARIABLE_NAME_TO_TYPE_DICT, 'float')
+    assert ET.tostring(list(simplifiedIndividual.Tree().getroot())[0]) == ET.tostring(ET.fromstring(expectedStr))
+    assert numberOfRemovedNodes == expectedNumberOfRemovedNodes
+    # The original individual is left unchanged
+    assert ET.tostring(list(individual.Tree().getroot())[0]) == ET.tostring(ET.fromstring(functionStr))
+
+@pytest.mark.parametrize('returnType', ['float', 'bool'])
+def test_Simplify_preserves_the_evaluations(returnType: str) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+    rowsList: List[Dict[str, float]] = Rows(20, 3)
+    variableNameToArrayDict: Dict[str, np.ndarray] = {variableName: np.array([row[variableName] for row in rowsList]) for variableName in ['x', 'y']}
+    totalNumberOfRemovedNodes: int = 0
+    for individual in Population(interpreter, 200, 4, returnType):
+        simplifiedIndividual, numberOfRemovedNodes = interpreter.Simplify(individual, VARIABLE_NAME_TO_TYPE_DICT, returnType)
+        assert numberOfRemovedNodes == len(interpreter.Genome(individual)) - len(interpreter.Genome(simplifiedIndividual)) >= 0
+        totalNumberOfRemovedNodes += numberOfRemovedNodes
+        for evaluatedIndividual in [individual, simplifiedIndividual]:
+            evaluationsArr: np.ndarray = np.array([interpreter.Evaluate(evaluatedIndividual, VARIABLE_NAME_TO_TYPE_DICT, row, returnType)
+                                                   for row in rowsList], dtype=float)
+            batchEvaluationsArr: np.ndarray = np.broadcast_to(
+                interpreter.EvaluateBatch(evaluatedIndividual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToArrayDict, returnType), (len(rowsList),))
+            if evaluatedIndividual is individual:
+                expectedArr, expectedBatchArr = evaluationsArr, batchEvaluationsArr.astype(float)
+        assert np.array_equal(evaluationsArr, expectedArr, equal_nan=True)
+        # The constants are folded with FunctionDefinition(), whose math functions may differ from numpy's by an ulp
+        assert np.allclose(batchEvaluationsArr.astype(float), expectedBatchArr, rtol=1e-12, atol=0.0, equal_nan=True)
+    assert totalNumberOfRemovedNodes > 0
@@ -0,0 +1,137 @@
+import logging
+import os
+import random
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List
+import pytest
+import genetic_programming
+import population_archive
+
+DOMAIN_FILEPATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'domains', 'arithmetics.xml')
+VARIABLE_NAME_TO_TYPE_DICT: Dict[str, str] = {'x': 'float', 'y': 'float'}
+
+def Interpreter() -> genetic_programming.ArithmeticsInterpreter:
+    return genetic_programming.ArithmeticsInterpreter(ET.parse(DOMAIN_FILEPATH))
+
+def Population(interpreter: genetic_programming.Interpreter, size: int, seed: int) -> List[genetic_programming.Individual]:
+    random.seed(seed)
+    return [interpreter.CreateIndividual('float', {0: 1.0, 1: 0.9, 2: 0.7, 3: 0.5}, 0.3,
+                                         {name: 1 for name in interpreter._functionNameToSignatureDict}, [-5, 5], VARIABLE_NAME_TO_TYPE_DICT)
+            for _ in range(size)]
+
+def TreeStrings(individuals: Any) -> List[bytes]:
+    return [ET.tostring(individual.Tree().getroot()) for individual in individuals]
+
+def FileSize(filepath: str) -> int:
+    return os.path.getsize(filepath)
+
+def test_round_trip(tmp_path: Any) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    population: List[genetic_programming.Individual] = Population(interpreter, 30, 0)
+    filepath: str = str(tmp_path / 'population.gparch')
+    population_archive.SavePopulation(filepath, interpreter, population)
+    assert TreeStrings(population_archive.LoadPopulation(filepath, interpreter)) == TreeStrings(population)
+    with population_archive.PopulationArchive(filepath, interpreter) as archive:
+        assert len(archive) == 30
+        assert TreeStrings([archive[-1], archive[3]]) == TreeStrings([population[-1], population[3]])
+        with pytest.raises(IndexError):
+            archive[30]
+        with pytest.raises(ValueError):
+            archive.Append(population[0])
+
+def test_append(tmp_path: Any) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    population: List[genetic_programming.Individual] = Population(interpreter, 20, 1)
+    filepath: str = str(tmp_path / 'population.gparch')
+    population_archive.SavePopulation(filepath, interpreter, population[: 5])
+    with population_archive.PopulationArchive(filepath, interpreter, 'a') as archive:
+        archive.Extend(population[5: 12])
+        # The appended records are readable before closing
+        assert len(archive) == 12 and TreeStrings([archive[11]]) == TreeStrings([population[11]])
+    with population_archive.PopulationArchive(filepath, interpreter, 'a') as archive:
+        archive.Extend(population[12:])
+    assert TreeStrings(population_archive.LoadPopulation(filepath, interpreter)) == TreeStrings(population)
+
+def test_truncated_record_is_dropped(tmp_path: Any) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    population: List[genetic_programming.Individual] = Population(interpreter, 10, 2)
+    filepath: str = str(tmp_path / 'population.gparch')
+    population_archive.SavePopulation(filepath, interpreter, population)
+    # A crash in the middle of the last record
+    with population_archive.PopulationArchive(filepath, interpreter) as archive:
+        lastRecordOffset: int = archive._offsetsArr[-1]
+    with open(filepath, 'r+b') as dataFile:
+        dataFile.truncate(FileSize(filepath) - 3)
+    assert TreeStrings(population_archive.LoadPopulation(filepath, interpreter)) == TreeStrings(population[: 9])
+    # Appending truncates the partial record first
+    with population_archive.PopulationArchive(filepath, interpreter, 'a') as archive:
+        assert FileSize(filepath) == lastRecordOffset
+        archive.Append(population[9])
+    assert TreeStrings(population_archive.LoadPopulation(filepath, interpreter)) == TreeStrings(population)
+
+@pytest.mark.parametrize('numberOfIndexedRecords', [0, 4])
+def test_unindexed_records_are_indexed(tmp_path: Any, numberOfIndexedRecords: int) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    population: List[genetic_programming.Individual] = Population(interpreter, 10, 3)
+    filepath: str = str(tmp_path / 'population.gparch')
+    population_archive.SavePopulation(filepath, interpreter, population)
+    # A crash after the data was flushed, but before the index was
+    with open(filepath + '.idx', 'r+b') as indexFile:
+        indexFile.truncate(8 * numberOfIndexedRecords + 5)
+    assert TreeStrings(population_archive.LoadPopulation(filepath, interpreter)) == TreeStrings(population)
+    # Opening in mode 'a' rewrites the complete index
+    with population_archive.PopulationArchive(filepath, interpreter, 'a'):
+        pass
+    assert FileSize(filepath + '.idx') == 8 * len(population)
+
+def test_invalid_index_entries_are_dropped(tmp_path: Any, caplog: Any) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    population: List[genetic_programming.Individual] = Population(interpreter, 10, 4)
+    filepath: str = str(tmp_path / 'population.gparch')
+    population_archive.SavePopulation(filepath, interpreter, population)
+    # The data file lost its last 3 records, but the index still points to them, and beyond
+    with population_archive.PopulationArchive(filepath, interpreter) as archive:
+        offsetsList: List[int] = list(archive._offsetsArr)
+    with open(filepath, 'r+b') as dataFile:
+        dataFile.truncate(offsetsList[7])
+    with open(filepath + '.idx', 'ab') as indexFile:
+        indexFile.write((10 ** 9).to_bytes(8, 'little'))
+    with caplog.at_level(logging.WARNING):
+        assert TreeStrings(population_archive.LoadPopulation(filepath, interpreter)) == TreeStrings(population[: 7])
+    assert 'Ignoring 4 invalid index entries' in caplog.text
+
+def test_opcodes_are_remapped_to_the_interpreter_domain(tmp_path: Any) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    population: List[genetic_programming.Individual] = Population(interpreter, 10, 5)
+    filepath: str = str(tmp_path / 'population.gparch')
+    population_archive.SavePopulation(filepath, interpreter, population)
+    # The same functions, in the reverse order
+    domainTree: ET.ElementTree = ET.parse(DOMAIN_FILEPATH)
+    functionElmsList: List[ET.Element] = list(domainTree.getroot())
+    for functionElm in functionElmsList:
+        domainTree.getroot().remove(functionElm)
+    domainTree.getroot().extend(reversed(functionElmsList))
+    reversedInterpreter: genetic_programming.ArithmeticsInterpreter = genetic_programming.ArithmeticsInterpreter(domainTree)
+    assert reversedInterpreter._signatureTable._functionNamesTuple != interpreter._signatureTable._functionNamesTuple
+    with population_archive.PopulationArchive(filepath, reversedInterpreter) as archive:
+        assert archive._opcodeRemappingList is not None
+        assert TreeStrings(archive) == TreeStrings(population)
+        variableNameToValueDict: Dict[str, float] = {'x': 1.5, 'y': -0.5}
+        assert [reversedInterpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') for individual in archive] == \
+            [interpreter.Evaluate(individual, VARIABLE_NAME_TO_TYPE_DICT, variableNameToValueDict, 'float') for individual in population]
+    with population_archive.PopulationArchive(filepath, reversedInterpreter, 'a') as archive:
+        with pytest.raises(ValueError):
+            archive.Append(population[0])
+
+def test_invalid_archives_are_rejected(tmp_path: Any) -> None:
+    interpreter: genetic_programming.ArithmeticsInterpreter = Interpreter()
+    filepath: str = str(tmp_path / 'population.gparch')
+    with open(filepath, 'wb') as dataFile:
+        dataFile.write(b'not an archive')
+    with pytest.raises(ValueError):
+        population_archive.PopulationArchive(filepath, interpreter)
+    population_archive.SavePopulation(filepath, interpreter, Population(interpreter, 2, 6))
+    domainTree: ET.ElementTree = ET.parse(DOMAIN_FILEPATH)
+    domainTree.getroot().find('function/name').text = 'renamed_function'
+    with pytest.raises(KeyError):
+        population_archive.PopulationArchive(filepath, genetic_programming.ArithmeticsInterpreter(domainTree))